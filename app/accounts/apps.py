@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from accounts import follows, profile, suggestions
+        follows.connect_signals()
+        profile.connect_signals()
+        suggestions.connect_signals()
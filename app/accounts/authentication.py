@@ -0,0 +1,163 @@
+"""
+JWT authentication without a per-request user query.
+
+``StatelessJWTAuthentication`` trusts the user id in a valid access token and
+checks it against a short-lived, process-local cache of the user's state
+(``is_active``, ``is_staff``, ``is_superuser`` and ``token_version``). The
+request user is a ``ClaimsUser``: ``id``, ``pk`` and the cached flags are
+answered from that state, and any other attribute loads the full ``User``
+on first access.
+
+Tokens carry the ``tv`` claim. Raising ``User.token_version`` (see
+``revoke_tokens``) rejects every token issued before, once the cached state
+expires (``AUTH_STATE_CACHE_TTL`` seconds) or immediately in this process.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.db.models.base import ModelState
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core.models import User
+
+STATE_TTL = getattr(settings, 'AUTH_STATE_CACHE_TTL', 30)
+STATE_FIELDS = ('is_active', 'is_staff', 'is_superuser', 'token_version')
+
+
+class UserStateCache:
+    """Thread-safe TTL cache of the authentication state of users."""
+
+    def __init__(self, ttl=STATE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._states.get(user_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        state = User.objects.filter(pk=user_id).values(*STATE_FIELDS).first()
+        if state is not None:
+            with self._lock:
+                self._states[user_id] = (now + self.ttl, state)
+        return state
+
+    def discard(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._states.pop(user_id, None)
+
+
+states = UserStateCache()
+
+
+def revoke_tokens(user_ids):
+    """Invalidate every token issued to the users so far."""
+    User.objects.filter(pk__in=user_ids).update(
+        token_version=F('token_version') + 1
+    )
+    states.discard(user_ids)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Request user built from the token and the cached state.
+
+    It passes ``isinstance(user, User)`` and can be used in queries and
+    comparisons without being loaded.
+    """
+
+    def __init__(self, user_id, state):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__['_user_id'] = user_id
+        self.__dict__['_auth_state'] = state
+        # Django reads _state when the user is assigned to a foreign key;
+        # a saved instance's state keeps that from loading the user.
+        model_state = ModelState()
+        model_state.adding = False
+        model_state.db = DEFAULT_DB_ALIAS
+        self.__dict__['_state'] = model_state
+
+    __class__ = property(lambda self: User)
+    _meta = User._meta
+    is_authenticated = True
+    is_anonymous = False
+
+    def __getattr__(self, name):
+        # Probes such as hasattr(user, 'resolve_expression') in the ORM must
+        # not load the user for attributes no User instance has.
+        if not name.startswith('_') and not hasattr(User, name):
+            raise AttributeError(name)
+        return super().__getattr__(name)
+
+    @property
+    def pk(self):
+        return self._user_id
+
+    id = pk
+
+    @property
+    def is_active(self):
+        return self._auth_state['is_active']
+
+    @property
+    def is_staff(self):
+        return self._auth_state['is_staff']
+
+    @property
+    def is_superuser(self):
+        return self._auth_state['is_superuser']
+
+    def __eq__(self, other):
+        if not isinstance(other, User):
+            return NotImplemented
+        return self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f'<ClaimsUser: {self.pk}>'
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication that does not query the user on every request."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+
+        state = states.get(user_id)
+        if state is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        if validated_token.get('tv', 0) != state['token_version']:
+            raise AuthenticationFailed(
+                _('Token has been revoked'), code='token_revoked'
+            )
+
+        return ClaimsUser(user_id, state)
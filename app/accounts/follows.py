@@ -0,0 +1,260 @@
+"""
+Bulk changes to the follow graph.
+
+Edges are written straight to the ``User.follows`` table with
+``bulk_create(ignore_conflicts=True)`` or one ``DELETE``. Each call then
+sends a single ``m2m_changed`` per follower carrying every changed id, so
+the profile and response-cache handlers run once per batch, and queues one
+timeline job and one notification batch.
+
+``User.followers_count`` and ``User.following_count`` are kept in step with
+the table by the ``m2m_changed`` handlers below, so profiles never count
+rows. Both ``follow`` and ``unfollow`` lock the follower's row before
+reading the edges, so concurrent calls cannot count the same edge twice.
+Edges removed by deleting a user are subtracted in ``pre_delete``;
+``reconcile_follow_counts`` repairs any remaining drift.
+"""
+
+import json
+
+from django.db import router, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, pre_delete
+
+from core.models import User
+from notifications import pipeline
+from posts import tasks as post_tasks
+
+IMPORT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+Follow = User.follows.through
+
+
+def _send(follower, action, pk_set):
+    m2m_changed.send(
+        sender=Follow,
+        instance=follower,
+        action=action,
+        reverse=False,
+        model=User,
+        pk_set=pk_set,
+        using=router.db_for_write(Follow, instance=follower),
+    )
+
+
+def _valid_ids(user_ids, follower_id):
+    """Return the active users among user_ids, excluding the follower."""
+    return set(
+        User.objects.filter(pk__in=set(user_ids), is_active=True)
+        .exclude(pk=follower_id)
+        .values_list('id', flat=True)
+    )
+
+
+def _lock(follower_id):
+    """
+    Lock the follower's row until the end of the transaction.
+
+    Concurrent follows and unfollows by the same user then run one after
+    the other, so the edges each of them reads are still current when it
+    writes, and the counters move by the rows really changed.
+    """
+    User.objects.select_for_update().filter(pk=follower_id).exists()
+
+
+def follow(follower, user_ids, notify=True):
+    """
+    Make follower follow every active user in user_ids.
+
+    Returns the ids of the newly followed users.
+    """
+    valid = _valid_ids(user_ids, follower.pk)
+    if not valid:
+        return set()
+
+    instance = User(pk=follower.pk)
+    with transaction.atomic():
+        _lock(follower.pk)
+        existing = set(
+            Follow.objects.filter(
+                from_user_id=follower.pk, to_user_id__in=valid
+            ).values_list('to_user_id', flat=True)
+        )
+        added = valid - existing
+        _send(instance, 'pre_add', added)
+        Follow.objects.bulk_create(
+            [
+                Follow(from_user_id=follower.pk, to_user_id=user_id)
+                for user_id in added
+            ],
+            ignore_conflicts=True,
+        )
+        _send(instance, 'post_add', added)
+
+    if added:
+        post_tasks.backfill_timeline_many.delay(follower.pk, sorted(added))
+        if notify:
+            pipeline.notify(
+                sorted(added),
+                f'{follower.get_full_name()} started following you.',
+                sender=follower,
+                kind='follow',
+                target_id=follower.pk,
+                group_message='{count} people started following you.',
+            )
+    return added
+
+
+def unfollow(follower, user_ids):
+    """
+    Remove the follows from follower to every user in user_ids.
+
+    Returns the ids of the users that were unfollowed.
+    """
+    instance = User(pk=follower.pk)
+    with transaction.atomic():
+        _lock(follower.pk)
+        edges = Follow.objects.filter(
+            from_user_id=follower.pk, to_user_id__in=set(user_ids)
+        )
+        removed = set(edges.values_list('to_user_id', flat=True))
+        if not removed:
+            return set()
+        _send(instance, 'pre_remove', removed)
+        edges.filter(to_user_id__in=removed).delete()
+        _send(instance, 'post_remove', removed)
+
+    post_tasks.remove_authors_from_timeline.delay(follower.pk, sorted(removed))
+    return removed
+
+
+def _report(summary, number, error):
+    if len(summary['errors']) < MAX_REPORTED_ERRORS:
+        summary['errors'].append({'line': number, 'error': error})
+
+
+def import_edges(lines):
+    """
+    Import follow edges from NDJSON lines and return a summary.
+
+    Each line is ``{"follower": <id>, "follows": [<id>, ...]}`` or
+    ``{"follower": <id>, "followee": <id>}``. Lines are applied in chunks;
+    imported follows do not notify the followed users.
+    """
+    summary = {'lines': 0, 'created': 0, 'errors': []}
+    pending = {}
+    pending_edges = 0
+
+    def apply():
+        followers = User.objects.filter(
+            pk__in=pending.keys(), is_active=True
+        ).in_bulk()
+        for follower_id, followee_ids in pending.items():
+            follower = followers.get(follower_id)
+            if follower is not None:
+                summary['created'] += len(
+                    follow(follower, followee_ids, notify=False)
+                )
+        pending.clear()
+
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        summary['lines'] += 1
+        try:
+            record = json.loads(line)
+            follower_id = int(record['follower'])
+            if 'follows' in record:
+                followee_ids = [int(user_id) for user_id in record['follows']]
+            else:
+                followee_ids = [int(record['followee'])]
+        except KeyError as exc:
+            _report(summary, number, f'missing field {exc}')
+            continue
+        except (ValueError, TypeError) as exc:
+            _report(summary, number, str(exc))
+            continue
+
+        pending.setdefault(follower_id, []).extend(followee_ids)
+        pending_edges += len(followee_ids)
+        if pending_edges >= IMPORT_CHUNK_SIZE:
+            apply()
+            pending_edges = 0
+
+    apply()
+    return summary
+
+
+def _adjust(user_ids, field, delta):
+    """Add delta to the counter field of every user in user_ids."""
+    if user_ids and delta:
+        User.objects.filter(pk__in=user_ids).update(
+            **{field: Greatest(F(field) + delta, Value(0))}
+        )
+
+
+def _apply(follower_ids, followee_ids, sign):
+    """Count the edges between every follower and every followee."""
+    _adjust(follower_ids, 'following_count', sign * len(followee_ids))
+    _adjust(followee_ids, 'followers_count', sign * len(follower_ids))
+
+
+def _follows_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    owner, other = (
+        ('to_user_id', 'from_user_id')
+        if reverse
+        else ('from_user_id', 'to_user_id')
+    )
+
+    if action in ('pre_remove', 'pre_clear'):
+        # remove() reports the ids it was given and clear() none at all;
+        # remember the edges that actually exist.
+        edges = sender.objects.filter(**{owner: instance.pk})
+        if action == 'pre_remove':
+            edges = edges.filter(**{f'{other}__in': pk_set})
+        instance.__dict__['_follow_removed_ids'] = set(
+            edges.values_list(other, flat=True)
+        )
+        return
+    if action == 'post_add':
+        # add() reports only the ids it inserted.
+        ids, sign = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        ids, sign = instance.__dict__.pop('_follow_removed_ids', set()), -1
+    else:
+        return
+
+    if ids:
+        if reverse:
+            _apply(ids, [instance.pk], sign)
+        else:
+            _apply([instance.pk], ids, sign)
+
+
+def _user_deleted(sender, instance, **kwargs):
+    following = list(
+        Follow.objects.filter(from_user_id=instance.pk).values_list(
+            'to_user_id', flat=True
+        )
+    )
+    followers = list(
+        Follow.objects.filter(to_user_id=instance.pk).values_list(
+            'from_user_id', flat=True
+        )
+    )
+    _adjust(following, 'followers_count', -1)
+    _adjust(followers, 'following_count', -1)
+
+
+def connect_signals():
+    """Keep the stored follower and following counts in step with follows."""
+    m2m_changed.connect(
+        _follows_changed, sender=Follow, dispatch_uid='follows_counters'
+    )
+    pre_delete.connect(
+        _user_deleted, sender=User, dispatch_uid='follows_user_deleted'
+    )
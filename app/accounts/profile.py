@@ -0,0 +1,139 @@
+"""
+Versioned profile snapshots.
+
+Access tokens only carry the user id and the ``pv`` (profile version)
+claim. Everything a client used to read from the token is served by the
+profile endpoint instead, cached under the version so a cached snapshot
+never has to be invalidated: any change to the profile or its relations
+writes a new version and the old key simply expires.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_save
+
+from core.models import User
+
+CACHE_TIMEOUT = getattr(settings, 'PROFILE_CACHE_TIMEOUT', 3600)
+
+# Saves limited to these fields do not change the snapshot.
+UNVERSIONED_FIELDS = frozenset(
+    {'password', 'last_login', 'search_document', 'profile_version'}
+)
+
+
+def new_version():
+    """
+    Return a fresh profile version.
+
+    Versions are microsecond timestamps rather than counters, so concurrent
+    writers never need to read the current value and never reuse a version.
+    """
+    return time.time_ns() // 1000
+
+
+def bump(user_ids):
+    """Give the users a new profile version."""
+    if user_ids:
+        User.objects.filter(pk__in=user_ids).update(
+            profile_version=new_version()
+        )
+
+
+def etag(user):
+    return f'"{user.pk}-{user.profile_version}"'
+
+
+def _cache_key(user):
+    return f'profile:{user.pk}:{user.profile_version}'
+
+
+def build_snapshot(user):
+    return {
+        'id': user.pk,
+        'version': user.profile_version,
+        'email': user.email,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_staff': user.is_staff,
+        'image': user.image.name if user.image else None,
+        'tags': list(user.tags.values_list('id', flat=True)),
+        'followers_count': user.followers_count,
+        'following_count': user.following_count,
+        'projects': list(user.projects.values_list('id', flat=True)),
+        'work_experiences': list(
+            user.work_experiences.values_list('id', flat=True)
+        ),
+    }
+
+
+def snapshot(user):
+    """Return the cached profile snapshot for the user's current version."""
+    key = _cache_key(user)
+    data = cache.get(key)
+    if data is None:
+        data = build_snapshot(user)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def _user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields and UNVERSIONED_FIELDS.issuperset(update_fields):
+        return
+    instance.profile_version = new_version()
+    User.objects.filter(pk=instance.pk).update(
+        profile_version=instance.profile_version
+    )
+
+
+def _through_columns(through, instance):
+    """Return the (owner, related) columns of a User relation table."""
+    if through is User.follows.through:
+        return 'from_user_id', 'to_user_id'
+    return 'user_id', f'{instance._meta.model_name}_id'
+
+
+def _relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    follows = sender is User.follows.through
+    if action == 'pre_clear' and (reverse or follows):
+        # pk_set is not provided for clear; remember who loses the relation.
+        owner, related = _through_columns(sender, instance)
+        if not reverse:
+            owner, related = related, owner
+        instance._profile_clear_ids = list(
+            sender.objects.filter(**{related: instance.pk}).values_list(
+                owner, flat=True
+            )
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        others = instance.__dict__.pop('_profile_clear_ids', [])
+    else:
+        others = list(pk_set or ())
+    if follows:
+        # Follower and following counts are part of both snapshots.
+        bump([instance.pk] + others)
+    elif not reverse:
+        bump([instance.pk])
+    else:
+        bump(others)
+
+
+def connect_signals():
+    """Give users a new profile version whenever their snapshot changes."""
+    post_save.connect(
+        _user_saved, sender=User, dispatch_uid='profile_user_saved'
+    )
+    for field in ('tags', 'follows', 'projects', 'work_experiences'):
+        m2m_changed.connect(
+            _relations_changed,
+            sender=getattr(User, field).through,
+            dispatch_uid=f'profile_user_{field}',
+        )
@@ -6,9 +6,18 @@ from django.contrib.auth import (
     get_user_model,
     authenticate
 )
+from django.conf import settings
 from django.utils.translation import gettext as _
 
-from core.models import Tag, WorkExperience, Project, Technologie
+from core import images
+from core.models import (
+    Tag,
+    WorkExperience,
+    Project,
+    Technologie,
+    UserSuggestion,
+)
+from core.tasks import schedule_variants
 
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
@@ -91,12 +100,30 @@ class UserSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, source='user_tags', required=False)
     work_experiences = WorkExperienceSerializer(many=True, source='user_experience', required=False)
     projects = ProjectSerializer(many=True, source='user_project', required=False)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = get_user_model()
-        fields = ['email', 'password', 'first_name', 'last_name', 'tags', 'work_experiences', 'projects', 'follows']
+        fields = [
+            'email',
+            'password',
+            'first_name',
+            'last_name',
+            'tags',
+            'work_experiences',
+            'projects',
+            'followers_count',
+            'following_count',
+            'image_variants',
+        ]
+        read_only_fields = ['followers_count', 'following_count']
         extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetch the relations rendered by this serializer."""
+        return queryset.for_serializer()
+
     def create(self, validated_data):
         """Create and return a user with encripted password."""
         tags = validated_data.pop('user_tags', [])
@@ -153,27 +180,81 @@ class UserSerializer(serializers.ModelSerializer):
             )
             user.projects.add(project_obj)
 
-    def get_followers_count(self, obj):
-        return obj.followers.count()
+    def get_image_variants(self, obj):
+        return images.srcset(obj.image)
     
+
+class FollowUserSerializer(serializers.ModelSerializer):
+    """Serializer for the users in follower and following lists."""
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = get_user_model()
+        fields = [
+            'id',
+            'username',
+            'first_name',
+            'last_name',
+            'image_variants',
+        ]
+        read_only_fields = fields
+
+    def get_image_variants(self, obj):
+        return images.srcset(obj.image)
+
+
+class UserSuggestionSerializer(serializers.ModelSerializer):
+    """Serializer for precomputed user suggestions."""
+    user = FollowUserSerializer(source='suggested', read_only=True)
+
+    class Meta:
+        model = UserSuggestion
+        fields = ['user', 'score', 'mutual_count', 'tag_overlap']
+        read_only_fields = fields
+
+
 class UserImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to User"""
+    image_variants = serializers.SerializerMethodField()
 
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ['image']
 
+    def get_image_variants(self, obj):
+        return images.srcset(obj.image)
+
+    def validate_image(self, value):
+        return images.prepare_upload(value) if value else value
+
+    def update(self, instance, validated_data):
+        """Update the user image and queue its variants."""
+        user = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            schedule_variants(user.image)
+
+        return user
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Issue compact tokens.
+
+    Only the profile and token versions are added to the default claims;
+    profile data is fetched from the profile endpoint and revalidated when
+    ``pv`` changes.
+    """
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token['email'] = user.email
-        token['username'] = user.username
-        token['first_name'] = user.first_name 
-        token['is_staff'] = user.is_staff
-        token['projects'] = [project.id for project in user.projects.all()]
-        token['tags'] = [tag.id for tag in user.tags.all()]
-        token['follows'] = [follow.id for follow in user.follows.all()]
-        token['work_experiences'] = [work_experience.id for work_experience in user.work_experiences.all()]
-        token['image'] = str(user.image)
+        token['pv'] = user.profile_version
+        token['tv'] = user.token_version
 
         return token
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """Serializer for a list of users to follow or unfollow."""
+    users = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.FOLLOW_BULK_LIMIT,
+    )
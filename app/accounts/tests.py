@@ -0,0 +1,129 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import follows
+from accounts.authentication import ClaimsUser, states
+from core import search
+from core.models import Notification, Post, User
+
+
+class ClaimsUserTests(TestCase):
+    """The JWT request user can be used wherever a User is expected."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'a@example.com', 'pw', first_name='A', last_name='B'
+        )
+        self.claims_user = ClaimsUser(self.user.pk, states.get(self.user.pk))
+
+    def test_flags_come_from_the_cached_state(self):
+        self.assertTrue(self.claims_user.is_active)
+        self.assertFalse(self.claims_user.is_staff)
+        self.assertFalse(self.claims_user.is_superuser)
+
+    def test_assign_to_foreign_key_without_loading_the_user(self):
+        with self.assertNumQueries(1):
+            post = Post.objects.create(
+                author=self.claims_user, content='hello'
+            )
+        self.assertEqual(post.author_id, self.user.pk)
+
+        notification = Notification(
+            sender=self.claims_user, recipient=self.user, message='hi'
+        )
+        notification.save()
+        self.assertEqual(notification.sender_id, self.user.pk)
+
+    def test_create_post_through_the_api_with_a_jwt(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+        response = client.post(
+            '/api/posts/', {'content': 'hello'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            Post.objects.get(pk=response.data['id']).author_id, self.user.pk
+        )
+
+
+class FollowViewTests(TestCase):
+    """Following and unfollowing one user works with the JWT."""
+
+    def setUp(self):
+        self.user, self.other = (
+            User.objects.create_user(
+                f'{name}@example.com', 'pw', first_name='A', last_name='B'
+            )
+            for name in ('a', 'b')
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def test_follow_and_unfollow(self):
+        response = self.client.post(f'/api/user/{self.other.pk}/follow/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.user.follows.filter(pk=self.other.pk).exists())
+
+        response = self.client.post(f'/api/user/{self.other.pk}/unfollow/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.user.follows.filter(pk=self.other.pk).exists())
+
+    def test_anonymous(self):
+        response = APIClient().post(f'/api/user/{self.other.pk}/follow/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_repeated_follow_is_counted_once(self):
+        self.assertEqual(
+            follows.follow(self.user, [self.other.pk], notify=False),
+            {self.other.pk},
+        )
+        self.assertEqual(
+            follows.follow(self.user, [self.other.pk], notify=False), set()
+        )
+
+        self.other.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.other.followers_count, 1)
+        self.assertEqual(self.user.following_count, 1)
+
+
+class UserSearchQueryCountTests(TestCase):
+    """User search runs a fixed number of queries, whatever the matches."""
+
+    def test_search(self):
+        searcher = User.objects.create_user(
+            'searcher@example.com', 'pw', first_name='S', last_name='S'
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(searcher)}'
+        )
+        # The first search loads the index.
+        client.get('/api/user/search_user/', {'query': 'findme'})
+        created = 0
+        for size in (1, 10, 100):
+            with self.subTest(size=size):
+                for index in range(created, size):
+                    User.objects.create_user(
+                        f'match{index}@example.com',
+                        'pw',
+                        first_name='Findme',
+                        last_name='X',
+                    )
+                created = size
+                with self.assertNumQueries(1):
+                    response = client.get(
+                        '/api/user/search_user/',
+                        {'query': 'findme', 'limit': size},
+                    )
+                self.assertEqual(
+                    len(response.data['results']),
+                    min(size, search.RESULT_LIMIT),
+                )
@@ -18,11 +18,38 @@ app_name = 'accounts'
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('user-info/', views.UserDetailView.as_view(), name='user-info'),
+    path('profile/', views.ProfileSnapshotView.as_view(), name='profile'),
     path('login/', views.LoginView.as_view()),
     path('refresh/', TokenRefreshView.as_view()),
-    path('<int:pk>/follow/', views.FollowUserView.as_view(), name='follow_user'),
-    path('<int:pk>/unfollow/', views.UnfollowUserView.as_view(), name='unfollow_user'),
-    path('search_user/', views.SearchUserViewSet.as_view(), name='search_user'),
-    path('upload_image/', views.UploadImageUserViewSet.as_view(), name='upload_image'),
+    path(
+        '<int:pk>/follow/', views.FollowUserView.as_view(), name='follow_user'
+    ),
+    path(
+        '<int:pk>/unfollow/',
+        views.UnfollowUserView.as_view(),
+        name='unfollow_user',
+    ),
+    path(
+        '<int:pk>/followers/', views.FollowersView.as_view(), name='followers'
+    ),
+    path(
+        '<int:pk>/following/', views.FollowingView.as_view(), name='following'
+    ),
+    path('follow/', views.BulkFollowView.as_view(), name='bulk_follow'),
+    path('unfollow/', views.BulkUnfollowView.as_view(), name='bulk_unfollow'),
+    path(
+        'follow/import/',
+        views.ImportFollowsView.as_view(),
+        name='import_follows',
+    ),
+    path('suggestions/', views.SuggestionsView.as_view(), name='suggestions'),
+    path(
+        'search_user/', views.SearchUserViewSet.as_view(), name='search_user'
+    ),
+    path(
+        'upload_image/',
+        views.UploadImageUserViewSet.as_view(),
+        name='upload_image',
+    ),
     path('', include(router.urls)),
 ]
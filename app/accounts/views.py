@@ -2,19 +2,29 @@
 Views for the user API.
 """
 from rest_framework import status, generics, viewsets, mixins
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import StatelessJWTAuthentication
 from . import serializers
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
-from rest_framework.decorators import permission_classes
 from accounts import serializers
-from core.models import Tag, WorkExperience, Project, Technologie, User
+from core.models import (
+    Tag,
+    WorkExperience,
+    Project,
+    Technologie,
+    User,
+    UserSuggestion,
+)
 from .serializers import UserSerializer, UserImageSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import MyTokenObtainPairSerializer
+from core import cache, search
+from core.db import ReplicaReadMixin
+from core.pagination import UserCursorPagination
+from . import follows, profile
+from posts import tasks as post_tasks
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
@@ -25,13 +35,41 @@ class LoginView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 class UserDetailView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
-        user_serializer = UserSerializer(user)
-        return Response(user_serializer.data)
+        deps = [cache.dep('user', user.pk)]
+        not_modified, headers = cache.conditional(
+            request, ('user-detail', user.pk), deps
+        )
+        if not_modified is not None:
+            return not_modified
+
+        data = cache.responses.get_or_build(
+            ('user-detail', user.pk),
+            deps,
+            lambda: dict(UserSerializer(user).data),
+        )
+        return Response(data, headers=headers)
+
+
+class ProfileSnapshotView(APIView):
+    """Cached profile snapshot of the current user, revalidated by ETag."""
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        etag = profile.etag(request.user)
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        response = Response(profile.snapshot(request.user))
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 class UploadImageUserViewSet(APIView):
     """Upload image to unique user."""
@@ -51,7 +89,6 @@ class UploadImageUserViewSet(APIView):
 
 class UploadImageUserViewSet(APIView):
     """Upload image to unique user."""
-    permission_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -67,7 +104,7 @@ class UploadImageUserViewSet(APIView):
 
 class FollowUserView(APIView):
     """Allow the authenticated user to follow another user"""
-    permission_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated]
 
     def post(self, request, pk=None):
         """Handle follow action"""
@@ -80,12 +117,13 @@ class FollowUserView(APIView):
             return Response({"detail": "You can't follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
 
         request.user.follows.add(user_to_follow)
+        post_tasks.backfill_timeline.delay(request.user.pk, user_to_follow.pk)
         return Response({"detail": f"Now you follow {user_to_follow.get_full_name()}."}, status=status.HTTP_200_OK)
 
 
 class UnfollowUserView(APIView):
     """Allow the authenticated user to unfollow another user"""
-    permission_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated]
 
     def post(self, request, pk=None):
         """Handle unfollow action"""
@@ -98,8 +136,111 @@ class UnfollowUserView(APIView):
             return Response({"detail": "You can't unfollow yourself."}, status=status.HTTP_400_BAD_REQUEST)
 
         request.user.follows.remove(user_to_unfollow)
+        post_tasks.remove_author_from_timeline.delay(
+            request.user.pk, user_to_unfollow.pk
+        )
         return Response({"detail": f"Now you unfollow {user_to_unfollow.get_full_name()}."}, status=status.HTTP_200_OK)
 
+
+class FollowersView(generics.ListAPIView):
+    """Followers of a user, paginated by cursor"""
+    serializer_class = serializers.FollowUserSerializer
+    pagination_class = UserCursorPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return User.objects.filter(follows=self.kwargs['pk'], is_active=True)
+
+
+class FollowingView(generics.ListAPIView):
+    """Users followed by a user, paginated by cursor"""
+    serializer_class = serializers.FollowUserSerializer
+    pagination_class = UserCursorPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return User.objects.filter(followers=self.kwargs['pk'], is_active=True)
+
+
+class SuggestionsView(APIView):
+    """Precomputed "people you may know" suggestions for the user"""
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(
+                int(request.query_params.get('limit', 20)), self.max_limit
+            )
+        except ValueError:
+            limit = 20
+
+        suggestions = (
+            UserSuggestion.objects
+            .filter(user=request.user.pk, suggested__is_active=True)
+            .exclude(suggested__followers=request.user.pk)
+            .select_related('suggested')
+            .order_by('-score', 'suggested_id')[:limit]
+        )
+        serializer = serializers.UserSuggestionSerializer(
+            suggestions, many=True
+        )
+        return Response({'results': serializer.data})
+
+
+class BulkFollowView(APIView):
+    """Allow the authenticated user to follow many users at once"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Follow every active user in ``users``"""
+        serializer = serializers.BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = set(serializer.validated_data['users'])
+
+        followed = follows.follow(request.user, requested)
+        return Response(
+            {
+                'followed': sorted(followed),
+                'skipped': sorted(requested - followed),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class BulkUnfollowView(APIView):
+    """Allow the authenticated user to unfollow many users at once"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Unfollow every user in ``users``"""
+        serializer = serializers.BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = set(serializer.validated_data['users'])
+
+        unfollowed = follows.unfollow(request.user, requested)
+        return Response(
+            {
+                'unfollowed': sorted(unfollowed),
+                'skipped': sorted(requested - unfollowed),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ImportFollowsView(APIView):
+    """
+    Import follow edges for admins.
+
+    The body is NDJSON, one ``{"follower": id, "follows": [ids]}`` object per
+    line. It is read as a stream, so large imports are not held in memory.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        summary = follows.import_edges(request.stream or [])
+        return Response(summary, status=status.HTTP_200_OK)
+
 class TagViewSet(
         mixins.CreateModelMixin, 
         mixins.DestroyModelMixin, 
@@ -182,7 +323,8 @@ class TechnologieViewSet(
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class SearchUserViewSet(APIView):
+
+class SearchUserViewSet(ReplicaReadMixin, APIView):
     """Allow the authenticated user can search to user."""
 
     def get(self, request):
@@ -190,8 +332,15 @@ class SearchUserViewSet(APIView):
         if query is None:
             query = ''
 
-        user = User.objects.filter(Q(first_name__icontains=query) | Q(last_name__icontains=query))
+        try:
+            limit = min(
+                int(request.query_params.get('limit', search.RESULT_LIMIT)),
+                search.RESULT_LIMIT,
+            )
+        except ValueError:
+            limit = search.RESULT_LIMIT
 
-        serializer = UserSerializer(user, many=True)
+        users = search.search_users(query, limit)
+        serializer = UserSerializer(users, many=True)
 
-        return Response({'users': serializer.data})
\ No newline at end of file
+        return Response({'results': serializer.data})
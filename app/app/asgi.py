@@ -1,16 +1,26 @@
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-from notifications.routing import websocket_urlpatterns
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from notifications.middleware import JWTAuthMiddleware  # noqa: E402
+from notifications.routing import (  # noqa: E402
+    websocket_urlpatterns as notification_urlpatterns,
+)
+from chat.routing import (  # noqa: E402
+    websocket_urlpatterns as chat_urlpatterns,
+)
+
+websocket_router = URLRouter(notification_urlpatterns + chat_urlpatterns)
 
 application = ProtocolTypeRouter({
-    'http': get_asgi_application(),
-    'websocket': AuthMiddlewareStack(
-        URLRouter(
-            websocket_urlpatterns
-        )
+    'http': django_asgi_app,
+    'websocket': JWTAuthMiddleware(
+        websocket_router,
+        fallback=AuthMiddlewareStack(websocket_router),
     ),
-})
\ No newline at end of file
+})
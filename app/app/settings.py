@@ -56,9 +56,10 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.Authenti    cationMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -94,12 +95,80 @@ CHANNEL_LAYERS = {
     }
 }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# PostgreSQL when DB_HOST is set, otherwise SQLite for development. Each
+# host in DB_REPLICA_HOSTS, or the SQLite replica, becomes a read replica
+# ('replica1', ...) that core.db.ReplicaRouter serves the read-only views
+# from. Connections are kept open for DB_CONN_MAX_AGE seconds and, while
+# DB_CONNECTION_HEALTH_CHECKS is on, checked at the start of every request
+# by core.db, so a connection the server dropped is reopened instead of
+# failing the request.
+
+DB_HOST = os.environ.get('DB_HOST')
+
+if DB_HOST:
+    def _postgres(host):
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'HOST': host,
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'NAME': os.environ.get('DB_NAME'),
+            'USER': os.environ.get('DB_USER'),
+            'PASSWORD': os.environ.get('DB_PASS'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
+
+    DATABASES = {'default': _postgres(DB_HOST)}
+    replica_hosts = [host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+    for number, host in enumerate(replica_hosts, 1):
+        DATABASES[f'replica{number}'] = {**_postgres(host), 'TEST': {'MIRROR': 'default'}}
+else:
+    # The SQLite replica reads the development database itself unless
+    # DB_SQLITE_REPLICA names another file, e.g. a lagging copy of it. Tests
+    # give it a separate database, so a read from the wrong alias shows.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        },
+        'replica1': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_SQLITE_REPLICA', BASE_DIR / 'db.sqlite3'),
+            'TEST': {'NAME': 'file:memorydb_replica1?mode=memory&cache=shared'},
+        },
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+# Seconds a user's reads stay on the primary after they wrote, so
+# replication lag never hides their own changes.
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+DB_CONNECTION_HEALTH_CHECKS = bool(int(os.environ.get('DB_CONNECTION_HEALTH_CHECKS', 1)))
+
+# Cache
+# Redis shared by every process when REDIS_URL is set, otherwise a
+# per-process memory cache for development and tests.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -204,9 +273,114 @@ SIMPLE_JWT = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CursorPagination',
+    'PAGE_SIZE': 20,
+}
+
+# Home timeline: authors with more followers than the limit are merged
+# into feeds on read instead of being pushed on write.
+TIMELINE_FANOUT_LIMIT = int(os.environ.get('TIMELINE_FANOUT_LIMIT', 5000))
+TIMELINE_BACKFILL_SIZE = 50
+
+# Maximum number of ranked results returned by user and group search.
+SEARCH_RESULT_LIMIT = 50
+# PostgreSQL is searched through GIN indexes. The SQLite database uses an
+# in-memory index per process instead; other processes do not see its
+# updates, so it is only fit for development and tests.
+SEARCH_BACKEND = None if DB_HOST else 'core.search.InvertedIndexSearchBackend'
+
+# Notification pipeline: rows are persisted and sent by background jobs
+# in batches, and an unread notification with the same kind and target is
+# updated instead of adding one while it is younger than the window
+# (seconds).
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_COALESCE_WINDOW = 5.0
+
+# Notification retention: prune_notifications deletes notifications older
+# than this many days.
+NOTIFICATION_RETENTION_DAYS = 90
+
+# Background jobs: backend storing the queue and the number of jobs of
+# each queue that a worker process runs concurrently.
+JOBS_BACKEND = 'core.jobs.backends.DatabaseBackend'
+JOBS_QUEUES = {
+    'default': 4,
+    'timeline': 4,
+    'notifications': 4,
+    'images': 2,
 }
+JOBS_RETRY_BACKOFF = 2.0
+JOBS_LOCK_TIMEOUT = 600
+# prune_jobs deletes done and failed jobs older than this many days.
+JOBS_RETENTION_DAYS = 7
+
+# Image pipeline: widths (px) of the resized variants generated for each
+# uploaded image, and the largest accepted image in pixels.
+IMAGE_VARIANT_WIDTHS = (64, 320, 1080)
+IMAGE_MAX_PIXELS = 40_000_000
+
+# Notification sockets: heartbeat timing (seconds), per-connection send
+# queue bound, and the presence registry used to skip offline users.
+# Presence is disabled (every user is treated as online) unless a backend
+# is set; use notifications.presence.CachePresence with a shared cache.
+NOTIFICATION_HEARTBEAT_INTERVAL = 30
+NOTIFICATION_HEARTBEAT_TIMEOUT = 75
+NOTIFICATION_SEND_QUEUE_SIZE = 100
+NOTIFICATION_PRESENCE_BACKEND = 'notifications.presence.CachePresence' if REDIS_URL else None
+NOTIFICATION_PRESENCE_TTL = 120
+
+# Chat: messages received over WebSockets are written in batches of up to
+# CHAT_BATCH_SIZE, or after CHAT_FLUSH_INTERVAL seconds.
+CHAT_BATCH_SIZE = 200
+CHAT_FLUSH_INTERVAL = 0.02
+CHAT_MAX_MESSAGE_LENGTH = 4000
+
+# Profile snapshots: seconds a snapshot stays cached per profile version.
+PROFILE_CACHE_TIMEOUT = 3600
+
+# Authentication: seconds each process trusts its cached copy of a user's
+# is_active/permission flags and token version.
+AUTH_STATE_CACHE_TTL = 30
+
+# Response cache: entries kept in each process's local LRU in front of the
+# shared cache, and their lifetime in seconds.
+RESPONSE_CACHE_LOCAL_SIZE = 1024
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Trending hashtags: half-life in seconds of each trending window, and how
+# often buffered hashtag uses are added to the stored scores.
+TRENDING_WINDOWS = {'1h': 3600, '24h': 86400}
+TRENDING_FLUSH_INTERVAL = 10.0
+TRENDING_EAGER = False
+
+# Bulk follow: most users one bulk follow/unfollow request may list.
+FOLLOW_BULK_LIMIT = 500
+
+# Suggestions: entries kept per user, weight of each shared tag or
+# technology against one mutual follow, and follows expanded per followed
+# account when collecting friend-of-friend candidates.
+SUGGESTIONS_PER_USER = 50
+SUGGESTIONS_TAG_WEIGHT = 0.5
+SUGGESTIONS_MAX_NEIGHBOR_FOLLOWS = 1000
+
+# Group discovery: half-life in seconds of the group activity score, weight
+# of log(1 + decayed posts) against one shared tag, and how often each
+# process reloads the group features updated since its last refresh.
+GROUP_ACTIVITY_HALF_LIFE = 7 * 86400
+GROUP_DISCOVERY_ACTIVITY_WEIGHT = 1.0
+GROUP_DISCOVERY_REFRESH_INTERVAL = 30
+
+# Group memberships: most users one bulk membership request may list.
+GROUP_BULK_LIMIT = 500
+
+# Group feeds: most posts a group can have pinned at once.
+GROUP_MAX_PINNED_POSTS = 5
+
+# Async views: threads serving the async variants of the read views under
+# ASGI. Each keeps its own database connection.
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 32))
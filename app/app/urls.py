@@ -13,6 +13,7 @@ urlpatterns = [
     path('api/posts/', include('posts.urls')),
     path('api/groups/', include('groups.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/chat/', include('chat.urls')),
 ]
 
 if settings.DEBUG:
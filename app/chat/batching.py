@@ -0,0 +1,102 @@
+"""
+Micro-batched message writes for the chat consumer.
+
+Messages received by every socket of the process are collected for up to
+``CHAT_FLUSH_INTERVAL`` seconds or ``CHAT_BATCH_SIZE`` messages, inserted
+with one ``bulk_create`` and broadcast with one ``group_send`` per
+conversation. Flushes run one at a time, so message ids and broadcast order
+agree.
+"""
+
+import asyncio
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from . import store
+
+BATCH_SIZE = getattr(settings, 'CHAT_BATCH_SIZE', 200)
+FLUSH_INTERVAL = getattr(settings, 'CHAT_FLUSH_INTERVAL', 0.02)
+
+
+class MessageBatcher:
+    """Collects messages of one event loop and writes them in batches."""
+
+    def __init__(self, batch_size=BATCH_SIZE, interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.pending = []
+        self.timer = None
+        self.lock = asyncio.Lock()
+        self.save = database_sync_to_async(
+            store.save_messages, thread_sensitive=False
+        )
+
+    async def add(self, item):
+        """
+        Queue a message for the next flush.
+
+        The sender waits for the flush when its message fills the batch,
+        which throttles clients that write faster than the database.
+        """
+        self.pending.append(item)
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+        elif self.timer is None:
+            self.timer = self.loop.call_later(self.interval, self._flush_soon)
+
+    def _flush_soon(self):
+        self.timer = None
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+
+        channel_layer = get_channel_layer()
+        async with self.lock:
+            try:
+                saved = await self.save(batch)
+            except Exception as exc:
+                await self.fail(channel_layer, batch, exc)
+                return
+            await asyncio.gather(*(
+                channel_layer.group_send(
+                    store.group_name(conversation_id),
+                    {'type': 'chat.messages', 'messages': messages},
+                )
+                for conversation_id, messages in saved.items()
+            ))
+
+    async def fail(self, channel_layer, batch, exc):
+        """Tell each sender which of its messages were not stored."""
+        failed = {}
+        for item in batch:
+            failed.setdefault(item['reply_channel'], []).append(
+                str(item['client_id'])
+            )
+        await asyncio.gather(*(
+            channel_layer.send(channel, {
+                'type': 'chat.error',
+                'client_ids': client_ids,
+                'detail': 'Message could not be stored.',
+            })
+            for channel, client_ids in failed.items()
+        ))
+
+
+_batcher = None
+
+
+def get_batcher():
+    """Return the batcher of the running event loop."""
+    global _batcher
+    if _batcher is None or _batcher.loop is not asyncio.get_running_loop():
+        _batcher = MessageBatcher()
+    return _batcher
@@ -0,0 +1,114 @@
+import json
+import uuid
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from . import store
+from .batching import get_batcher
+from .serializers import MessageSerializer
+
+
+class ChatConsumer(AsyncWebsocketConsumer):
+    """
+    Socket for one conversation.
+
+    Clients send ``{"type": "message", "body": ..., "client_id": ...}`` and
+    ``{"type": "read", "message_id": ...}``. Stored messages are broadcast
+    as ``{"type": "messages", "messages": [...]}``; clients match their own
+    messages by ``client_id``.
+    """
+
+    async def connect(self):
+        self.user = self.scope['user']
+        if not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.conversation_id = self.scope['url_route']['kwargs'][
+            'conversation_id'
+        ]
+        if not await database_sync_to_async(store.is_member)(
+            self.conversation_id, self.user.id
+        ):
+            await self.close(code=4403)
+            return
+
+        self.group_name = store.group_name(self.conversation_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(
+                self.group_name, self.channel_name
+            )
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            message = json.loads(text_data or '{}')
+        except ValueError:
+            return
+        kind = message.get('type')
+        if kind == 'message':
+            await self.receive_message(message)
+        elif kind == 'read':
+            await self.receive_read(message)
+        elif kind == 'ping':
+            await self.send(text_data=json.dumps({'type': 'pong'}))
+
+    async def receive_message(self, message):
+        serializer = MessageSerializer(data=message)
+        if not serializer.is_valid():
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'client_id': message.get('client_id'),
+                'errors': serializer.errors,
+            }))
+            return
+        await get_batcher().add(
+            {
+                'conversation_id': self.conversation_id,
+                'sender_id': self.user.id,
+                'body': serializer.validated_data['body'],
+                'client_id': serializer.validated_data.get('client_id')
+                or uuid.uuid4(),
+                'reply_channel': self.channel_name,
+            }
+        )
+
+    async def receive_read(self, message):
+        try:
+            message_id = int(message.get('message_id'))
+        except (TypeError, ValueError):
+            return
+        marker = await database_sync_to_async(store.mark_read)(
+            self.conversation_id, self.user.id, message_id
+        )
+        if marker is not None:
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'chat.read',
+                'user': self.user.id,
+                'message_id': marker,
+            })
+
+    async def chat_messages(self, event):
+        await self.send(
+            text_data=json.dumps(
+                {'type': 'messages', 'messages': event['messages']}
+            )
+        )
+
+    async def chat_read(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'read',
+            'user': event['user'],
+            'message_id': event['message_id'],
+        }))
+
+    async def chat_error(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'client_ids': event['client_ids'],
+            'detail': event['detail'],
+        }))
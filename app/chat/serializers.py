@@ -0,0 +1,59 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from core.models import Conversation, Message, User
+
+MAX_MESSAGE_LENGTH = getattr(settings, 'CHAT_MAX_MESSAGE_LENGTH', 4000)
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    """Serializer for chat messages."""
+    client_id = serializers.UUIDField(required=False)
+
+    class Meta:
+        model = Message
+        fields = [
+            'id',
+            'conversation',
+            'sender',
+            'body',
+            'client_id',
+            'created_at',
+        ]
+        read_only_fields = ['id', 'conversation', 'sender', 'created_at']
+
+    def validate_body(self, value):
+        if len(value) > MAX_MESSAGE_LENGTH:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than '
+                f'{MAX_MESSAGE_LENGTH} characters.'
+            )
+        return value
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """Serializer for conversations with the requesting user's read state."""
+    members = serializers.PrimaryKeyRelatedField(
+        many=True,
+        queryset=User.objects.filter(is_active=True)
+    )
+    last_read_message_id = serializers.IntegerField(read_only=True, default=0)
+    unread_count = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta:
+        model = Conversation
+        fields = [
+            'id', 'kind', 'name', 'members', 'created_at', 'last_message_at',
+            'last_read_message_id', 'unread_count'
+        ]
+        read_only_fields = ['id', 'kind', 'created_at', 'last_message_at']
+
+    def validate_members(self, value):
+        if not value:
+            raise serializers.ValidationError('Add at least one member.')
+        return value
+
+
+class ReadMarkerSerializer(serializers.Serializer):
+    """Serializer for moving the read marker of a conversation."""
+    message_id = serializers.IntegerField(min_value=1)
@@ -0,0 +1,88 @@
+"""
+Persistence helpers shared by the chat consumer and the REST views.
+
+Messages are written with ``bulk_create`` and read receipts are a single
+``last_read_message_id`` per member that only moves forward, so marking a
+conversation as read is one UPDATE no matter how many messages it covers.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Max
+
+from core.models import Conversation, ConversationMember, Message
+from .serializers import MessageSerializer
+
+
+def group_name(conversation_id):
+    """Return the channel group of the conversation's sockets."""
+    return f'chat_{conversation_id}'
+
+
+def is_member(conversation_id, user_id):
+    return ConversationMember.objects.filter(
+        conversation_id=conversation_id,
+        user_id=user_id,
+    ).exists()
+
+
+def save_messages(pending):
+    """
+    Insert pending messages and return them serialized, grouped by
+    conversation.
+
+    ``pending`` is a list of dicts with ``conversation_id``, ``sender_id``,
+    ``body`` and ``client_id``. A retried ``client_id`` does not create a
+    second row; the stored message is returned instead.
+    """
+    Message.objects.bulk_create(
+        [
+            Message(
+                conversation_id=item['conversation_id'],
+                sender_id=item['sender_id'],
+                body=item['body'],
+                client_id=item['client_id'],
+            )
+            for item in pending
+        ],
+        ignore_conflicts=True,
+    )
+
+    client_ids = defaultdict(list)
+    for item in pending:
+        client_ids[item['conversation_id']].append(item['client_id'])
+
+    result = {}
+    for conversation_id, ids in client_ids.items():
+        messages = list(
+            Message.objects
+            .filter(conversation_id=conversation_id, client_id__in=ids)
+            .order_by('id')
+        )
+        last = messages[-1].created_at
+        Conversation.objects.filter(
+            pk=conversation_id, last_message_at__lt=last
+        ).update(last_message_at=last)
+        result[conversation_id] = [
+            dict(data) for data in MessageSerializer(messages, many=True).data
+        ]
+    return result
+
+
+def mark_read(conversation_id, user_id, message_id):
+    """
+    Move the member's read marker forward to message_id.
+
+    Returns the new marker, or None when it did not move. The marker is
+    capped at the newest message so clients cannot mark the future as read.
+    """
+    newest = Message.objects.filter(conversation_id=conversation_id).aggregate(
+        newest=Max('id')
+    )['newest']
+    message_id = min(message_id, newest or 0)
+    updated = ConversationMember.objects.filter(
+        conversation_id=conversation_id,
+        user_id=user_id,
+        last_read_message_id__lt=message_id,
+    ).update(last_read_message_id=message_id)
+    return message_id if updated else None
@@ -1,3 +1,104 @@
-from django.test import TestCase
+import uuid
 
-# Create your tests here.
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import Conversation, ConversationMember, Message, User
+from . import routing, store
+
+
+def create_user(name):
+    return User.objects.create_user(
+        f'{name}@example.com', 'pw', first_name='A', last_name='B'
+    )
+
+
+class StoreTests(TestCase):
+    """Messages are stored once per client_id and read markers only grow."""
+
+    def setUp(self):
+        self.sender = create_user('sender')
+        self.reader = create_user('reader')
+        self.conversation = Conversation.objects.create()
+        for user in (self.sender, self.reader):
+            ConversationMember.objects.create(
+                conversation=self.conversation, user=user
+            )
+
+    def pending(self, body, client_id):
+        return {
+            'conversation_id': self.conversation.pk,
+            'sender_id': self.sender.pk,
+            'body': body,
+            'client_id': client_id,
+        }
+
+    def test_retried_client_id_is_stored_once(self):
+        client_id = uuid.uuid4()
+        first = store.save_messages([self.pending('hello', client_id)])
+        retried = store.save_messages([self.pending('hello', client_id)])
+
+        self.assertEqual(Message.objects.count(), 1)
+        self.assertEqual(
+            retried[self.conversation.pk][0]['id'],
+            first[self.conversation.pk][0]['id'],
+        )
+
+    def test_mark_read_only_moves_forward(self):
+        store.save_messages(
+            [self.pending(str(i), uuid.uuid4()) for i in range(3)]
+        )
+        first, second, newest = Message.objects.order_by('id').values_list(
+            'id', flat=True
+        )
+        conversation_id, user_id = self.conversation.pk, self.reader.pk
+
+        self.assertEqual(
+            store.mark_read(conversation_id, user_id, second), second
+        )
+        self.assertIsNone(store.mark_read(conversation_id, user_id, first))
+        self.assertIsNone(store.mark_read(conversation_id, user_id, second))
+        self.assertEqual(
+            store.mark_read(conversation_id, user_id, newest + 100), newest
+        )
+        self.assertEqual(
+            ConversationMember.objects.get(user=self.reader)
+            .last_read_message_id,
+            newest,
+        )
+
+
+@override_settings(CHANNEL_LAYERS={
+    'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+})
+class ChatConsumerTests(TransactionTestCase):
+    """Only members of a conversation can open its socket."""
+
+    def setUp(self):
+        self.member = create_user('member')
+        self.stranger = create_user('stranger')
+        self.conversation = Conversation.objects.create()
+        ConversationMember.objects.create(
+            conversation=self.conversation, user=self.member
+        )
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(
+            URLRouter(routing.websocket_urlpatterns),
+            f'/ws/chat/{self.conversation.pk}/',
+        )
+        communicator.scope['user'] = user
+        return communicator, await communicator.connect()
+
+    async def test_non_member_is_rejected(self):
+        _, (connected, code) = await self.connect(self.stranger)
+
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+    async def test_member_is_accepted(self):
+        communicator, (connected, _) = await self.connect(self.member)
+
+        self.assertTrue(connected)
+        await communicator.disconnect()
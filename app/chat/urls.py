@@ -0,0 +1,20 @@
+from django.urls import path
+from .views import ConversationListView, MessageListView, ReadMarkerView
+
+urlpatterns = [
+    path(
+        'conversations/',
+        ConversationListView.as_view(),
+        name='conversation-list',
+    ),
+    path(
+        'conversations/<int:pk>/messages/',
+        MessageListView.as_view(),
+        name='conversation-messages',
+    ),
+    path(
+        'conversations/<int:pk>/read/',
+        ReadMarkerView.as_view(),
+        name='conversation-read',
+    ),
+]
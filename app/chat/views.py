@@ -1,3 +1,176 @@
-from django.shortcuts import render
+import uuid
 
-# Create your views here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import (
+    Count,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.models import Conversation, ConversationMember, Message, User
+from core.pagination import ConversationCursorPagination, CursorPagination
+from . import store
+from .serializers import (
+    ConversationSerializer,
+    MessageSerializer,
+    ReadMarkerSerializer,
+)
+
+
+class ConversationListView(generics.ListCreateAPIView):
+    """List the user's conversations or start a new one."""
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ConversationCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        last_read = ConversationMember.objects.filter(
+            conversation=OuterRef('pk'),
+            user=user,
+        ).values('last_read_message_id')[:1]
+        unread = (
+            Message.objects.filter(
+                conversation=OuterRef('pk'),
+                id__gt=OuterRef('last_read_message_id'),
+            )
+            .exclude(sender=user)
+            .order_by()
+            .values('conversation')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return (
+            Conversation.objects.filter(memberships__user=user)
+            .annotate(last_read_message_id=Subquery(last_read))
+            .annotate(
+                unread_count=Coalesce(
+                    Subquery(unread, output_field=IntegerField()), Value(0)
+                )
+            )
+            .prefetch_related(
+                Prefetch('members', queryset=User.objects.only('id'))
+            )
+        )
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        members = {
+            member.id for member in serializer.validated_data['members']
+        } - {request.user.id}
+        if not members:
+            return Response(
+                {"detail": "Add at least one other member."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        name = serializer.validated_data.get('name', '')
+
+        with transaction.atomic():
+            if len(members) == 1 and not name:
+                conversation, created = Conversation.objects.get_or_create(
+                    direct_key=Conversation.make_direct_key(
+                        request.user.id, *members
+                    ),
+                    defaults={'kind': Conversation.DIRECT},
+                )
+            else:
+                conversation, created = (
+                    Conversation.objects.create(
+                        kind=Conversation.GROUP, name=name
+                    ),
+                    True,
+                )
+            if created:
+                ConversationMember.objects.bulk_create(
+                    [
+                        ConversationMember(
+                            conversation=conversation, user_id=user_id
+                        )
+                        for user_id in members | {request.user.id}
+                    ]
+                )
+
+        conversation = self.get_queryset().get(pk=conversation.pk)
+        return Response(
+            self.get_serializer(conversation).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class ConversationMixin:
+    """Resolve the conversation from the URL for members only."""
+
+    def check_membership(self):
+        if not store.is_member(self.kwargs['pk'], self.request.user.id):
+            raise NotFound("Conversation not found.")
+
+
+class MessageListView(ConversationMixin, generics.ListCreateAPIView):
+    """Message history of a conversation, newest first, or send a message."""
+    serializer_class = MessageSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
+
+    def get_queryset(self):
+        self.check_membership()
+        return Message.objects.filter(conversation_id=self.kwargs['pk'])
+
+    def create(self, request, *args, **kwargs):
+        self.check_membership()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        client_id = serializer.validated_data.get('client_id') or uuid.uuid4()
+        saved = store.save_messages([{
+            'conversation_id': self.kwargs['pk'],
+            'sender_id': request.user.id,
+            'body': serializer.validated_data['body'],
+            'client_id': client_id,
+        }])
+        messages = saved[self.kwargs['pk']]
+        async_to_sync(get_channel_layer().group_send)(
+            store.group_name(self.kwargs['pk']),
+            {'type': 'chat.messages', 'messages': messages},
+        )
+        return Response(messages[0], status=status.HTTP_201_CREATED)
+
+
+class ReadMarkerView(ConversationMixin, generics.GenericAPIView):
+    """Mark the conversation as read up to a message."""
+    serializer_class = ReadMarkerSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        self.check_membership()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marker = store.mark_read(
+            pk, request.user.id, serializer.validated_data['message_id']
+        )
+        if marker is not None:
+            async_to_sync(get_channel_layer().group_send)(
+                store.group_name(pk),
+                {
+                    'type': 'chat.read',
+                    'user': request.user.id,
+                    'message_id': marker,
+                },
+            )
+        else:
+            marker = ConversationMember.objects.filter(
+                conversation_id=pk,
+                user=request.user,
+            ).values_list('last_read_message_id', flat=True).get()
+        return Response(
+            {"last_read_message_id": marker}, status=status.HTTP_200_OK
+        )
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import cache, db, search
+        cache.connect_signals()
+        db.connect_signals()
+        search.connect_signals()
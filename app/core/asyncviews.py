@@ -0,0 +1,60 @@
+"""
+Async variants of the hot read views.
+
+Under ASGI, Django 3.2 runs sync views with
+``sync_to_async(thread_sensitive=True)``. Outside an ``async_to_sync`` call,
+that is a single thread for the whole process, so a request waiting on the
+database holds up every other request. Django 3.2 has no async ORM either, so
+``async_view`` keeps the DRF view and runs each request, rendering included,
+in a pool of ``ASYNC_VIEW_THREADS`` threads. The event loop keeps accepting
+requests while up to that many wait on the database.
+
+The pool is sized against the database: every thread keeps its own
+connection for ``CONN_MAX_AGE`` seconds, and ``database_sync_to_async``
+closes the expired ones as the request cycle would.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from core import db
+
+THREADS = getattr(settings, 'ASYNC_VIEW_THREADS', 32)
+
+executor = ThreadPoolExecutor(
+    max_workers=THREADS, thread_name_prefix='async-view'
+)
+
+
+def offload(func):
+    """Return an async callable that runs func in the view thread pool."""
+    return database_sync_to_async(
+        func, thread_sensitive=False, executor=executor
+    )
+
+
+def async_view(view_class, **initkwargs):
+    """Return an async view that serves view_class from the thread pool."""
+    view = view_class.as_view(**initkwargs)
+
+    def respond(request, *args, **kwargs):
+        if db.HEALTH_CHECKS:
+            db.check_connections()
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    respond = offload(respond)
+
+    async def async_view(request, *args, **kwargs):
+        return await respond(request, *args, **kwargs)
+
+    async_view.view_class = view_class
+    async_view.view_initkwargs = initkwargs
+    # DRF views enforce CSRF themselves, for session authentication only.
+    # Set directly: csrf_exempt() would wrap the coroutine in a sync view.
+    async_view.csrf_exempt = True
+    return async_view
@@ -0,0 +1,461 @@
+"""
+Two-tier cache for serialized API responses.
+
+Entries are stored in a bounded per-process LRU in front of the shared Django
+cache (Redis in production, locmem in development and tests). Keys embed the
+current version of every object the entry depends on:
+
+    data = responses.get_or_build(
+        ('post', pk), deps=[dep('post', pk)], builder=lambda: serialize(post),
+    )
+
+Model signals bump the versions (``connect_signals``) once the change is
+committed, so invalidation never deletes anything: stale entries stop
+being addressed and expire. Versions live in the shared cache, so every
+process sees a bump on its next read.
+A version is the time of the last change in nanoseconds, which also makes
+it usable as ``Last-Modified`` (see ``conditional``).
+
+A miss is built by one caller at a time per key, across threads and
+processes; other callers wait briefly for the result instead of rebuilding
+it. Hit and miss counters are kept per process and periodically added to
+shared counters, reported by ``manage.py cache_stats``.
+"""
+
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from core import db
+from core.models import Group, Hashtag, Post, Tag, User
+
+LOCAL_SIZE = getattr(settings, 'RESPONSE_CACHE_LOCAL_SIZE', 1024)
+TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+STATS_FLUSH_EVERY = 100
+COUNTERS = ('local_hits', 'shared_hits', 'misses', 'waits')
+
+
+def dep(kind, pk):
+    """Return the dependency name of one object."""
+    return f'{kind}:{pk}'
+
+
+_version_lock = threading.Lock()
+_last_version = 0
+
+
+def _new_version():
+    """Return a nanosecond timestamp, strictly increasing in the process."""
+    global _last_version
+    with _version_lock:
+        _last_version = max(time.time_ns(), _last_version + 1)
+        return _last_version
+
+
+class LocalLRU:
+    """Thread-safe bounded LRU with per-entry expiry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    """Versioned response cache with a local LRU and single-flight builds."""
+
+    def __init__(
+        self, alias='default', local_size=LOCAL_SIZE, timeout=TIMEOUT
+    ):
+        self.alias = alias
+        self.local = LocalLRU(local_size)
+        self.timeout = timeout
+        self._build_locks = [threading.Lock() for _ in range(64)]
+        self._stats_lock = threading.Lock()
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._pending = 0
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def versions(self, deps):
+        """Return the current version of each dependency."""
+        keys = [f'version:{name}' for name in deps]
+        found = self.shared.get_many(keys)
+        for key in keys:
+            if key not in found:
+                # A missing version (new or evicted) starts at a fresh value,
+                # so entries built under an evicted version are not reused.
+                self.shared.add(key, _new_version(), None)
+                found[key] = self.shared.get(key)
+        return [found[key] for key in keys]
+
+    def bump(self, *deps):
+        """
+        Invalidate every entry depending on the given objects.
+
+        Inside a transaction the versions change only when it commits;
+        otherwise a reader could rebuild an entry from the rows before the
+        change and keep it under the new version.
+        """
+        if deps:
+            transaction.on_commit(lambda: self.shared.set_many(
+                {f'version:{name}': _new_version() for name in deps}, None
+            ))
+
+    def make_key(self, key, deps):
+        parts = [str(part) for part in key]
+        parts += [str(version) for version in self.versions(deps)]
+        return 'response:' + ':'.join(parts)
+
+    def get_or_build(self, key, deps, builder, timeout=None):
+        """
+        Return the cached value for key, building it on a miss.
+
+        ``key`` is a tuple identifying the entry and ``deps`` the names
+        (see ``dep``) of the objects it is built from. The value must be
+        picklable and is shared between callers, so callers must not
+        mutate it.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        full_key = self.make_key(key, deps)
+
+        value = self.local.get(full_key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        value = self.shared.get(full_key)
+        if value is not None:
+            self._count('shared_hits')
+            self.local.set(full_key, value, timeout)
+            return value
+
+        lock = self._build_locks[
+            zlib.crc32(full_key.encode()) % len(self._build_locks)
+        ]
+        with lock:
+            value = self.local.get(full_key)
+            if value is not None:
+                self._count('local_hits')
+                return value
+            value = self._build_once(full_key, builder, timeout)
+
+        self.local.set(full_key, value, timeout)
+        return value
+
+    def _build_once(self, full_key, builder, timeout):
+        lock_key = f'lock:{full_key}'
+        if not self.shared.add(lock_key, 1, LOCK_TIMEOUT):
+            self._count('waits')
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(0.02)
+                value = self.shared.get(full_key)
+                if value is not None:
+                    return value
+            # The builder holding the lock is too slow; build it ourselves.
+            return self._build(full_key, builder, timeout)
+
+        try:
+            return self._build(full_key, builder, timeout)
+        finally:
+            self.shared.delete(lock_key)
+
+    def _build(self, full_key, builder, timeout):
+        self._count('misses')
+        # Entries are addressed by the latest versions; build them from the
+        # primary so a lagging replica cannot store stale data under them.
+        with db.primary():
+            value = builder()
+        self.shared.set(full_key, value, timeout)
+        return value
+
+    def _count(self, counter):
+        with self._stats_lock:
+            self._counts[counter] += 1
+            self._pending += 1
+            if self._pending < STATS_FLUSH_EVERY:
+                return
+            counts, self._counts = self._counts, dict.fromkeys(COUNTERS, 0)
+            self._pending = 0
+        self._flush_stats(counts)
+
+    def _flush_stats(self, counts):
+        for counter, count in counts.items():
+            if not count:
+                continue
+            key = f'stats:{counter}'
+            if not self.shared.add(key, count, None):
+                try:
+                    self.shared.incr(key, count)
+                except ValueError:
+                    self.shared.set(key, count, None)
+
+    def stats(self):
+        """Return the shared counters and the overall hit rate."""
+        self.flush()
+        found = self.shared.get_many(
+            [f'stats:{counter}' for counter in COUNTERS]
+        )
+        counts = {
+            counter: found.get(f'stats:{counter}', 0) for counter in COUNTERS
+        }
+        hits = counts['local_hits'] + counts['shared_hits']
+        total = hits + counts['misses']
+        counts['hit_rate'] = hits / total if total else 0.0
+        return counts
+
+    def flush(self):
+        """Add this process's counters to the shared ones."""
+        with self._stats_lock:
+            counts, self._counts = self._counts, dict.fromkeys(COUNTERS, 0)
+            self._pending = 0
+        self._flush_stats(counts)
+
+    def reset_stats(self):
+        self.flush()
+        self.shared.delete_many([f'stats:{counter}' for counter in COUNTERS])
+
+
+responses = TwoTierCache()
+
+
+def conditional(request, key, deps):
+    """
+    Return ``(not_modified, headers)`` for a conditional GET.
+
+    The weak ETag and ``Last-Modified`` come from the versions of ``deps``
+    alone, so a current client is answered with ``not_modified`` (a 304
+    response) without touching the database. Otherwise ``not_modified`` is
+    None and ``headers`` should be sent with the full response.
+    """
+    versions = responses.versions(deps)
+    digest = hashlib.sha1(
+        ':'.join(
+            [str(part) for part in key]
+            + [str(version) for version in versions]
+        ).encode()
+    ).hexdigest()[:20]
+    etag = f'W/"{digest}"'
+    last_modified = max(versions) // 1_000_000_000 if versions else None
+
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Authorization',
+    }
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+    return not_modified, headers
+
+
+def _post_deps(post_ids):
+    deps = [dep('post', pk) for pk in post_ids]
+    group_ids = (
+        Post.objects.filter(pk__in=post_ids, group__isnull=False)
+        .values_list('group_id', flat=True)
+        .distinct()
+    )
+    deps += [dep('group-posts', pk) for pk in group_ids]
+    return deps
+
+
+def _post_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deps = [dep('post', instance.pk)]
+    if instance.group_id is not None:
+        deps.append(dep('group-posts', instance.group_id))
+    responses.bump(*deps)
+
+
+def _hashtag_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    responses.bump(
+        *_post_deps(list(instance.posts.values_list('pk', flat=True)))
+    )
+
+
+def _saved(kind):
+    def handler(sender, instance, raw=False, **kwargs):
+        if not raw:
+            responses.bump(dep(kind, instance.pk))
+    return handler
+
+
+def _tag_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    group_ids = Group.tags.through.objects.filter(tag=instance).values_list(
+        'group_id', flat=True
+    )
+    responses.bump(*[dep('group', pk) for pk in group_ids])
+
+
+def _group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        responses.bump(
+            dep('group', instance.pk), dep('user-groups', instance.creator_id)
+        )
+
+
+def _relation_changed(field, deps):
+    """
+    Return an m2m_changed handler bumping the source side of ``field``.
+
+    ``deps`` maps a list of source object ids to the dependencies to bump.
+    """
+    source = f'{field.m2m_field_name()}_id'
+    target = f'{field.m2m_reverse_field_name()}_id'
+
+    def handler(sender, instance, action, reverse, pk_set, **kwargs):
+        if action == 'pre_clear' and reverse:
+            # pk_set is not provided for clear; remember who loses the
+            # relation.
+            instance.__dict__[f'_cache_clear_{field.name}'] = list(
+                sender.objects.filter(**{target: instance.pk}).values_list(
+                    source, flat=True
+                )
+            )
+            return
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        if not reverse:
+            ids = [instance.pk]
+        elif action == 'post_clear':
+            ids = instance.__dict__.pop(f'_cache_clear_{field.name}', [])
+        else:
+            ids = list(pk_set or ())
+        if ids:
+            responses.bump(*deps(ids))
+    return handler
+
+
+def _follows_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Bump both sides of a follow, since each user renders its counts."""
+    if action == 'pre_clear':
+        column, other = (
+            ('to_user_id', 'from_user_id')
+            if reverse
+            else ('from_user_id', 'to_user_id')
+        )
+        instance.__dict__['_cache_clear_follows'] = list(
+            sender.objects.filter(**{column: instance.pk}).values_list(
+                other, flat=True
+            )
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        others = instance.__dict__.pop('_cache_clear_follows', [])
+    else:
+        others = list(pk_set or ())
+    responses.bump(*[dep('user', pk) for pk in [instance.pk, *others]])
+
+
+def _kind_deps(kind):
+    return lambda ids: [dep(kind, pk) for pk in ids]
+
+
+_user_saved = _saved('user')
+
+
+def connect_signals():
+    """Bump response versions whenever the cached objects change."""
+    post_save.connect(
+        _post_changed, sender=Post, dispatch_uid='cache_post_saved'
+    )
+    post_delete.connect(
+        _post_changed, sender=Post, dispatch_uid='cache_post_deleted'
+    )
+    post_save.connect(
+        _hashtag_changed, sender=Hashtag, dispatch_uid='cache_hashtag_saved'
+    )
+    pre_delete.connect(
+        _hashtag_changed, sender=Hashtag, dispatch_uid='cache_hashtag_deleted'
+    )
+    post_save.connect(
+        _user_saved, sender=User, dispatch_uid='cache_user_saved'
+    )
+    post_delete.connect(
+        _user_saved, sender=User, dispatch_uid='cache_user_deleted'
+    )
+    post_save.connect(_tag_changed, sender=Tag, dispatch_uid='cache_tag_saved')
+    post_save.connect(
+        _group_changed, sender=Group, dispatch_uid='cache_group_saved'
+    )
+    post_delete.connect(
+        _group_changed, sender=Group, dispatch_uid='cache_group_deleted'
+    )
+    m2m_changed.connect(
+        _follows_changed,
+        sender=User.follows.through,
+        dispatch_uid='cache_user_follows',
+    )
+
+    relations = [
+        (Post, 'likes', _post_deps),
+        (Post, 'hashtags', _post_deps),
+        (User, 'tags', _kind_deps('user')),
+        (User, 'projects', _kind_deps('user')),
+        (User, 'work_experiences', _kind_deps('user')),
+        (Group, 'members', _kind_deps('group')),
+        (Group, 'tags', _kind_deps('group')),
+    ]
+    for model, name, deps in relations:
+        field = model._meta.get_field(name)
+        m2m_changed.connect(
+            _relation_changed(field, deps),
+            sender=field.remote_field.through,
+            weak=False,
+            dispatch_uid=f'cache_{model._meta.model_name}_{name}',
+        )
@@ -0,0 +1,181 @@
+"""
+Database routing between the primary and its read replicas.
+
+Writes always go to ``default``. Reads go to a replica only inside views
+that opt in with ``ReplicaReadMixin`` and only for safe methods, and only
+while none of these holds:
+
+* the request has already written, so it must see its own writes;
+* the authenticated user wrote within the last
+  ``DATABASE_REPLICA_STICKY_SECONDS``, so replication lag cannot hide what
+  they just changed (read-your-writes);
+* the default connection is inside a transaction.
+
+Code that must not see replication lag reads inside ``primary()``.
+
+``ReplicaMiddleware`` resets the per-request state and records the user's
+last write in the shared cache. The state is kept in an ``asgiref`` local,
+so it follows a request through ``sync_to_async`` calls.
+
+Persistent connections (``CONN_MAX_AGE``) are pinged when a request starts
+and dropped when the server went away, so a request never fails on a
+connection that was closed while it sat idle. ``DB_CONNECTION_HEALTH_CHECKS``
+turns the check off.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICAS = getattr(settings, 'DATABASE_REPLICAS', [])
+STICKY_SECONDS = getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+HEALTH_CHECKS = getattr(settings, 'DB_CONNECTION_HEALTH_CHECKS', True)
+
+_state = Local()
+
+
+def _pin_key(user_id):
+    return f'db-primary:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for the next STICKY_SECONDS."""
+    cache.set(_pin_key(user_id), time.time() + STICKY_SECONDS, STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return (cache.get(_pin_key(user_id)) or 0) > time.time()
+
+
+def use_replica(alias):
+    """Route the reads of the request to alias, or to the primary with None."""
+    _state.replica = alias
+
+
+def reset():
+    _state.replica = None
+    _state.wrote = False
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block."""
+    replica = getattr(_state, 'replica', None)
+    _state.replica = None
+    try:
+        yield
+    finally:
+        _state.replica = replica
+
+
+class ReplicaRouter:
+    """Route reads of opted-in views to a replica, the rest to the primary."""
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(_state, 'replica', None)
+        if replica is None or getattr(_state, 'wrote', False):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in REPLICAS
+
+
+class ReplicaMiddleware:
+    """Reset the routing state per request; pin users who wrote to primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        reset()
+        try:
+            response = self.get_response(request)
+            if getattr(_state, 'wrote', False):
+                self._pin(request)
+            return response
+        finally:
+            reset()
+
+    async def __acall__(self, request):
+        reset()
+        try:
+            response = await self.get_response(request)
+            if getattr(_state, 'wrote', False):
+                # request.user may be a lazy session lookup.
+                await sync_to_async(self._pin, thread_sensitive=False)(request)
+            return response
+        finally:
+            reset()
+
+    def _pin(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+
+
+class ReplicaReadMixin:
+    """
+    Serve the safe requests of a DRF view from a replica.
+
+    The decision is taken once the request is authenticated, so users who
+    wrote recently keep reading from the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if REPLICAS and request.method in SAFE_METHODS:
+            user_id = (
+                request.user.pk if request.user.is_authenticated else None
+            )
+            if user_id is None or not is_pinned(user_id):
+                use_replica(random.choice(REPLICAS))
+
+
+def check_connections(**kwargs):
+    """Close persistent connections the database server no longer answers."""
+    for conn in connections.all():
+        if (
+            conn.connection is not None
+            and conn.settings_dict['CONN_MAX_AGE']
+            and not conn.is_usable()
+        ):
+            conn.close()
+
+
+def connect_signals():
+    """Check persistent connections when a request starts."""
+    if HEALTH_CHECKS:
+        request_started.connect(
+            check_connections, dispatch_uid='db_check_connections'
+        )
@@ -0,0 +1,165 @@
+"""
+Image pipeline for user and post uploads.
+
+Uploads are validated with Pillow, re-encoded without metadata and named
+after the SHA-256 of their content, so identical uploads share one file.
+Resized WebP/JPEG variants are generated by a background job next to the
+original:
+
+    uploads/post/ab/<hash>.jpg
+    uploads/post/ab/<hash>/w320.webp
+"""
+
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from django.utils.translation import gettext as _
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+VARIANT_WIDTHS = getattr(settings, 'IMAGE_VARIANT_WIDTHS', (64, 320, 1080))
+MAX_PIXELS = getattr(settings, 'IMAGE_MAX_PIXELS', 40_000_000)
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+def variant_formats():
+    """Return the variant formats supported by the installed Pillow."""
+    return ('webp', 'jpeg') if features.check('webp') else ('jpeg',)
+
+
+def is_content_name(filename):
+    """Return True for names produced by prepare_upload."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return len(stem) == 64 and all(char in '0123456789abcdef' for char in stem)
+
+
+def content_path(directory, filename):
+    """Return the storage path for an uploaded file."""
+    if is_content_name(filename):
+        return os.path.join(directory, filename[:2], filename)
+    return os.path.join(directory, filename)
+
+
+def prepare_upload(upload):
+    """
+    Validate an uploaded image and return it re-encoded as a ContentFile.
+
+    EXIF orientation is applied and all metadata is dropped. The returned
+    file is named ``<sha256>.<ext>`` after the original bytes.
+    """
+    data = upload.read()
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            probe.verify()
+        image = Image.open(io.BytesIO(data))
+        if image.width * image.height > MAX_PIXELS:
+            raise ValidationError(_('Image is too large.'))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError(_('Upload a valid image.'))
+
+    output = io.BytesIO()
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    if has_alpha:
+        image.convert('RGBA').save(output, format='PNG', optimize=True)
+        ext = 'png'
+    else:
+        image.convert('RGB').save(
+            output, format='JPEG', quality=JPEG_QUALITY, optimize=True
+        )
+        ext = 'jpg'
+
+    return ContentFile(output.getvalue(), name=f'{digest}.{ext}')
+
+
+def variant_name(name, width, fmt):
+    """Return the storage name of one variant of an image."""
+    stem = os.path.splitext(name)[0]
+    ext = 'jpg' if fmt == 'jpeg' else fmt
+    return f'{stem}/w{width}.{ext}'
+
+
+def generate_variants(storage, name):
+    """Create the missing resized variants of a stored image."""
+    created = []
+    with storage.open(name) as original:
+        image = Image.open(original)
+        image.load()
+
+    for width in VARIANT_WIDTHS:
+        if image.width < width:
+            # Upscaling adds nothing; the srcset lists the original instead.
+            continue
+        resized = image
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+        for fmt in variant_formats():
+            target = variant_name(name, width, fmt)
+            if storage.exists(target):
+                continue
+            output = io.BytesIO()
+            if fmt == 'jpeg':
+                resized.convert('RGB').save(
+                    output, format='JPEG', quality=JPEG_QUALITY, optimize=True
+                )
+            else:
+                resized.save(
+                    output, format='WEBP', quality=WEBP_QUALITY, method=4
+                )
+            storage.save(target, ContentFile(output.getvalue()))
+            created.append(target)
+
+    return created
+
+
+def srcset(field_file):
+    """
+    Return the original URL and a srcset string per variant format.
+
+    Only the variants that were generated are listed, so clients never get
+    a URL before the background job has written its file. A format without
+    any variant yet is left out.
+    """
+    if not field_file:
+        return None
+
+    storage = field_file.storage
+    result = {'original': field_file.url}
+    for fmt in variant_formats():
+        names = [
+            (width, variant_name(field_file.name, width, fmt))
+            for width in VARIANT_WIDTHS
+        ]
+        entries = [
+            f'{storage.url(name)} {width}w'
+            for width, name in names
+            if storage.exists(name)
+        ]
+        if entries:
+            result[fmt] = ', '.join(entries)
+    return result
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage that keeps a single copy of content-named files."""
+
+    def get_available_name(self, name, max_length=None):
+        if is_content_name(name) and self.exists(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        if is_content_name(name) and self.exists(name):
+            return name
+        return super()._save(name, content)
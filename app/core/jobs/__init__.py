@@ -0,0 +1,97 @@
+"""
+Background jobs for slow side effects.
+
+Functions decorated with ``@job`` can be queued with ``.delay()`` or
+``enqueue()`` and are executed by ``manage.py run_workers``. The queue is
+stored by the backend configured in ``JOBS_BACKEND``; tests use the
+in-memory backend, which can also run jobs eagerly.
+
+    @job(queue='timeline')
+    def fan_out_post(post_id):
+        ...
+
+    fan_out_post.delay(post.id)
+"""
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+DEFAULT_QUEUE = 'default'
+
+_backend = None
+
+
+class JobFunction:
+    """Callable wrapper registered by the ``job`` decorator."""
+
+    def __init__(self, func, queue, max_attempts):
+        self.func = func
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Queue the job with the given arguments."""
+        return enqueue(self, args=args, kwargs=kwargs)
+
+
+def job(queue=DEFAULT_QUEUE, max_attempts=5):
+    """Register a function as a background job."""
+    def decorator(func):
+        return JobFunction(func, queue, max_attempts)
+    return decorator
+
+
+def resolve(name):
+    """Return the registered job for a dotted name."""
+    func = import_string(name)
+    if not isinstance(func, JobFunction):
+        raise ValueError(f'{name} is not a registered job.')
+    return func
+
+
+def get_backend():
+    """Return the configured job backend."""
+    global _backend
+    if _backend is None:
+        path = getattr(
+            settings, 'JOBS_BACKEND', 'core.jobs.backends.DatabaseBackend'
+        )
+        _backend = import_string(path)()
+    return _backend
+
+
+@receiver(setting_changed)
+def _reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'JOBS_BACKEND':
+        _backend = None
+
+
+def enqueue(
+    func, args=(), kwargs=None, queue=None, idempotency_key=None, delay=0
+):
+    """
+    Queue a job and return the backend's job record.
+
+    Arguments must be JSON serializable. When ``idempotency_key`` is given
+    and a job with the same key already exists, the existing job is returned
+    and nothing new is queued.
+    """
+    if isinstance(func, str):
+        func = resolve(func)
+    return get_backend().enqueue(
+        name=func.name,
+        args=list(args),
+        kwargs=kwargs or {},
+        queue=queue or func.queue,
+        max_attempts=func.max_attempts,
+        idempotency_key=idempotency_key,
+        delay=delay,
+    )
@@ -0,0 +1,265 @@
+"""
+Storage backends for background jobs.
+"""
+
+import itertools
+import random
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import Job
+
+RETRY_BACKOFF = getattr(settings, 'JOBS_RETRY_BACKOFF', 2.0)
+LOCK_TIMEOUT = getattr(settings, 'JOBS_LOCK_TIMEOUT', 600)
+RETENTION_DAYS = getattr(settings, 'JOBS_RETENTION_DAYS', 7)
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given attempt number."""
+    return RETRY_BACKOFF * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+
+def execute(job):
+    """Run a job record and return (succeeded, error)."""
+    from core.jobs import resolve
+
+    try:
+        resolve(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        return False, traceback.format_exc()
+    return True, ''
+
+
+class DatabaseBackend:
+    """Jobs stored in the core_job table, claimed with conditional updates."""
+
+    def enqueue(
+        self,
+        name,
+        args,
+        kwargs,
+        queue,
+        max_attempts,
+        idempotency_key=None,
+        delay=0,
+    ):
+        job = Job(
+            name=name,
+            args=args,
+            kwargs=kwargs,
+            queue=queue,
+            max_attempts=max_attempts,
+            idempotency_key=idempotency_key,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+        if idempotency_key is None:
+            job.save()
+            return job
+
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            return Job.objects.get(idempotency_key=idempotency_key)
+        return job
+
+    def _available(self, queue, now):
+        stale = now - timedelta(seconds=LOCK_TIMEOUT)
+        return Job.objects.filter(queue=queue).filter(
+            Q(status=Job.QUEUED, run_at__lte=now)
+            | Q(status=Job.RUNNING, locked_at__lt=stale)
+        )
+
+    def claim(self, queue, limit):
+        """Mark up to ``limit`` runnable jobs as running and return them."""
+        now = timezone.now()
+        candidates = (
+            self._available(queue, now)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        claimed = []
+        for job_id in list(candidates):
+            updated = self._available(queue, now).filter(id=job_id).update(
+                status=Job.RUNNING,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if updated:
+                claimed.append(job_id)
+
+        return list(
+            Job.objects.filter(id__in=claimed).order_by('run_at', 'id')
+        )
+
+    def complete(self, job):
+        Job.objects.filter(id=job.id).update(
+            status=Job.DONE, locked_at=None, last_error=''
+        )
+
+    def fail(self, job, error):
+        if job.attempts < job.max_attempts:
+            run_at = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts)
+            )
+            Job.objects.filter(id=job.id).update(
+                status=Job.QUEUED,
+                locked_at=None,
+                run_at=run_at,
+                last_error=error,
+            )
+        else:
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED, locked_at=None, last_error=error
+            )
+
+    def prune(self, before, chunk_size=5000):
+        """
+        Delete done and failed jobs last scheduled before ``before``.
+
+        Rows are deleted in chunks, each in its own statement, so the
+        queue is never locked for long. Returns the number of deleted jobs.
+        """
+        finished = Job.objects.filter(
+            status__in=(Job.DONE, Job.FAILED), run_at__lt=before
+        )
+        deleted = 0
+        while True:
+            ids = list(finished.values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            deleted += Job.objects.filter(id__in=ids).delete()[0]
+
+
+class MemoryJob:
+    """Job record kept by the in-memory backend."""
+
+    def __init__(
+        self,
+        id,
+        name,
+        args,
+        kwargs,
+        queue,
+        max_attempts,
+        idempotency_key,
+        run_at,
+    ):
+        self.id = id
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.idempotency_key = idempotency_key
+        self.run_at = run_at
+        self.status = Job.QUEUED
+        self.attempts = 0
+        self.last_error = ''
+
+
+class MemoryBackend:
+    """
+    Process-local backend for tests and development.
+
+    With ``JOBS_EAGER`` enabled jobs run as soon as they are queued;
+    otherwise call ``drain()`` or run a worker in the same process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.jobs = []
+        self._keys = {}
+
+    def enqueue(
+        self,
+        name,
+        args,
+        kwargs,
+        queue,
+        max_attempts,
+        idempotency_key=None,
+        delay=0,
+    ):
+        with self._lock:
+            if idempotency_key is not None and idempotency_key in self._keys:
+                return self._keys[idempotency_key]
+            job = MemoryJob(
+                next(self._ids), name, args, kwargs, queue, max_attempts,
+                idempotency_key, timezone.now() + timedelta(seconds=delay),
+            )
+            self.jobs.append(job)
+            if idempotency_key is not None:
+                self._keys[idempotency_key] = job
+
+        if getattr(settings, 'JOBS_EAGER', False):
+            self.drain()
+        return job
+
+    def claim(self, queue, limit):
+        now = timezone.now()
+        with self._lock:
+            claimed = [
+                job
+                for job in self.jobs
+                if job.queue == queue
+                and job.status == Job.QUEUED
+                and job.run_at <= now
+            ][:limit]
+            for job in claimed:
+                job.status = Job.RUNNING
+                job.attempts += 1
+        return claimed
+
+    def complete(self, job):
+        job.status = Job.DONE
+        job.last_error = ''
+
+    def fail(self, job, error):
+        job.last_error = error
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts)
+            )
+        else:
+            job.status = Job.FAILED
+
+    def prune(self, before, chunk_size=None):
+        with self._lock:
+            kept = [
+                job for job in self.jobs
+                if job.status not in (Job.DONE, Job.FAILED)
+                or job.run_at >= before
+            ]
+            deleted = len(self.jobs) - len(kept)
+            self.jobs = kept
+            self._keys = {
+                key: job for key, job in self._keys.items() if job in kept
+            }
+        return deleted
+
+    def drain(self):
+        """Run queued jobs of every queue until none is runnable now."""
+        ran = 0
+        while True:
+            queues = {
+                job.queue for job in self.jobs if job.status == Job.QUEUED
+            }
+            batch = [job for queue in queues for job in self.claim(queue, 100)]
+            if not batch:
+                return ran
+            for job in batch:
+                succeeded, error = execute(job)
+                if succeeded:
+                    self.complete(job)
+                else:
+                    self.fail(job, error)
+                ran += 1
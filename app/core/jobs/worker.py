@@ -0,0 +1,91 @@
+"""
+Worker loop that executes queued jobs with per-queue concurrency limits.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from core.jobs import get_backend
+from core.jobs.backends import execute
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Polls the backend and runs jobs on a thread pool."""
+
+    def __init__(self, queues, poll_interval=1.0, burst=False):
+        self.queues = dict(queues)
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.backend = get_backend()
+        self.slots = {
+            queue: threading.Semaphore(limit)
+            for queue, limit in self.queues.items()
+        }
+        self.running = {queue: 0 for queue in self.queues}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run_job(self, job):
+        try:
+            succeeded, error = execute(job)
+            if succeeded:
+                self.backend.complete(job)
+            else:
+                logger.warning(
+                    'Job %s failed on attempt %s:\n%s',
+                    job.name,
+                    job.attempts,
+                    error,
+                )
+                self.backend.fail(job, error)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self.running[job.queue] -= 1
+            self.slots[job.queue].release()
+
+    def _free_slots(self, queue):
+        free = 0
+        while self.slots[queue].acquire(blocking=False):
+            free += 1
+        return free
+
+    def run_once(self, executor):
+        """Claim and submit jobs of every queue; return how many started."""
+        started = 0
+        for queue in self.queues:
+            free = self._free_slots(queue)
+            jobs = self.backend.claim(queue, free) if free else []
+            for _ in range(free - len(jobs)):
+                self.slots[queue].release()
+            for job in jobs:
+                with self._lock:
+                    self.running[queue] += 1
+                executor.submit(self._run_job, job)
+                started += 1
+        close_old_connections()
+        return started
+
+    def run(self):
+        """Process jobs until stopped, or until queues empty in burst mode."""
+        with ThreadPoolExecutor(
+            max_workers=sum(self.queues.values())
+        ) as executor:
+            while not self._stopped.is_set():
+                started = self.run_once(executor)
+                if started:
+                    continue
+                with self._lock:
+                    idle = not any(self.running.values())
+                if self.burst and idle:
+                    break
+                time.sleep(self.poll_interval)
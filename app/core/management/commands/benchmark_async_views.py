@@ -0,0 +1,114 @@
+"""
+Django command to compare the sync read views with their async variants.
+"""
+
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Post, User
+
+ENDPOINTS = ('feed', 'notifications', 'post')
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the async read views"""
+
+    help = (
+        'Serve concurrent requests to the feed, notification list and post '
+        'views, first from the sync views as Django runs them under ASGI, '
+        'then from their async variants, and report requests per second and '
+        'latency. Requests go through the ASGI handler and middleware with a '
+        'Bearer token.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='User making the requests, the first active user by default.',
+        )
+        parser.add_argument(
+            '--post',
+            type=int,
+            help='Post to read, the latest post by default.',
+        )
+        parser.add_argument('--endpoint', choices=ENDPOINTS, action='append')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        users = User.objects.filter(is_active=True).order_by('pk')
+        if options['user'] is not None:
+            users = users.filter(pk=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('Create at least one active user first.')
+        post_id = (
+            options['post']
+            or Post.objects.order_by('-pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+
+        client = AsyncClient(raise_request_exception=False)
+        headers = {'authorization': f'Bearer {AccessToken.for_user(user)}'}
+        endpoints = {
+            'feed': ('/api/posts/feed/', '/api/posts/async/feed/'),
+            'notifications': (
+                '/api/notifications/notifications/',
+                '/api/notifications/notifications/async/',
+            ),
+            'post': (
+                f'/api/posts/post/{post_id}/',
+                f'/api/posts/async/post/{post_id}/',
+            ),
+        }
+        for name in options['endpoint'] or ENDPOINTS:
+            if name == 'post' and post_id is None:
+                self.stdout.write('post: skipped, there are no posts.')
+                continue
+            for label, path in zip(('sync', 'async'), endpoints[name]):
+                # The test client sends every request to testserver.
+                with override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+                ):
+                    result = asyncio.run(
+                        self._run(client, path, headers, options)
+                    )
+                self._report(f'{name} {label}', *result)
+
+    async def _run(self, client, path, headers, options):
+        remaining = options['requests']
+        timings = []
+        failures = 0
+
+        async def worker():
+            nonlocal remaining, failures
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                response = await client.get(path, **headers)
+                timings.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker() for _ in range(options['concurrency']))
+        )
+        return time.perf_counter() - start, sorted(timings), failures
+
+    def _report(self, label, elapsed, timings, failures):
+        p50 = timings[int(len(timings) * 0.50)]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f'{label}: {len(timings) / elapsed:.0f} req/s, '
+            f'p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, '
+            f'failed={failures}'
+        )
@@ -0,0 +1,93 @@
+"""
+Django command to benchmark the user search endpoint.
+"""
+
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import search
+from core.models import User
+
+PATH = '/api/user/search_user/'
+
+
+class Command(BaseCommand):
+    """Django command to measure user search latency"""
+
+    help = (
+        'Send user searches built from the stored search documents to the '
+        'search endpoint and report latency percentiles. Requests go through '
+        'the middleware and authentication with a Bearer token, against the '
+        'configured database and search backend.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--limit', type=int, default=search.RESULT_LIMIT)
+        parser.add_argument('--sample', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='User making the requests, the first active user by default.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        users = User.objects.filter(is_active=True).order_by('pk')
+        if options['user'] is not None:
+            users = users.filter(pk=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('Create at least one active user first.')
+
+        rng = random.Random(options['seed'])
+        words = [
+            word
+            for document in User.objects.exclude(search_document='')
+            .order_by('?')
+            .values_list('search_document', flat=True)[: options['sample']]
+            for word in document.split()
+        ]
+        if not words:
+            raise CommandError('No user has a search document yet.')
+
+        client = Client(raise_request_exception=False)
+        token = AccessToken.for_user(user)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        timings = []
+        failures = 0
+        # The test client sends every request to testserver.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            for _ in range(options['queries']):
+                query = ' '.join(
+                    word[: rng.randint(2, len(word))]
+                    for word in rng.choices(words, k=rng.randint(1, 2))
+                )
+                start = time.perf_counter()
+                response = client.get(
+                    PATH,
+                    {'query': query, 'limit': options['limit']},
+                    **headers,
+                )
+                timings.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    failures += 1
+
+        timings.sort()
+        self.stdout.write(
+            f'{type(search.get_backend()).__name__}, '
+            f'{User.objects.count()} users, failed={failures}'
+        )
+        for label, quantile in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            value = timings[
+                min(len(timings) - 1, int(len(timings) * quantile))
+            ]
+            self.stdout.write(f'{label}: {value * 1000:.2f} ms')
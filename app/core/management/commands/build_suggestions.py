@@ -0,0 +1,36 @@
+"""
+Django command to rebuild "people you may know" suggestions.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import suggestions
+
+
+class Command(BaseCommand):
+    """Django command to build user suggestions"""
+
+    help = (
+        'Recompute suggestions of users whose follows or tags changed, '
+        'or of everyone with --full.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute suggestions of every user.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        started = time.monotonic()
+        built = suggestions.build(full=options['full'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Built suggestions for {built} users in '
+                f'{time.monotonic() - started:.1f}s.'
+            )
+        )
@@ -0,0 +1,31 @@
+"""
+Django command to report the hit rate of the response cache.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.cache import responses
+
+
+class Command(BaseCommand):
+    """Django command to print response cache counters"""
+
+    help = 'Print the shared hit and miss counters of the response cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        stats = responses.stats()
+        for counter in ('local_hits', 'shared_hits', 'misses', 'waits'):
+            self.stdout.write(f'{counter}: {stats[counter]}')
+        self.stdout.write(
+            self.style.SUCCESS(f"hit rate: {stats['hit_rate']:.1%}")
+        )
+        if options['reset']:
+            responses.reset_stats()
@@ -0,0 +1,29 @@
+"""
+Django command to queue variant generation for stored images.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.models import Post, User
+from core.tasks import schedule_variants
+
+
+class Command(BaseCommand):
+    """Django command to backfill image variants"""
+
+    help = 'Queue variant generation for every user and post image.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        queued = 0
+        for model in (User, Post):
+            for instance in (
+                model.objects.exclude(image='')
+                .exclude(image=None)
+                .only('id', 'image')
+                .iterator()
+            ):
+                schedule_variants(instance.image)
+                queued += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} images.'))
@@ -0,0 +1,40 @@
+"""
+Django command to import follow edges from an NDJSON file.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from accounts import follows
+
+
+class Command(BaseCommand):
+    """Django command to import follow edges"""
+
+    help = (
+        'Import follows from NDJSON lines of '
+        '{"follower": id, "follows": [ids]}.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-', help='NDJSON file, or - for stdin.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options['path'] == '-':
+            summary = follows.import_edges(sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                summary = follows.import_edges(lines)
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Read {summary['lines']} lines, "
+                f"created {summary['created']} follows."
+            )
+        )
@@ -0,0 +1,184 @@
+"""
+Django command to open many notification sockets against a running server.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import resource
+import struct
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+
+
+def frame(text):
+    """Encode a masked client text frame."""
+    payload = text.encode()
+    mask = os.urandom(4)
+    header = bytes([0x81])
+    length = len(payload)
+    if length < 126:
+        header += bytes([0x80 | length])
+    elif length < 65536:
+        header += bytes([0x80 | 126]) + struct.pack('!H', length)
+    else:
+        header += bytes([0x80 | 127]) + struct.pack('!Q', length)
+    masked = bytes(
+        byte ^ mask[index % 4] for index, byte in enumerate(payload)
+    )
+    return header + mask + masked
+
+
+async def read_frame(reader):
+    """Read one server frame and return (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    return first & 0x0F, await reader.readexactly(length)
+
+
+class Client:
+    """Minimal WebSocket client that answers application pings."""
+
+    def __init__(self, host, port, path, stats):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.stats = stats
+
+    async def run(self, hold):
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+            key = base64.b64encode(os.urandom(16)).decode()
+            writer.write(
+                (
+                    f'GET {self.path} HTTP/1.1\r\n'
+                    f'Host: {self.host}:{self.port}\r\n'
+                    'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+                    f'Sec-WebSocket-Key: {key}\r\n'
+                    'Sec-WebSocket-Version: 13\r\n\r\n'
+                ).encode()
+            )
+            status = await reader.readuntil(b'\r\n\r\n')
+            if b' 101 ' not in status.split(b'\r\n', 1)[0]:
+                raise ConnectionError(status.split(b'\r\n', 1)[0].decode())
+        except (OSError, asyncio.IncompleteReadError, ConnectionError):
+            self.stats['failed'] += 1
+            return
+
+        self.stats['connected'] += 1
+        self.stats['connect_times'].append(time.perf_counter() - start)
+        deadline = asyncio.get_running_loop().time() + hold
+        try:
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    opcode, payload = await asyncio.wait_for(
+                        read_frame(reader), remaining
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if opcode == 0x8:
+                    self.stats['closed'] += 1
+                    return
+                message = json.loads(payload or b'{}')
+                if message.get('type') == 'ping':
+                    writer.write(frame(json.dumps({'type': 'pong'})))
+                else:
+                    self.stats['messages'] += 1
+        except (OSError, asyncio.IncompleteReadError):
+            self.stats['closed'] += 1
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    """Django command to load test the notification gateway"""
+
+    help = (
+        'Open N concurrent notification sockets and report connect '
+        'latency and delivery.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='ws://127.0.0.1:8000/ws/notifications/'
+        )
+        parser.add_argument('--connections', type=int, default=50000)
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Distinct users to mint tokens for.',
+        )
+        parser.add_argument(
+            '--ramp',
+            type=float,
+            default=2000,
+            help='New connections per second.',
+        )
+        parser.add_argument(
+            '--hold',
+            type=float,
+            default=60,
+            help='Seconds to keep each socket open.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        url = urlsplit(options['url'])
+        if url.scheme != 'ws':
+            raise CommandError('Only ws:// URLs are supported.')
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = min(hard, options['connections'] + 1024)
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+        users = list(User.objects.filter(is_active=True)[:options['users']])
+        if not users:
+            raise CommandError('Create at least one active user first.')
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+
+        stats = {
+            'connected': 0,
+            'failed': 0,
+            'closed': 0,
+            'messages': 0,
+            'connect_times': [],
+        }
+        asyncio.run(self._run(url, tokens, stats, options))
+
+        times = sorted(stats['connect_times']) or [0]
+        self.stdout.write(
+            f"connected={stats['connected']} failed={stats['failed']} "
+            f"closed={stats['closed']} "
+            f"messages={stats['messages']}"
+        )
+        for label, quantile in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            value = times[min(len(times) - 1, int(len(times) * quantile))]
+            self.stdout.write(f'connect {label}: {value * 1000:.1f} ms')
+
+    async def _run(self, url, tokens, stats, options):
+        clients = []
+        interval = 1 / options['ramp']
+        for index in range(options['connections']):
+            path = f'{url.path}?token={tokens[index % len(tokens)]}'
+            client = Client(url.hostname, url.port or 80, path, stats)
+            clients.append(asyncio.ensure_future(client.run(options['hold'])))
+            await asyncio.sleep(interval)
+        await asyncio.gather(*clients)
@@ -0,0 +1,34 @@
+"""
+Django command to delete old finished background jobs.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.jobs import get_backend
+from core.jobs.backends import RETENTION_DAYS
+
+
+class Command(BaseCommand):
+    """Django command to apply the job retention"""
+
+    help = (
+        'Delete done and failed jobs last scheduled more than --days ago, '
+        'in chunks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted = get_backend().prune(cutoff, options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Deleted {deleted} jobs older than {options["days"]} days.'
+            )
+        )
@@ -0,0 +1,46 @@
+"""
+Django command to delete old notifications in chunks.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications import inbox
+
+
+class Command(BaseCommand):
+    """Django command to apply the notification retention"""
+
+    help = (
+        'Delete notifications older than --days, oldest first, in short '
+        'per-chunk transactions, optionally appending them to an NDJSON '
+        'archive first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=inbox.RETENTION_DAYS)
+        parser.add_argument(
+            '--chunk-size', type=int, default=inbox.PRUNE_CHUNK_SIZE
+        )
+        parser.add_argument(
+            '--archive',
+            help='NDJSON file the deleted notifications are appended to.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        if options['archive']:
+            with open(options['archive'], 'a', encoding='utf-8') as archive:
+                deleted = inbox.prune(cutoff, options['chunk_size'], archive)
+        else:
+            deleted = inbox.prune(cutoff, options['chunk_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Deleted {deleted} notifications older than '
+                f'{options["days"]} days.'
+            )
+        )
@@ -0,0 +1,72 @@
+"""
+Django command to repair drift between the stored follow counters and the
+follows table.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import User
+
+
+class Command(BaseCommand):
+    """Django command to reconcile stored follower and following counters"""
+
+    help = (
+        'Recompute User.followers_count and User.following_count where '
+        'they drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        chunk_size = options['chunk_size']
+        follows = User.follows.through.objects
+        followers = (
+            follows.filter(to_user=OuterRef('pk'))
+            .values('to_user')
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        following = (
+            follows.filter(from_user=OuterRef('pk'))
+            .values('from_user')
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        repaired = 0
+        last_id = 0
+        while True:
+            ids = list(
+                User.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            drifted = (
+                User.objects.filter(id__in=ids)
+                .annotate(
+                    actual_followers=Coalesce(Subquery(followers), 0),
+                    actual_following=Coalesce(Subquery(following), 0),
+                )
+                .filter(
+                    ~Q(followers_count=F('actual_followers'))
+                    | ~Q(following_count=F('actual_following'))
+                )
+                .values_list('id', 'actual_followers', 'actual_following')
+            )
+            for user_id, actual_followers, actual_following in drifted:
+                User.objects.filter(id=user_id).update(
+                    followers_count=actual_followers,
+                    following_count=actual_following,
+                )
+                repaired += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Repaired {repaired} follow counters.')
+        )
@@ -0,0 +1,53 @@
+"""
+Django command to repair drift between Post.like_count and the likes table.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Post
+
+
+class Command(BaseCommand):
+    """Django command to reconcile stored like counters"""
+
+    help = 'Recompute Post.like_count from the likes table where it drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        chunk_size = options['chunk_size']
+        likes = (
+            Post.likes.through.objects
+            .filter(post=OuterRef('pk'))
+            .values('post')
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        repaired = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Post.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            drifted = (
+                Post.objects.filter(id__in=ids)
+                .annotate(actual=Coalesce(Subquery(likes), 0))
+                .exclude(like_count=F('actual'))
+                .values_list('id', 'actual')
+            )
+            for post_id, actual in drifted:
+                Post.objects.filter(id=post_id).update(like_count=actual)
+                repaired += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Repaired {repaired} like counters.')
+        )
@@ -0,0 +1,57 @@
+"""
+Django command to repair drift between Group.member_count and the memberships
+table.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Group, Membership
+
+
+class Command(BaseCommand):
+    """Django command to reconcile stored member counters"""
+
+    help = (
+        'Recompute Group.member_count from the memberships table where '
+        'it drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        chunk_size = options['chunk_size']
+        members = (
+            Membership.objects
+            .filter(group=OuterRef('pk'))
+            .values('group')
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        repaired = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Group.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            drifted = (
+                Group.objects.filter(id__in=ids)
+                .annotate(actual=Coalesce(Subquery(members), 0))
+                .exclude(member_count=F('actual'))
+                .values_list('id', 'actual')
+            )
+            for group_id, actual in drifted:
+                Group.objects.filter(id=group_id).update(member_count=actual)
+                repaired += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Repaired {repaired} member counters.')
+        )
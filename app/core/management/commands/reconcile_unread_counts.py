@@ -0,0 +1,62 @@
+"""
+Django command to repair drift between User.unread_notifications_count and the
+notifications table.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core import cache
+from core.models import Notification, User
+from notifications import inbox
+
+
+class Command(BaseCommand):
+    """Django command to reconcile stored unread notification counters"""
+
+    help = (
+        'Recompute User.unread_notifications_count from the notifications '
+        'table where it drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        chunk_size = options['chunk_size']
+        unread = (
+            Notification.objects
+            .filter(recipient=OuterRef('pk'), is_read=False)
+            .values('recipient')
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        repaired = 0
+        last_id = 0
+        while True:
+            ids = list(
+                User.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            drifted = list(
+                User.objects.filter(id__in=ids)
+                .annotate(actual=Coalesce(Subquery(unread), 0))
+                .exclude(unread_notifications_count=F('actual'))
+                .values_list('id', 'actual')
+            )
+            for user_id, actual in drifted:
+                User.objects.filter(id=user_id).update(
+                    unread_notifications_count=actual
+                )
+                cache.responses.bump(*inbox.badge_deps(user_id))
+                repaired += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Repaired {repaired} unread counters.')
+        )
@@ -0,0 +1,84 @@
+"""
+Django command to run background job workers.
+"""
+
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs.worker import Worker
+
+
+def _run_worker(queues, poll_interval, burst):
+    worker = Worker(queues, poll_interval=poll_interval, burst=burst)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+    worker.run()
+
+
+class Command(BaseCommand):
+    """Django command to process queued jobs"""
+
+    help = 'Run a pool of workers that execute queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queues', nargs='+',
+            help=(
+                'Queues to process, optionally with a limit, '
+                'e.g. default images:2.'
+            ),
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help=(
+                'Number of worker processes; each one runs its own '
+                'thread pool.'
+            ),
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queues are empty.',
+        )
+
+    def _queues(self, options):
+        configured = getattr(settings, 'JOBS_QUEUES', {'default': 4})
+        if not options['queues']:
+            return dict(configured)
+
+        queues = {}
+        for value in options['queues']:
+            name, _, limit = value.partition(':')
+            queues[name] = int(limit) if limit else configured.get(name, 1)
+        return queues
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        queues = self._queues(options)
+        self.stdout.write(
+            f"Processing {', '.join(f'{q}:{n}' for q, n in queues.items())}"
+        )
+        worker_args = (queues, options['poll_interval'], options['burst'])
+
+        if options['processes'] <= 1:
+            _run_worker(*worker_args)
+        else:
+            connections.close_all()
+            processes = [
+                multiprocessing.Process(target=_run_worker, args=worker_args)
+                for _ in range(options['processes'])
+            ]
+            for process in processes:
+                process.start()
+            try:
+                for process in processes:
+                    process.join()
+            except KeyboardInterrupt:
+                for process in processes:
+                    process.terminate()
+
+        self.stdout.write(self.style.SUCCESS('Workers stopped.'))
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_like_count(apps, schema_editor):
+    Post = apps.get_model('core', 'Post')
+    likes = (
+        Post.likes.through.objects
+        .filter(post=OuterRef('pk'))
+        .values('post')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    Post.objects.update(like_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_like_count, migrations.RunPython.noop),
+    ]
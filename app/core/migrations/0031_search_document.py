@@ -0,0 +1,73 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:27
+
+import re
+
+from django.db import migrations, models
+
+
+POSTGRES_INDEXES = [
+    ('core_user', 'core_user_search_tsv_idx', "USING gin (to_tsvector('simple', search_document))"),
+    ('core_user', 'core_user_search_trgm_idx', 'USING gin (search_document gin_trgm_ops)'),
+    ('core_group', 'core_group_search_tsv_idx', "USING gin (to_tsvector('simple', search_document))"),
+    ('core_group', 'core_group_search_trgm_idx', 'USING gin (search_document gin_trgm_ops)'),
+]
+
+
+def _document(parts):
+    return ' '.join(re.findall(r'\w+', ' '.join(part or '' for part in parts).lower()))
+
+
+def populate_search_documents(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Group = apps.get_model('core', 'Group')
+
+    tags = {}
+    for user_id, name in User.tags.through.objects.values_list('user_id', 'tag__name'):
+        tags.setdefault(user_id, []).append(name)
+    for user in User.objects.only('id', 'username', 'first_name', 'last_name').iterator():
+        parts = [user.username, user.first_name, user.last_name] + tags.get(user.id, [])
+        User.objects.filter(pk=user.pk).update(search_document=_document(parts))
+
+    tags = {}
+    for group_id, name in Group.tags.through.objects.values_list('group_id', 'tag__name'):
+        tags.setdefault(group_id, []).append(name)
+    for group in Group.objects.only('id', 'name').iterator():
+        parts = [group.name] + tags.get(group.id, [])
+        Group.objects.filter(pk=group.pk).update(search_document=_document(parts))
+
+
+def create_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, name, definition in POSTGRES_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}')
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, name, definition in POSTGRES_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:32
+
+import core.images
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(null=True, storage=core.images.ContentAddressedStorage(), upload_to=core.models.post_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='image',
+            field=models.ImageField(null=True, storage=core.images.ContentAddressedStorage(), upload_to=core.models.user_image_file_path),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_chat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
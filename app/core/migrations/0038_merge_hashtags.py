@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:51
+
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _normalize(name):
+    return unicodedata.normalize('NFKC', name or '').strip().lstrip('#').strip().casefold()[:50]
+
+
+def merge_hashtags(apps, schema_editor):
+    Hashtag = apps.get_model('core', 'Hashtag')
+    Post = apps.get_model('core', 'Post')
+    Through = Post.hashtags.through
+
+    groups = {}
+    for pk, name in Hashtag.objects.order_by('id').values_list('id', 'name').iterator():
+        groups.setdefault(_normalize(name), []).append(pk)
+
+    empty = groups.pop('', [])
+    if empty:
+        Through.objects.filter(hashtag_id__in=empty).delete()
+        Hashtag.objects.filter(id__in=empty).delete()
+
+    for name, ids in groups.items():
+        keep, duplicates = ids[0], ids[1:]
+        if duplicates:
+            linked = set(Through.objects.filter(hashtag_id=keep).values_list('post_id', flat=True))
+            moved = set(
+                Through.objects.filter(hashtag_id__in=duplicates).values_list('post_id', flat=True)
+            ) - linked
+            Through.objects.bulk_create([Through(post_id=post_id, hashtag_id=keep) for post_id in moved])
+            Through.objects.filter(hashtag_id__in=duplicates).delete()
+            Hashtag.objects.filter(id__in=duplicates).delete()
+        Hashtag.objects.filter(id=keep).exclude(name=name).update(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hashtag',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='user_hashtag', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(merge_hashtags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_merge_hashtags'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hashtag',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.CreateModel(
+            name='HashtagTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=8)),
+                ('score', models.FloatField()),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trends', to='core.hashtag')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='hashtagtrend',
+            index=models.Index(fields=['window', '-score'], name='hashtag_trend_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hashtagtrend',
+            constraint=models.UniqueConstraint(fields=('hashtag', 'window'), name='unique_hashtag_trend'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_hashtag_timeline(apps, schema_editor):
+    Post = apps.get_model('core', 'Post')
+    HashtagTimeline = apps.get_model('core', 'HashtagTimeline')
+    links = Post.hashtags.through.objects.values_list('hashtag_id', 'post_id', 'post__posted').iterator()
+    batch = []
+    for hashtag_id, post_id, posted in links:
+        batch.append(HashtagTimeline(hashtag_id=hashtag_id, post_id=post_id, posted=posted))
+        if len(batch) >= 5000:
+            HashtagTimeline.objects.bulk_create(batch)
+            batch = []
+    HashtagTimeline.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_hashtag_unique_trends'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashtagTimeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posted', models.DateTimeField()),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='core.hashtag')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='hashtagtimeline',
+            index=models.Index(fields=['hashtag', '-posted', '-post'], name='hashtag_timeline_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hashtagtimeline',
+            constraint=models.UniqueConstraint(fields=('hashtag', 'post'), name='unique_hashtag_timeline'),
+        ),
+        migrations.RunPython(populate_hashtag_timeline, migrations.RunPython.noop),
+    ]
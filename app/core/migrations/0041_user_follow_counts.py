@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:58
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_follow_counts(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Follow = User.follows.through
+
+    def total(column):
+        return Coalesce(Subquery(
+            Follow.objects.filter(**{column: OuterRef('pk')})
+            .values(column)
+            .annotate(total=Count('*'))
+            .values('total')
+        ), 0)
+
+    User.objects.update(followers_count=total('to_user'), following_count=total('from_user'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_hashtagtimeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_follow_counts, migrations.RunPython.noop),
+    ]
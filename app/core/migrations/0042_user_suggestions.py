@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0041_user_follow_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleSuggestion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='core.user')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('mutual_count', models.PositiveIntegerField(default=0)),
+                ('tag_overlap', models.PositiveIntegerField(default=0)),
+                ('suggested', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='usersuggestion',
+            index=models.Index(fields=['user', '-score'], name='user_suggestion_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='usersuggestion',
+            constraint=models.UniqueConstraint(fields=('user', 'suggested'), name='unique_user_suggestion'),
+        ),
+    ]
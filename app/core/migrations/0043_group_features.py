@@ -0,0 +1,64 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:06
+
+import math
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+HALF_LIFE = 7 * 86400
+EPOCH = 1_600_000_000
+
+
+def populate_group_features(apps, schema_editor):
+    Group = apps.get_model('core', 'Group')
+    GroupFeature = apps.get_model('core', 'GroupFeature')
+    Post = apps.get_model('core', 'Post')
+    rate = math.log(2) / HALF_LIFE
+
+    tags = {}
+    for group_id, name in Group.tags.through.objects.values_list('group_id', 'tag__name').iterator():
+        tags.setdefault(group_id, set()).add(unicodedata.normalize('NFKC', name).strip().casefold())
+
+    activity = {}
+    posts = Post.objects.filter(group__isnull=False).values_list('group_id', 'posted').iterator()
+    for group_id, posted in posts:
+        weight = rate * (posted.timestamp() - EPOCH)
+        current = activity.get(group_id)
+        if current is None:
+            activity[group_id] = weight
+        else:
+            high, low = max(current, weight), min(current, weight)
+            activity[group_id] = high + math.log1p(math.exp(low - high))
+
+    batch = []
+    for group_id in Group.objects.values_list('id', flat=True).iterator():
+        batch.append(GroupFeature(
+            group_id=group_id,
+            tags=sorted(tags.get(group_id, ())),
+            activity=activity.get(group_id, -1e12),
+        ))
+        if len(batch) >= 5000:
+            GroupFeature.objects.bulk_create(batch)
+            batch = []
+    GroupFeature.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_user_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupFeature',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feature', serialize=False, to='core.group')),
+                ('tags', models.JSONField(default=list)),
+                ('activity', models.FloatField(default=-1000000000000.0)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(populate_group_features, migrations.RunPython.noop),
+    ]
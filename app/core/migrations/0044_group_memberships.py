@@ -0,0 +1,84 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def copy_memberships(apps, schema_editor):
+    Group = apps.get_model('core', 'Group')
+    Membership = apps.get_model('core', 'Membership')
+    now = django.utils.timezone.now()
+
+    # Admins first, so users who were in both tables keep the admin role.
+    for through, role in ((Group.admins.through, 'admin'), (Group.users.through, 'member')):
+        rows = through.objects.values_list('group_id', 'user_id', 'group__created').iterator()
+        batch = []
+        for group_id, user_id, created in rows:
+            batch.append(Membership(group_id=group_id, user_id=user_id, role=role, joined_at=created or now))
+            if len(batch) >= 5000:
+                Membership.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Membership.objects.bulk_create(batch, ignore_conflicts=True)
+
+    members = (
+        Membership.objects.filter(group=OuterRef('pk'))
+        .values('group')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    Group.objects.update(member_count=Coalesce(Subquery(members), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_group_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Membership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('member', 'Member'), ('admin', 'Admin')], default='member', max_length=16)),
+                ('joined_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='core.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='members',
+            field=models.ManyToManyField(related_name='member_groups', through='core.Membership', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['group', 'role', 'id'], name='membership_group_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['group', 'id'], name='membership_group_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='membership',
+            constraint=models.UniqueConstraint(fields=('group', 'user'), name='unique_membership'),
+        ),
+        migrations.RunPython(copy_memberships, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='group',
+            name='admins',
+        ),
+        migrations.RemoveField(
+            model_name='group',
+            name='users',
+        ),
+    ]
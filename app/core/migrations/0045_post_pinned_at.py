@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0044_group_memberships'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='pinned_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('pinned_at__isnull', False)), fields=['group', '-pinned_at'], name='post_group_pinned_idx'),
+        ),
+    ]
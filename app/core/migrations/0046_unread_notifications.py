@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_unread_counts(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Notification = apps.get_model('core', 'Notification')
+
+    unread = Coalesce(Subquery(
+        Notification.objects.filter(recipient=OuterRef('pk'), is_read=False)
+        .values('recipient')
+        .annotate(total=Count('*'))
+        .values('total')
+    ), 0)
+    User.objects.update(unread_notifications_count=unread)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0045_post_pinned_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'id'], name='notif_recipient_unread_idx'),
+        ),
+        migrations.RunPython(populate_unread_counts, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,7 @@ Database models
 """
 import uuid
 import os
+import unicodedata
 
 from django.conf import settings
 from django.db import models
@@ -13,21 +14,37 @@ from django.contrib.auth.models import (
 )
 from django.utils import timezone
 
+from core.images import ContentAddressedStorage, content_path, is_content_name
+
 def user_image_file_path(instance, filename):
     """Generate file path for new user image."""
-    ext = os.path.split(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
+    if not is_content_name(filename):
+        ext = os.path.split(filename)[1]
+        filename = f'{uuid.uuid4()}{ext}'
 
-    return os.path.join('uploads', 'user', filename)
+    return content_path(os.path.join('uploads', 'user'), filename)
 
 def post_image_file_path(intance, filename):
     """Generate file path for new port image."""
-    ext = os.path.split(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
+    if not is_content_name(filename):
+        ext = os.path.split(filename)[1]
+        filename = f'{uuid.uuid4()}{ext}'
+
+    return content_path(os.path.join('uploads', 'post'), filename)
+
+
+class UserQuerySet(models.QuerySet):
+    """Queryset for users."""
 
-    return os.path.join('uploads', 'post', filename)
+    def for_serializer(self):
+        """
+        Prepare the queryset for UserSerializer, which only renders columns
+        of the user row.
+        """
+        return self
 
-class UserManager(BaseUserManager):
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Manager for users."""
 
     def create_user(self, email, password=None, **extra_fields):
@@ -56,12 +73,24 @@ class User(AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     tags = models.ManyToManyField('Tag', related_name='core_user')
-    image = models.ImageField(null=True, upload_to=user_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=user_image_file_path,
+        storage=ContentAddressedStorage(),
+    )
     work_experiences = models.ManyToManyField('WorkExperience', related_name='core_experience')
     projects = models.ManyToManyField('Project', related_name='core_project')
     follows = models.ManyToManyField('self', symmetrical=False , related_name='followers', blank=True)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    unread_notifications_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    search_document = models.TextField(blank=True, default='', editable=False)
+    profile_version = models.BigIntegerField(default=0, editable=False)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
@@ -73,6 +102,12 @@ class User(AbstractBaseUser, PermissionsMixin):
             self.username = self.email.split('@')[0]
         super().save(*args, **kwargs)
         
+    def set_password(self, raw_password):
+        """Set the password and invalidate the tokens issued so far."""
+        super().set_password(raw_password)
+        if self.pk is not None:
+            self.token_version += 1
+
     def get_full_name(self):
         return self.first_name + ' ' + self.last_name
     
@@ -86,6 +121,11 @@ class Tag(models.Model):
     """Tag for filtering users."""
     name = models.CharField(max_length=255)
 
+    @staticmethod
+    def normalize(name):
+        """Return the form of a tag name that tags of any owner compare by."""
+        return unicodedata.normalize('NFKC', name).strip().casefold()
+
     def get_name(self):
         return self.name
     
@@ -119,6 +159,14 @@ class Technologie(models.Model):
     
 # Models for posts
 
+
+class GroupQuerySet(models.QuerySet):
+    """Queryset for groups."""
+
+    def for_serializer(self):
+        """Prefetch the tags rendered by GroupSerializer."""
+        return self.prefetch_related('tags')
+
 class Group(models.Model):
     name = models.CharField(max_length=255)
     creator = models.ForeignKey(
@@ -126,14 +174,93 @@ class Group(models.Model):
         on_delete=models.CASCADE,
         related_name='created_group'
     )
-    admins = models.ManyToManyField('User', related_name='admin_groups')
-    users = models.ManyToManyField('User', related_name='member_groups')
+    members = models.ManyToManyField(
+        'User', through='Membership', related_name='member_groups'
+    )
+    member_count = models.PositiveIntegerField(default=0, editable=False)
     tags = models.ManyToManyField('Tag', related_name='tag_groups')
     created = models.DateTimeField(auto_now_add=True, null=True)
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    objects = GroupQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['creator', '-id'], name='group_creator_id_idx'
+            ),
+        ]
 
     def get_name(self):
         return self.name
 
+
+class Membership(models.Model):
+    """Membership of a user in a group, with the user's role."""
+    MEMBER = 'member'
+    ADMIN = 'admin'
+    ROLE_CHOICES = [
+        (MEMBER, 'Member'),
+        (ADMIN, 'Admin'),
+    ]
+
+    group = models.ForeignKey(
+        'Group',
+        on_delete=models.CASCADE,
+        related_name='memberships'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='memberships'
+    )
+    role = models.CharField(
+        max_length=16, choices=ROLE_CHOICES, default=MEMBER
+    )
+    joined_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'user'], name='unique_membership'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['group', 'role', 'id'],
+                name='membership_group_role_idx',
+            ),
+            models.Index(
+                fields=['group', 'id'], name='membership_group_id_idx'
+            ),
+        ]
+
+
+class GroupFeature(models.Model):
+    """
+    Discovery features of a group.
+
+    ``tags`` holds the normalized names of the group tags and ``activity``
+    the forward-decayed count of its posts, stored as a logarithm.
+    """
+    group = models.OneToOneField(
+        'Group',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feature'
+    )
+    tags = models.JSONField(default=list)
+    activity = models.FloatField(default=-1e12)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class PostQuerySet(models.QuerySet):
+    """Queryset for posts."""
+
+    def for_serializer(self):
+        """Prefetch the hashtags rendered by PostSerializer."""
+        return self.prefetch_related('hashtags')
+
 class Post(models.Model):
     content = models.TextField(max_length=255)
     author = models.ForeignKey(
@@ -150,27 +277,184 @@ class Post(models.Model):
     posted = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     hashtags = models.ManyToManyField('HashTag', related_name='posts')
-    image = models.ImageField(null=True, upload_to=post_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=post_image_file_path,
+        storage=ContentAddressedStorage(),
+    )
     likes = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
         related_name='posts',
         blank=True
     )   
+    like_count = models.PositiveIntegerField(default=0)
+    pinned_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['author', '-posted', '-id'],
+                name='post_author_posted_idx',
+            ),
+            models.Index(
+                fields=['group', '-posted', '-id'],
+                name='post_group_posted_idx',
+            ),
+            models.Index(
+                fields=['group', '-pinned_at'],
+                name='post_group_pinned_idx',
+                condition=models.Q(pinned_at__isnull=False),
+            ),
+        ]
 
     def get_content(self):
         return f'User {self.autor.get_full_name()} - [{self.content}]'
     
 class Hashtag(models.Model):
-    name = models.CharField(max_length=50, default='fyp')
+    """Hashtag shared by every post using it, stored case-folded."""
+    name = models.CharField(max_length=50, unique=True)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.SET_NULL,
+        null=True,
         related_name='user_hashtag'
     )
 
+    @staticmethod
+    def normalize(name):
+        """Return the canonical form of a hashtag name."""
+        return (
+            unicodedata.normalize('NFKC', name)
+            .strip()
+            .lstrip('#')
+            .strip()
+            .casefold()
+        )
+
     def get_name_message(self):
         return f'You have created a new hashtag {self.name}'
+
+
+class HashtagTrend(models.Model):
+    """
+    Forward-decayed usage score of a hashtag in one trending window.
+
+    ``score`` is the log of the sum of exp(rate * (t - epoch)) over every
+    use at time t, so ordering by it ranks hashtags by decayed count without
+    rewriting old rows.
+    """
+    hashtag = models.ForeignKey(
+        'Hashtag',
+        on_delete=models.CASCADE,
+        related_name='trends'
+    )
+    window = models.CharField(max_length=8)
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hashtag', 'window'], name='unique_hashtag_trend'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['window', '-score'], name='hashtag_trend_rank_idx'
+            ),
+        ]
+
+
+class HashtagTimeline(models.Model):
+    """Post listed under one of its hashtags, with its date for paging."""
+    hashtag = models.ForeignKey(
+        'Hashtag',
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    posted = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hashtag', 'post'], name='unique_hashtag_timeline'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['hashtag', '-posted', '-post'],
+                name='hashtag_timeline_idx',
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Post pushed into the home timeline of one follower."""
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'post'], name='unique_timeline_entry'
+            ),
+        ]
     
+# Suggestions
+
+
+class UserSuggestion(models.Model):
+    """Precomputed "people you may know" entry for one user."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='suggestions'
+    )
+    suggested = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)
+    tag_overlap = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'suggested'], name='unique_user_suggestion'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='user_suggestion_rank_idx'
+            ),
+        ]
+
+
+class StaleSuggestion(models.Model):
+    """User whose follows or tags changed since suggestions were last built."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+'
+    )
+
 # Notifications
 
 class Notification(models.Model):
@@ -181,8 +465,161 @@ class Notification(models.Model):
         settings.AUTH_USER_MODEL, related_name='received_notifications', on_delete=models.CASCADE, null=True
     )
     message = models.TextField()
+    kind = models.CharField(max_length=32, blank=True, default='')
+    target_id = models.BigIntegerField(null=True, blank=True)
+    count = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['recipient', '-created_at', '-id'],
+                name='notif_recipient_created_idx',
+            ),
+            models.Index(
+                fields=['recipient', 'id'],
+                name='notif_recipient_unread_idx',
+                condition=models.Q(is_read=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f'Notification from {self.sender} to {self.recipient}'
+
+# Chat
+
+
+class Conversation(models.Model):
+    """Direct or group conversation between users."""
+    DIRECT = 'direct'
+    GROUP = 'group'
+    KIND_CHOICES = [
+        (DIRECT, 'Direct'),
+        (GROUP, 'Group'),
+    ]
+
+    kind = models.CharField(
+        max_length=10, choices=KIND_CHOICES, default=DIRECT
+    )
+    name = models.CharField(max_length=255, blank=True)
+    direct_key = models.CharField(
+        max_length=64, null=True, blank=True, unique=True
+    )
+    members = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        through='ConversationMember',
+        related_name='conversations'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_message_at = models.DateTimeField(default=timezone.now)
+
+    @staticmethod
+    def make_direct_key(user_id, other_id):
+        low, high = sorted([user_id, other_id])
+        return f'{low}:{high}'
+
+
+class ConversationMember(models.Model):
+    """Membership in a conversation with the read high-water mark."""
+    conversation = models.ForeignKey(
+        'Conversation',
+        on_delete=models.CASCADE,
+        related_name='memberships'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='conversation_memberships'
+    )
+    last_read_message_id = models.BigIntegerField(default=0)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['conversation', 'user'],
+                name='unique_conversation_member',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'conversation'], name='conv_member_user_idx'
+            ),
+        ]
+
+
+class Message(models.Model):
+    """Message posted in a conversation."""
+    conversation = models.ForeignKey(
+        'Conversation',
+        on_delete=models.CASCADE,
+        related_name='messages'
+    )
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='sent_messages'
+    )
+    body = models.TextField()
+    client_id = models.UUIDField(default=uuid.uuid4)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['conversation', 'client_id'],
+                name='unique_message_client_id',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['conversation', 'id'],
+                name='message_conversation_id_idx',
+            ),
+        ]
+
+# Background jobs
+
+
+class Job(models.Model):
+    """Unit of deferred work executed by the run_workers command."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    queue = models.CharField(max_length=50, default='default')
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    idempotency_key = models.CharField(
+        max_length=255, null=True, blank=True, unique=True
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['queue', 'status', 'run_at'],
+                name='job_queue_status_run_idx',
+            ),
+        ]
+
     def __str__(self):
-        return f'Notification from {self.sender} to {self.recipient}'
\ No newline at end of file
+        return f'{self.name} [{self.status}]'
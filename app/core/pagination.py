@@ -0,0 +1,41 @@
+"""
+Keyset (cursor) pagination classes shared by the list endpoints.
+
+Every ordering ends with the primary key so the position is stable and a
+page is served by an index range scan, no matter how deep the cursor is.
+"""
+
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    """Default pagination, newest rows first."""
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class PostCursorPagination(CursorPagination):
+    """Pagination for posts, ordered by publication date."""
+    ordering = ('-posted', '-id')
+
+
+class HashtagTimelineCursorPagination(CursorPagination):
+    """Pagination for hashtag timeline rows, ordered by post date."""
+    ordering = ('-posted', '-post_id')
+
+
+class NotificationCursorPagination(CursorPagination):
+    """Pagination for notifications, ordered by creation date."""
+    ordering = ('-created_at', '-id')
+
+
+class UserCursorPagination(CursorPagination):
+    """Pagination for users, ordered by registration."""
+    ordering = 'id'
+
+
+class ConversationCursorPagination(CursorPagination):
+    """Pagination for conversations, most recently active first."""
+    ordering = ('-last_message_at', '-id')
@@ -0,0 +1,379 @@
+"""
+Search backends for users and groups.
+
+Each searchable row keeps a lowercased ``search_document`` with its names and
+tag names. On PostgreSQL the document is queried through GIN indexes
+(``tsvector`` prefix matching or the ``pg_trgm`` ``%`` operator, ranked with
+``pg_trgm`` similarity).
+
+``InvertedIndexSearchBackend`` is an in-process index for the SQLite
+development database. It is built lazily and kept current by the signal
+handlers below, which only reach the index of their own process: other
+processes, e.g. job workers or a second server, keep serving stale results
+until they restart. It is only selected through ``SEARCH_BACKEND`` and is
+meant for development and tests.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.module_loading import import_string
+
+from core.models import Group, Tag, User
+
+RESULT_LIMIT = getattr(settings, 'SEARCH_RESULT_LIMIT', 50)
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into lowercase search tokens."""
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def build_user_documents(user_ids):
+    """Return {user_id: document} for the given users."""
+    documents = {}
+    rows = User.objects.filter(id__in=user_ids).values_list(
+        'id', 'username', 'first_name', 'last_name'
+    )
+    for user_id, username, first_name, last_name in rows:
+        documents[user_id] = [username, first_name, last_name]
+    tags = User.tags.through.objects.filter(user_id__in=user_ids).values_list(
+        'user_id', 'tag__name'
+    )
+    for user_id, name in tags:
+        documents[user_id].append(name)
+
+    return {
+        key: ' '.join(tokenize(' '.join(parts)))
+        for key, parts in documents.items()
+    }
+
+
+def build_group_documents(group_ids):
+    """Return {group_id: document} for the given groups."""
+    documents = {
+        group_id: [name]
+        for group_id, name in Group.objects.filter(
+            id__in=group_ids
+        ).values_list('id', 'name')
+    }
+    tags = Group.tags.through.objects.filter(
+        group_id__in=group_ids
+    ).values_list('group_id', 'tag__name')
+    for group_id, name in tags:
+        documents[group_id].append(name)
+
+    return {
+        key: ' '.join(tokenize(' '.join(parts)))
+        for key, parts in documents.items()
+    }
+
+
+class SearchBackend:
+    """Base class for search backends."""
+
+    def search_users(self, query, limit=RESULT_LIMIT):
+        raise NotImplementedError
+
+    def search_groups(self, query, limit=RESULT_LIMIT):
+        raise NotImplementedError
+
+    def update(self, model, documents):
+        """Called after search documents of the model changed."""
+
+    def remove(self, model, ids):
+        """Called after rows of the model were deleted."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Search through the GIN indexes created on search_document."""
+    # Each side of the OR is served by one of the GIN indexes. ``%`` is the
+    # pg_trgm similarity operator, escaped for the database driver.
+    MATCH_SQL = (
+        "(to_tsvector('simple', search_document) @@ to_tsquery('simple', %s)"
+        " OR search_document %% %s)"
+    )
+    RANK_SQL = (
+        "ts_rank(to_tsvector('simple', search_document), "
+        "to_tsquery('simple', %s))"
+        " + similarity(search_document, %s)"
+    )
+
+    def _search(self, queryset, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        ts_query = ' & '.join(f'{token}:*' for token in tokens)
+        text = ' '.join(tokens)
+
+        return (
+            queryset.filter(
+                RawSQL(
+                    self.MATCH_SQL,
+                    (ts_query, text),
+                    output_field=BooleanField(),
+                )
+            )
+            .annotate(
+                rank=RawSQL(
+                    self.RANK_SQL, (ts_query, text), output_field=FloatField()
+                )
+            )
+            .order_by('-rank', 'id')[:limit]
+        )
+
+    def search_users(self, query, limit=RESULT_LIMIT):
+        return list(
+            self._search(User.objects.all(), query, limit).values_list(
+                'id', flat=True
+            )
+        )
+
+    def search_groups(self, query, limit=RESULT_LIMIT):
+        return list(
+            self._search(Group.objects.all(), query, limit).values_list(
+                'id', flat=True
+            )
+        )
+
+
+class InvertedIndex:
+    """In-memory token -> ids index with prefix lookups over sorted tokens."""
+    MAX_EXPANSIONS = 500
+
+    def __init__(self):
+        self.postings = {}
+        self.tokens = []
+        self.documents = {}
+
+    def add(self, doc_id, document):
+        self.remove(doc_id)
+        tokens = set(document.split())
+        self.documents[doc_id] = tokens
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = set()
+                bisect.insort(self.tokens, token)
+            postings.add(doc_id)
+
+    def remove(self, doc_id):
+        for token in self.documents.pop(doc_id, ()):
+            self.postings[token].discard(doc_id)
+
+    def _expand(self, prefix):
+        """Yield (token, ids) for indexed tokens starting with prefix."""
+        start = bisect.bisect_left(self.tokens, prefix)
+        for token in self.tokens[start:start + self.MAX_EXPANSIONS]:
+            if not token.startswith(prefix):
+                break
+            yield token, self.postings[token]
+
+    def search(self, query, limit=RESULT_LIMIT):
+        """Return ids matching every query token as a prefix, best first."""
+        scores = None
+        for prefix in tokenize(query):
+            token_scores = {}
+            for token, ids in self._expand(prefix):
+                weight = 2.0 if token == prefix else len(prefix) / len(token)
+                for doc_id in ids:
+                    if token_scores.get(doc_id, 0) < weight:
+                        token_scores[doc_id] = weight
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: score + token_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in token_scores
+                }
+            if not scores:
+                return []
+
+        if scores is None:
+            return []
+        best = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], item[0])
+        )
+        return [doc_id for doc_id, _ in best]
+
+
+class InvertedIndexSearchBackend(SearchBackend):
+    """Pure-Python, per-process index for development and tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {}
+
+    def _index(self, model):
+        index = self._indexes.get(model)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(model)
+                if index is None:
+                    index = InvertedIndex()
+                    for pk, document in model.objects.values_list(
+                        'id', 'search_document'
+                    ).iterator():
+                        index.add(pk, document)
+                    self._indexes[model] = index
+        return index
+
+    def search_users(self, query, limit=RESULT_LIMIT):
+        return self._index(User).search(query, limit)
+
+    def search_groups(self, query, limit=RESULT_LIMIT):
+        return self._index(Group).search(query, limit)
+
+    def update(self, model, documents):
+        index = self._indexes.get(model)
+        if index is not None:
+            with self._lock:
+                for pk, document in documents.items():
+                    index.add(pk, document)
+
+    def remove(self, model, ids):
+        index = self._indexes.get(model)
+        if index is not None:
+            with self._lock:
+                for pk in ids:
+                    index.remove(pk)
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the search backend configured for the default database."""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        else:
+            raise ImproperlyConfigured(
+                'Search needs PostgreSQL. Set SEARCH_BACKEND to '
+                'core.search.InvertedIndexSearchBackend to use the '
+                'per-process index in development.'
+            )
+    return _backend
+
+
+def search_users(query, limit=RESULT_LIMIT):
+    """Return users matching the query, best match first."""
+    ids = get_backend().search_users(query, limit)
+    users = User.objects.for_serializer().in_bulk(ids)
+    return [users[pk] for pk in ids if pk in users]
+
+
+def search_groups(query, limit=RESULT_LIMIT):
+    """Return groups matching the query, best match first."""
+    ids = get_backend().search_groups(query, limit)
+    groups = Group.objects.for_serializer().in_bulk(ids)
+    return [groups[pk] for pk in ids if pk in groups]
+
+
+def refresh_users(user_ids):
+    """Rebuild the stored search documents of the given users."""
+    documents = build_user_documents(user_ids)
+    for pk, document in documents.items():
+        User.objects.filter(pk=pk).exclude(search_document=document).update(
+            search_document=document
+        )
+    get_backend().update(User, documents)
+
+
+def refresh_groups(group_ids):
+    """Rebuild the stored search documents of the given groups."""
+    documents = build_group_documents(group_ids)
+    for pk, document in documents.items():
+        Group.objects.filter(pk=pk).exclude(search_document=document).update(
+            search_document=document
+        )
+    get_backend().update(Group, documents)
+
+
+def _user_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_users([instance.pk])
+
+
+def _group_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_groups([instance.pk])
+
+
+def _tag_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    refresh_users(
+        list(
+            User.tags.through.objects.filter(tag=instance).values_list(
+                'user_id', flat=True
+            )
+        )
+    )
+    refresh_groups(
+        list(
+            Group.tags.through.objects.filter(tag=instance).values_list(
+                'group_id', flat=True
+            )
+        )
+    )
+
+
+def _tags_changed(refresh):
+    def handler(sender, instance, action, reverse, pk_set, **kwargs):
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        if not reverse:
+            refresh([instance.pk])
+        elif pk_set:
+            refresh(list(pk_set))
+    return handler
+
+
+def _deleted(sender, instance, **kwargs):
+    get_backend().remove(sender, [instance.pk])
+
+
+_user_tags_changed = _tags_changed(refresh_users)
+_group_tags_changed = _tags_changed(refresh_groups)
+
+
+def connect_signals():
+    """Keep search documents and the fallback index current."""
+    post_save.connect(
+        _user_saved, sender=User, dispatch_uid='search_user_saved'
+    )
+    post_save.connect(
+        _group_saved, sender=Group, dispatch_uid='search_group_saved'
+    )
+    post_save.connect(_tag_saved, sender=Tag, dispatch_uid='search_tag_saved')
+    post_delete.connect(
+        _deleted, sender=User, dispatch_uid='search_user_deleted'
+    )
+    post_delete.connect(
+        _deleted, sender=Group, dispatch_uid='search_group_deleted'
+    )
+    m2m_changed.connect(
+        _user_tags_changed,
+        sender=User.tags.through,
+        dispatch_uid='search_user_tags',
+    )
+    m2m_changed.connect(
+        _group_tags_changed,
+        sender=Group.tags.through,
+        dispatch_uid='search_group_tags',
+    )
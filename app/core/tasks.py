@@ -0,0 +1,24 @@
+"""
+Background jobs for shared models.
+"""
+
+from core import images, jobs
+from core.models import Post
+
+
+@jobs.job(queue='images')
+def generate_image_variants(name):
+    """Create the resized variants of a stored image."""
+    storage = Post._meta.get_field('image').storage
+    if storage.exists(name):
+        images.generate_variants(storage, name)
+
+
+def schedule_variants(field_file):
+    """Queue variant generation once per stored image."""
+    if field_file:
+        jobs.enqueue(
+            generate_image_variants,
+            args=[field_file.name],
+            idempotency_key=f'image-variants:{field_file.name}',
+        )
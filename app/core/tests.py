@@ -0,0 +1,293 @@
+import io
+import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache as django_cache
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import cache, db, images
+from core.jobs.backends import LOCK_TIMEOUT, DatabaseBackend
+from core.models import Job, Post, User
+
+
+class ImageVariantTests(SimpleTestCase):
+    """Variants are never upscaled and only listed once they exist."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = images.ContentAddressedStorage(
+            location=directory.name, base_url='/media/'
+        )
+        output = io.BytesIO()
+        Image.new('RGB', (400, 200)).save(output, format='JPEG')
+        self.name = self.storage.save(
+            'post/photo.jpg', ContentFile(output.getvalue())
+        )
+        self.field_file = SimpleNamespace(
+            storage=self.storage,
+            name=self.name,
+            url=self.storage.url(self.name),
+        )
+
+    def test_srcset_waits_for_the_variants(self):
+        self.assertEqual(
+            images.srcset(self.field_file),
+            {'original': self.field_file.url},
+        )
+
+    def test_widths_above_the_source_are_skipped(self):
+        with mock.patch.object(images, 'VARIANT_WIDTHS', (64, 320, 1080)):
+            created = images.generate_variants(self.storage, self.name)
+            result = images.srcset(self.field_file)
+
+        formats = images.variant_formats()
+        self.assertEqual(
+            sorted(created),
+            sorted(
+                images.variant_name(self.name, width, fmt)
+                for width in (64, 320)
+                for fmt in formats
+            ),
+        )
+        for fmt in formats:
+            self.assertIn('320w', result[fmt])
+            self.assertNotIn('1080w', result[fmt])
+
+
+class ResponseCacheTests(TestCase):
+    """Versions of the two-tier response cache."""
+
+    def setUp(self):
+        cache.responses.shared.clear()
+
+    def test_bump_waits_for_the_commit(self):
+        deps = [cache.dep('post', 1)]
+        before = cache.responses.versions(deps)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                cache.responses.bump(*deps)
+                self.assertEqual(cache.responses.versions(deps), before)
+
+        self.assertNotEqual(cache.responses.versions(deps), before)
+
+    def test_rolled_back_change_keeps_the_version(self):
+        deps = [cache.dep('post', 1)]
+        before = cache.responses.versions(deps)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    cache.responses.bump(*deps)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(cache.responses.versions(deps), before)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    """Routing decisions of ReplicaRouter."""
+
+    def setUp(self):
+        self.router = db.ReplicaRouter()
+        db.reset()
+        self.addCleanup(db.reset)
+
+    def test_reads_go_to_the_primary_unless_a_view_opted_in(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_go_to_the_replica_when_opted_in(self):
+        db.use_replica('replica1')
+
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+        with db.primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_writes_go_to_the_primary_and_pin_later_reads(self):
+        db.use_replica('replica1')
+
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'core'))
+
+
+REPLICATED = (User, Post)
+
+
+class ReplicaMiddlewareTests(TransactionTestCase):
+    """Read-only views read from the replica, except right after a write."""
+
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Migrations only run on the primary, so create the replica's tables.
+        connection = connections['replica1']
+        existing = set(connection.introspection.table_names())
+        with connection.schema_editor() as editor:
+            for model in apps.get_models():
+                if model._meta.db_table not in existing:
+                    editor.create_model(model)
+
+    def setUp(self):
+        django_cache.clear()
+        self.user = User.objects.create_user(
+            'a@example.com', 'pw', first_name='A', last_name='B'
+        )
+        self.post = Post.objects.create(author=self.user, content='hello')
+        # The replica lags behind: it has the post, but not its last edit.
+        for model in REPLICATED:
+            model.objects.using('replica1').bulk_create(
+                model.objects.using('default').all()
+            )
+        self.addCleanup(self.clear_replica)
+        Post.objects.filter(pk=self.post.pk).update(content='edited')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def clear_replica(self):
+        # The flush after each test skips the tables the router does not
+        # migrate on the replica.
+        connection = connections['replica1']
+        with connection.cursor() as cursor:
+            for model in reversed(REPLICATED):
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(f'DELETE FROM {table}')
+
+    def replica_queries(self, path):
+        with CaptureQueriesContext(connections['replica1']) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def contents(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [post['content'] for post in response.data['results']]
+
+    def test_feed_reads_from_the_replica(self):
+        self.assertGreater(self.replica_queries('/api/posts/feed/'), 0)
+        self.assertEqual(self.contents('/api/posts/feed/'), ['hello'])
+
+    def test_views_without_the_mixin_read_from_the_primary(self):
+        self.assertEqual(self.replica_queries('/api/posts/'), 0)
+        self.assertEqual(self.contents('/api/posts/'), ['edited'])
+
+    def test_reads_stay_on_the_primary_for_the_sticky_window_after_a_write(
+        self,
+    ):
+        response = self.client.post(
+            '/api/posts/', {'content': 'again'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(db.is_pinned(self.user.pk))
+
+        self.assertEqual(self.replica_queries('/api/posts/feed/'), 0)
+        self.assertEqual(
+            self.contents('/api/posts/feed/'), ['again', 'edited']
+        )
+
+        later = time.time() + db.STICKY_SECONDS + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertFalse(db.is_pinned(self.user.pk))
+            self.assertGreater(self.replica_queries('/api/posts/feed/'), 0)
+            self.assertEqual(self.contents('/api/posts/feed/'), ['hello'])
+
+
+class DatabaseBackendTests(TestCase):
+    """Jobs in the core_job table are claimed once, retried and pruned."""
+
+    def setUp(self):
+        self.backend = DatabaseBackend()
+
+    def enqueue(self, **kwargs):
+        return self.backend.enqueue(
+            name='core.tasks.generate_image_variants',
+            args=[],
+            kwargs={},
+            queue='default',
+            max_attempts=2,
+            **kwargs,
+        )
+
+    def claim(self):
+        return self.backend.claim('default', 10)
+
+    def test_claimed_job_is_not_claimed_again(self):
+        job = self.enqueue()
+
+        claimed = self.claim()
+        self.assertEqual([claimed_job.pk for claimed_job in claimed], [job.pk])
+        self.assertEqual(claimed[0].status, Job.RUNNING)
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual(self.claim(), [])
+
+    def test_job_with_a_stale_lock_is_claimed_again(self):
+        job = self.enqueue()
+        self.claim()
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=LOCK_TIMEOUT + 1)
+        )
+
+        self.assertEqual([claimed.attempts for claimed in self.claim()], [2])
+
+    def test_failed_job_is_retried_until_max_attempts(self):
+        self.enqueue()
+        job, = self.claim()
+        self.backend.fail(job, 'boom')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.last_error, 'boom')
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(self.claim(), [])
+
+        Job.objects.update(run_at=timezone.now())
+        job, = self.claim()
+        self.backend.fail(job, 'boom again')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(self.claim(), [])
+
+    def test_idempotency_key_returns_the_existing_job(self):
+        job = self.enqueue(idempotency_key='once')
+
+        self.assertEqual(self.enqueue(idempotency_key='once').pk, job.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_prune_deletes_only_old_finished_jobs(self):
+        done, failed, queued, recent = (self.enqueue() for _ in range(4))
+        Job.objects.filter(pk=done.pk).update(status=Job.DONE)
+        Job.objects.filter(pk__in=[failed.pk, recent.pk]).update(
+            status=Job.FAILED
+        )
+        old = timezone.now() - timedelta(days=8)
+        Job.objects.exclude(pk=recent.pk).update(run_at=old)
+
+        deleted = self.backend.prune(
+            timezone.now() - timedelta(days=7), chunk_size=1
+        )
+
+        self.assertEqual(deleted, 2)
+        self.assertCountEqual(
+            Job.objects.values_list('pk', flat=True), [queued.pk, recent.pk]
+        )
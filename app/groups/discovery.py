@@ -0,0 +1,266 @@
+"""
+Group discovery ranked by shared tags and recent activity.
+
+Every group has a ``GroupFeature`` row with the normalized names of its
+tags and a forward-decayed count of its posts (see ``posts.trending``):
+each post adds exp(rate * (t - EPOCH)) to ``activity``, kept as a
+logarithm, so the rows are only written when a group changes and never
+need to be decayed.
+
+Each process keeps the features in a ``GroupIndex``: one array of group
+ids, one of activities and, per tag name, the array of rows that carry
+it. The index reloads only the features updated since its last refresh,
+at most every ``GROUP_DISCOVERY_REFRESH_INTERVAL`` seconds. A ranking is a
+handful of array operations over all groups:
+
+    score = shared tags + GROUP_DISCOVERY_ACTIVITY_WEIGHT * log1p(decayed
+    posts)
+"""
+
+import math
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save
+from django.utils import timezone
+
+from core.models import Group, GroupFeature, Post, Tag
+
+HALF_LIFE = getattr(settings, 'GROUP_ACTIVITY_HALF_LIFE', 7 * 86400)
+ACTIVITY_WEIGHT = getattr(settings, 'GROUP_DISCOVERY_ACTIVITY_WEIGHT', 1.0)
+REFRESH_INTERVAL = getattr(settings, 'GROUP_DISCOVERY_REFRESH_INTERVAL', 30)
+# Features updated this long before the last refresh are read again, so
+# rows committed out of timestamp order are not missed.
+REFRESH_OVERLAP = timedelta(seconds=5)
+EPOCH = 1_600_000_000
+EMPTY_ACTIVITY = -1e12
+RATE = math.log(2) / HALF_LIFE
+
+
+def _log_add(a, b):
+    """Return log(exp(a) + exp(b)) without overflow."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def tag_names(tags):
+    """Return the sorted, normalized set of the given tag names."""
+    return sorted({Tag.normalize(name) for name in tags if name})
+
+
+class GroupIndex:
+    """In-process copy of the group features, refreshed incrementally."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._activity = np.zeros(0, dtype=np.float64)
+        self._size = 0
+        self._tags = []
+        self._postings = {}
+        self._arrays = {}
+        self._watermark = None
+        self._checked = None
+
+    def refresh(self, force=False):
+        """Load the features updated since the last refresh."""
+        now = time.monotonic()
+        if (
+            not force
+            and self._checked is not None
+            and now - self._checked < REFRESH_INTERVAL
+        ):
+            return
+        with self._lock:
+            if (
+                not force
+                and self._checked is not None
+                and now - self._checked < REFRESH_INTERVAL
+            ):
+                return
+            features = GroupFeature.objects.order_by('updated_at')
+            if self._watermark is not None:
+                features = features.filter(
+                    updated_at__gte=self._watermark - REFRESH_OVERLAP
+                )
+            for group_id, tags, activity, updated_at in features.values_list(
+                'group_id', 'tags', 'activity', 'updated_at'
+            ).iterator():
+                self._set(group_id, tags, activity)
+                self._watermark = updated_at
+            self._checked = now
+
+    def _set(self, group_id, tags, activity):
+        row = self._rows.get(group_id)
+        if row is None:
+            row = self._append(group_id)
+        self._activity[row] = activity
+
+        tags = frozenset(tags)
+        for name in self._tags[row] ^ tags:
+            self._arrays.pop(name, None)
+        for name in self._tags[row] - tags:
+            self._postings[name].discard(row)
+        for name in tags - self._tags[row]:
+            self._postings.setdefault(name, set()).add(row)
+        self._tags[row] = tags
+
+    def _append(self, group_id):
+        if self._size == len(self._ids):
+            capacity = max(1024, 2 * self._size)
+            self._ids = np.resize(self._ids, capacity)
+            self._activity = np.resize(self._activity, capacity)
+        row = self._size
+        self._rows[group_id] = row
+        self._ids[row] = group_id
+        self._tags.append(frozenset())
+        self._size += 1
+        return row
+
+    def discard(self, group_ids):
+        """Stop ranking groups that no longer exist."""
+        with self._lock:
+            for group_id in group_ids:
+                row = self._rows.get(group_id)
+                if row is not None:
+                    self._set(group_id, (), EMPTY_ACTIVITY)
+                    self._ids[row] = 0
+
+    def _posting(self, name):
+        rows = self._arrays.get(name)
+        if rows is None:
+            rows = self._arrays[name] = np.fromiter(
+                self._postings.get(name, ()), dtype=np.int64
+            )
+        return rows
+
+    def rank(self, tags, exclude=(), limit=20):
+        """Return (group id, score, shared tags) of the best groups."""
+        self.refresh()
+        with self._lock:
+            size = self._size
+            ids = self._ids[:size]
+            decayed = np.exp(
+                self._activity[:size] - RATE * (time.time() - EPOCH)
+            )
+            scores = ACTIVITY_WEIGHT * np.log1p(decayed)
+
+            shared = np.zeros(size, dtype=np.int64)
+            postings = [self._posting(name) for name in set(tags)]
+            if postings:
+                shared = np.bincount(np.concatenate(postings), minlength=size)
+            scores += shared
+
+            hidden = np.fromiter(
+                (self._rows[pk] for pk in exclude if pk in self._rows),
+                dtype=np.int64,
+            )
+            scores[hidden] = -np.inf
+            scores[ids == 0] = -np.inf
+
+            limit = min(limit, size)
+            if not limit:
+                return []
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            best = best[np.lexsort((ids[best], -scores[best]))]
+            return [
+                (int(ids[row]), float(scores[row]), int(shared[row]))
+                for row in best
+                if np.isfinite(scores[row])
+            ]
+
+
+index = GroupIndex()
+
+
+def refresh_tags(group_ids):
+    """Rewrite the tag names of the groups' features."""
+    names = {group_id: [] for group_id in group_ids}
+    links = Group.tags.through.objects.filter(group_id__in=names).values_list(
+        'group_id', 'tag__name'
+    )
+    for group_id, name in links:
+        names[group_id].append(name)
+
+    GroupFeature.objects.bulk_create(
+        [GroupFeature(group_id=group_id) for group_id in names],
+        ignore_conflicts=True,
+    )
+    now = timezone.now()
+    GroupFeature.objects.bulk_update(
+        [
+            GroupFeature(
+                group_id=group_id, tags=tag_names(tags), updated_at=now
+            )
+            for group_id, tags in names.items()
+        ],
+        ['tags', 'updated_at'],
+    )
+
+
+def record_post(group_id, posted):
+    """Count one post of the group at posted."""
+    weight = RATE * (posted.timestamp() - EPOCH)
+    with transaction.atomic():
+        feature, _ = GroupFeature.objects.select_for_update().get_or_create(
+            group_id=group_id
+        )
+        feature.activity = _log_add(feature.activity, weight)
+        feature.save(update_fields=['activity', 'updated_at'])
+
+
+def _group_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupFeature.objects.get_or_create(group=instance)
+
+
+def _tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # pk_set is not provided for clear; remember which groups lose the tag.
+        instance._discovery_clear_ids = list(
+            sender.objects.filter(tag_id=instance.pk).values_list(
+                'group_id', flat=True
+            )
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        refresh_tags([instance.pk])
+    elif action == 'post_clear':
+        refresh_tags(instance.__dict__.pop('_discovery_clear_ids', []))
+    elif pk_set:
+        refresh_tags(list(pk_set))
+
+
+def _tag_saved(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        refresh_tags(list(instance.tag_groups.values_list('id', flat=True)))
+
+
+def _post_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.group_id:
+        record_post(instance.group_id, instance.posted)
+
+
+def connect_signals():
+    """Keep the group features in step with groups, their tags and posts."""
+    post_save.connect(
+        _group_saved, sender=Group, dispatch_uid='discovery_group_saved'
+    )
+    post_save.connect(
+        _tag_saved, sender=Tag, dispatch_uid='discovery_tag_saved'
+    )
+    post_save.connect(
+        _post_saved, sender=Post, dispatch_uid='discovery_post_saved'
+    )
+    m2m_changed.connect(
+        _tags_changed,
+        sender=Group.tags.through,
+        dispatch_uid='discovery_group_tags',
+    )
@@ -0,0 +1,178 @@
+"""
+Group memberships and roles.
+
+Members and admins live in one ``Membership`` table, keyed by the unique
+``(group, user)`` pair, so a permission check is a single index lookup.
+Bulk changes write that table directly and then send one ``m2m_changed``
+for ``Group.members`` carrying every changed id, so the response cache and
+the ``Group.member_count`` handlers below run once per batch.
+"""
+
+from django.db import router, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, pre_delete
+
+from core.models import Group, Membership, User
+
+
+def is_member(group_id, user_id):
+    """Return True when the user belongs to the group."""
+    return Membership.objects.filter(
+        group_id=group_id, user_id=user_id
+    ).exists()
+
+
+def is_admin(group_id, user_id):
+    """Return True when the user is an admin of the group."""
+    return Membership.objects.filter(
+        group_id=group_id, user_id=user_id, role=Membership.ADMIN
+    ).exists()
+
+
+def _send(group, action, pk_set):
+    m2m_changed.send(
+        sender=Membership,
+        instance=group,
+        action=action,
+        reverse=False,
+        model=User,
+        pk_set=pk_set,
+        using=router.db_for_write(Membership, instance=group),
+    )
+
+
+def add(group, user_ids, role=Membership.MEMBER):
+    """
+    Add the active users in user_ids to the group with role.
+
+    Users who are already members keep their role. Returns the ids of the
+    added users.
+    """
+    valid = set(
+        User.objects.filter(pk__in=set(user_ids), is_active=True).values_list(
+            'id', flat=True
+        )
+    )
+    if not valid:
+        return set()
+
+    instance = Group(pk=group.pk)
+    with transaction.atomic():
+        existing = set(
+            Membership.objects.filter(group_id=group.pk, user_id__in=valid)
+            .values_list('user_id', flat=True)
+        )
+        added = valid - existing
+        _send(instance, 'pre_add', added)
+        Membership.objects.bulk_create(
+            [
+                Membership(group_id=group.pk, user_id=user_id, role=role)
+                for user_id in added
+            ],
+            ignore_conflicts=True,
+        )
+        _send(instance, 'post_add', added)
+    return added
+
+
+def remove(group, user_ids):
+    """
+    Remove the users in user_ids from the group.
+
+    The creator cannot be removed. Returns the ids of the removed users.
+    """
+    instance = Group(pk=group.pk)
+    with transaction.atomic():
+        memberships = (
+            Membership.objects
+            .filter(group_id=group.pk, user_id__in=set(user_ids))
+            .exclude(user_id=group.creator_id)
+        )
+        removed = set(memberships.values_list('user_id', flat=True))
+        if not removed:
+            return set()
+        _send(instance, 'pre_remove', removed)
+        memberships.filter(user_id__in=removed).delete()
+        _send(instance, 'post_remove', removed)
+    return removed
+
+
+def set_role(group, user_ids, role):
+    """
+    Give the members in user_ids the role.
+
+    The creator always stays an admin. Returns the ids of the members whose
+    role changed.
+    """
+    memberships = (
+        Membership.objects
+        .filter(group_id=group.pk, user_id__in=set(user_ids))
+        .exclude(role=role)
+    )
+    if role != Membership.ADMIN:
+        memberships = memberships.exclude(user_id=group.creator_id)
+    with transaction.atomic():
+        changed = set(
+            memberships.select_for_update().values_list('user_id', flat=True)
+        )
+        Membership.objects.filter(
+            group_id=group.pk, user_id__in=changed
+        ).update(role=role)
+    return changed
+
+
+def _adjust(group_ids, delta):
+    if group_ids and delta:
+        Group.objects.filter(pk__in=group_ids).update(
+            member_count=Greatest(F('member_count') + delta, Value(0))
+        )
+
+
+def _members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    owner, other = (
+        ('user_id', 'group_id') if reverse else ('group_id', 'user_id')
+    )
+
+    if action in ('pre_remove', 'pre_clear'):
+        # remove() reports the ids it was given and clear() none at all;
+        # remember the memberships that actually exist.
+        memberships = sender.objects.filter(**{owner: instance.pk})
+        if action == 'pre_remove':
+            memberships = memberships.filter(**{f'{other}__in': pk_set})
+        instance.__dict__['_membership_removed_ids'] = set(
+            memberships.values_list(other, flat=True)
+        )
+        return
+    if action == 'post_add':
+        ids, sign = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        ids, sign = instance.__dict__.pop('_membership_removed_ids', set()), -1
+    else:
+        return
+
+    if not ids:
+        return
+    if reverse:
+        _adjust(list(ids), sign)
+    else:
+        _adjust([instance.pk], sign * len(ids))
+
+
+def _user_deleted(sender, instance, **kwargs):
+    group_ids = list(
+        Membership.objects.filter(user_id=instance.pk).values_list(
+            'group_id', flat=True
+        )
+    )
+    _adjust(group_ids, -1)
+
+
+def connect_signals():
+    """Keep the stored member counts in step with the memberships table."""
+    m2m_changed.connect(
+        _members_changed, sender=Membership, dispatch_uid='membership_counters'
+    )
+    pre_delete.connect(
+        _user_deleted, sender=User, dispatch_uid='membership_user_deleted'
+    )
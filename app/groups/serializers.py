@@ -1,26 +1,55 @@
 
 from rest_framework import serializers
+from django.conf import settings
 from django.utils.translation import gettext as _
 
-from accounts.serializers import UserSerializer, TagSerializer
+from accounts.serializers import FollowUserSerializer, TagSerializer
 
-from core.models import Group
+from core.models import Group, Membership
+from . import membership
 
 class GroupSerializer(serializers.ModelSerializer):
     """Serializer for groups."""
 
-    admins = UserSerializer(many=True, required=False)
-    users = UserSerializer(many=True, required=False)
     tags = TagSerializer(many=True, required=False)
 
     class Meta:
         model = Group
-        fields = ['id', 'name', 'creator', 'admins', 'users', 'tags']
-        read_only_fields = ['id', 'creator']
+        fields = ['id', 'name', 'creator', 'member_count', 'tags']
+        read_only_fields = ['id', 'creator', 'member_count']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetch the relations rendered by this serializer."""
+        return queryset.for_serializer()
 
     def create(self, validated_data):
         group = Group.objects.create(**validated_data)
-        print(validated_data)
-        group.admins.add(validated_data['creator'])
+        membership.add(
+            group, [validated_data['creator'].pk], role=Membership.ADMIN
+        )
+        group.refresh_from_db(fields=['member_count'])
+
+        return group
+
 
-        return group
\ No newline at end of file
+class MembershipSerializer(serializers.ModelSerializer):
+    """Serializer for the members of a group."""
+    user = FollowUserSerializer(read_only=True)
+
+    class Meta:
+        model = Membership
+        fields = ['user', 'role', 'joined_at']
+        read_only_fields = fields
+
+
+class BulkMembershipSerializer(serializers.Serializer):
+    """Serializer for a list of users to add, remove or give a role."""
+    users = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.GROUP_BULK_LIMIT,
+    )
+    role = serializers.ChoiceField(
+        choices=Membership.ROLE_CHOICES, default=Membership.MEMBER
+    )
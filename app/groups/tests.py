@@ -0,0 +1,155 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import states
+from core import cache
+from core.models import Group, Membership, Post, Tag, User
+
+SIZES = (1, 10, 100)
+
+
+class GroupListQueryCountTests(TestCase):
+    """The group list runs a fixed number of queries, whatever its size."""
+
+    def setUp(self):
+        cache.responses.flush()
+        self.member = User.objects.create_user(
+            'member@example.com', 'pw', first_name='M', last_name='M'
+        )
+        self.tags = [
+            Tag.objects.create(name=f'tag{index}') for index in range(2)
+        ]
+
+    def test_own_groups(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                creator = User.objects.create_user(
+                    f'creator{size}@example.com',
+                    'pw',
+                    first_name='C',
+                    last_name='C',
+                )
+                for index in range(size):
+                    group = Group.objects.create(
+                        name=f'group {size} {index}', creator=creator
+                    )
+                    group.tags.add(*self.tags)
+                    Membership.objects.create(
+                        group=group, user=creator, role=Membership.ADMIN
+                    )
+                    Membership.objects.create(group=group, user=self.member)
+                # Load the authentication state up front, so only the
+                # queries of the list are counted.
+                states.discard([creator.pk])
+                states.get(creator.pk)
+                token = AccessToken.for_user(creator)
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+                with self.assertNumQueries(3):
+                    response = client.get('/api/groups/', {'limit': 100})
+                self.assertEqual(len(response.data['results']), size)
+
+
+class AddAdminTests(TestCase):
+    """Group admins promote users with the project's JWT authentication."""
+
+    def setUp(self):
+        self.admin, self.member = (
+            User.objects.create_user(
+                f'{name}@example.com', 'pw', first_name='A', last_name='B'
+            )
+            for name in ('admin', 'member')
+        )
+        self.group = Group.objects.create(name='group', creator=self.admin)
+        Membership.objects.create(
+            group=self.group, user=self.admin, role=Membership.ADMIN
+        )
+        Membership.objects.create(group=self.group, user=self.member)
+        self.path = f'/api/groups/add_admin/{self.group.pk}/'
+
+    def test_add_admin_with_a_bearer_token(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}'
+        )
+
+        response = client.post(self.path, {'id': self.member.pk})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            Membership.objects.get(group=self.group, user=self.member).role,
+            Membership.ADMIN,
+        )
+
+    def test_add_admin_requires_authentication(self):
+        response = APIClient().post(self.path, {'id': self.member.pk})
+
+        self.assertEqual(response.status_code, 401)
+
+
+class GroupPostsTests(TestCase):
+    """Members read the group feed with the project's JWT authentication."""
+
+    def setUp(self):
+        cache.responses.flush()
+        self.member, self.stranger = (
+            User.objects.create_user(
+                f'{name}@example.com', 'pw', first_name='A', last_name='B'
+            )
+            for name in ('member', 'stranger')
+        )
+        self.group = Group.objects.create(name='group', creator=self.member)
+        Membership.objects.create(group=self.group, user=self.member)
+        self.post = Post.objects.create(
+            author=self.member, group=self.group, content='hello'
+        )
+        self.path = f'/api/groups/{self.group.pk}/posts/'
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        return client
+
+    def test_member_reads_with_a_bearer_token(self):
+        response = self.client_for(self.member).get(self.path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [self.post.pk],
+        )
+
+    def test_non_member_is_denied(self):
+        response = self.client_for(self.stranger).get(self.path)
+
+        self.assertEqual(response.status_code, 403)
+
+
+class GroupSearchTests(TestCase):
+    """Group search accepts the project's JWT authentication."""
+
+    def test_search_with_a_bearer_token(self):
+        user = User.objects.create_user(
+            'searcher@example.com', 'pw', first_name='S', last_name='S'
+        )
+        Group.objects.create(name='Python developers', creator=user)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+
+        response = client.get('/api/groups/search/', {'query': 'python'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [group['name'] for group in response.data['results']],
+            ['Python developers'],
+        )
+
+    def test_search_requires_authentication(self):
+        response = APIClient().get('/api/groups/search/', {'query': 'python'})
+
+        self.assertEqual(response.status_code, 401)
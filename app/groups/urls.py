@@ -14,7 +14,37 @@ router.register('', GroupViewSet)
 app_name = 'groups'
 
 urlpatterns = [
+    path('search/', views.GroupSearchView.as_view(), name='search_group'),
+    path(
+        'discover/', views.GroupDiscoveryView.as_view(), name='discover_group'
+    ),
+    path(
+        '<int:pk>/members/', views.GroupMembersView.as_view(), name='members'
+    ),
+    path(
+        '<int:pk>/members/remove/',
+        views.RemoveGroupMembersView.as_view(),
+        name='remove_members',
+    ),
+    path(
+        '<int:pk>/members/role/',
+        views.GroupMemberRoleView.as_view(),
+        name='member_role',
+    ),
     path('', include(router.urls)),
-    path('add_admin/<int:pk>/', views.AddAdminViewSet.as_view(), name='add_admin'),
-    path('<int:pk>/posts/', views.GetPostAtGroupViewSet.as_view(), name='get_posts')
+    path(
+        'add_admin/<int:pk>/',
+        views.AddAdminViewSet.as_view(),
+        name='add_admin',
+    ),
+    path(
+        '<int:pk>/posts/',
+        views.GetPostAtGroupViewSet.as_view(),
+        name='get_posts',
+    ),
+    path(
+        '<int:pk>/posts/<int:post_id>/pin/',
+        views.GroupPostPinView.as_view(),
+        name='pin_post',
+    ),
 ]
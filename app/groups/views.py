@@ -2,67 +2,407 @@
 Views for logical of Groups.
 '''
 
-from rest_framework.authentication import TokenAuthentication
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
-from rest_framework import mixins, viewsets, status
+from rest_framework import generics, mixins, viewsets, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from core.models import Group, User, Post
-from .serializers import GroupSerializer
+from core.models import Group, Membership, User, Post, Tag
+from core import cache, search
+from core.db import ReplicaReadMixin
+from core.pagination import CursorPagination, PostCursorPagination
+from .serializers import (
+    BulkMembershipSerializer,
+    GroupSerializer,
+    MembershipSerializer,
+)
+from . import discovery, membership
 from posts.serializers import PostSerializer
 
 class GroupViewSet(
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin
 ):
     serializer_class = GroupSerializer
     queryset = Group.objects.all()
-    authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-         return self.queryset.filter(creator=self.request.user).order_by('-created')
+        queryset = self.serializer_class.setup_eager_loading(self.queryset)
+        return queryset.filter(creator=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        group_ids = list(
+            Group.objects.filter(creator=request.user)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        deps = [cache.dep('user-groups', request.user.pk)] + self.group_deps(
+            group_ids
+        )
+        not_modified, headers = cache.conditional(
+            request,
+            ('groups', request.user.pk, request.query_params.urlencode()),
+            deps,
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        not_modified, headers = cache.conditional(
+            request,
+            ('group', self.kwargs['pk']),
+            self.group_deps([self.kwargs['pk']]),
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = super().retrieve(request, *args, **kwargs)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    @staticmethod
+    def group_deps(group_ids):
+        """Return the cache dependencies of the rendered groups."""
+        return [cache.dep('group', pk) for pk in group_ids]
+
+
+class GroupSearchView(ReplicaReadMixin, APIView):
+    """Allow the authenticated user search groups by name and tags."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('query', '')
+        try:
+            limit = min(
+                int(request.query_params.get('limit', search.RESULT_LIMIT)),
+                search.RESULT_LIMIT,
+            )
+        except ValueError:
+            limit = search.RESULT_LIMIT
+
+        groups = search.search_groups(query, limit)
+        serializer = GroupSerializer(groups, many=True)
+
+        return Response({'results': serializer.data})
+
+
+class GroupDiscoveryView(APIView):
+    """Groups recommended to the user by shared tags and recent activity."""
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(
+                int(request.query_params.get('limit', 20)), self.max_limit
+            )
+        except ValueError:
+            limit = 20
+
+        user_id = request.user.pk
+        tags = discovery.tag_names(
+            Tag.objects.filter(core_user=user_id).values_list(
+                'name', flat=True
+            )
+        )
+        joined = set(
+            Group.objects.filter(creator=user_id).values_list('id', flat=True)
+        )
+        joined.update(
+            Membership.objects.filter(user_id=user_id).values_list(
+                'group_id', flat=True
+            )
+        )
+
+        ranked = discovery.index.rank(tags, exclude=joined, limit=limit)
+        groups = GroupSerializer.setup_eager_loading(
+            Group.objects.all()
+        ).in_bulk([pk for pk, _, _ in ranked])
+        missing = [pk for pk, _, _ in ranked if pk not in groups]
+        if missing:
+            discovery.index.discard(missing)
+
+        ranked = [entry for entry in ranked if entry[0] in groups]
+        data = GroupSerializer(
+            [groups[pk] for pk, _, _ in ranked], many=True
+        ).data
+        results = [
+            {**group, 'score': round(score, 3), 'shared_tags': shared}
+            for group, (_, score, shared) in zip(data, ranked)
+        ]
+        return Response({'results': results})
+
 class AddAdminViewSet(APIView):
     """Allow the authenticated user add to other user for manage group."""
-    authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk=None):
-        try:
-            group = Group.objects.get(pk=pk)
-        except Group.DoesNotExist:
+        group = Group.objects.filter(pk=pk).only('id', 'creator_id').first()
+        if group is None:
             return Response({"detail": "Group not found."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if group.admins.filter(id=request.user.pk).exists():
-            pk_from_user = request.data['id']
-
-            if User.objects.filter(pk=pk_from_user).exists():
-                user = User.objects.get(pk=pk_from_user)
-
-                if group.admins.filter(pk=pk_from_user).exists():
-                    return Response({"detail": f"The User with the pk: {pk_from_user} is already admin."})
-                
-                group.admins.add(user)
-                return Response({"detail": f"Now you've added to {user.get_full_name}"}, status=status.HTTP_200_OK)
-            
+        if not membership.is_admin(group.pk, request.user.pk):
+            return Response(
+                {
+                    "detail": (
+                        "You must be admin in this group for add to new "
+                        "user."
+                    )
+                }
+            )
+
+        pk_from_user = request.data['id']
+        user = User.objects.filter(pk=pk_from_user).first()
+        if user is None:
             return Response({"detail": f"User with pk: {pk_from_user} doesn't exists."}, status=status.HTTP_400_BAD_REQUEST)
-        return Response({"detail": "You must be admin in this group for add to new user."})
 
-class GetPostAtGroupViewSet(APIView):
-    """Allow the authenticated user get posts at group."""
-    authentication_classes = [TokenAuthentication]
+        added = membership.add(group, [user.pk], role=Membership.ADMIN)
+        if not added and not membership.set_role(
+            group, [user.pk], Membership.ADMIN
+        ):
+            return Response(
+                {
+                    "detail": (
+                        f"The User with the pk: {pk_from_user} is already "
+                        "admin."
+                    )
+                }
+            )
+        return Response(
+            {"detail": f"Now you've added to {user.get_full_name()}"},
+            status=status.HTTP_200_OK,
+        )
+
+
+class GroupMembershipMixin:
+    """Load the group of the URL and check the caller's role in one lookup."""
+
+    def get_group(self):
+        group = (
+            Group.objects.filter(pk=self.kwargs['pk'])
+            .only('id', 'creator_id')
+            .first()
+        )
+        if group is None:
+            raise NotFound("Group not found.")
+        return group
+
+    def check_admin(self, group):
+        if not membership.is_admin(group.pk, self.request.user.pk):
+            self.permission_denied(
+                self.request, message="You must be admin in this group."
+            )
+
+
+class GroupMembersView(GroupMembershipMixin, generics.ListAPIView):
+    """List the members of a group, or add members in bulk as an admin."""
+    serializer_class = MembershipSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
+
+    def get_queryset(self):
+        memberships = Membership.objects.filter(
+            group=self.kwargs['pk']
+        ).select_related('user')
+        role = self.request.query_params.get('role')
+        if role:
+            memberships = memberships.filter(role=role)
+        return memberships
+
+    def post(self, request, pk=None):
+        group = self.get_group()
+        self.check_admin(group)
+        serializer = BulkMembershipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = set(serializer.validated_data['users'])
+
+        added = membership.add(
+            group, requested, role=serializer.validated_data['role']
+        )
+        return Response(
+            {'added': sorted(added), 'skipped': sorted(requested - added)},
+            status=status.HTTP_200_OK,
+        )
+
+
+class RemoveGroupMembersView(GroupMembershipMixin, APIView):
+    """Remove members in bulk as an admin, or leave the group."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk=None):
+        group = self.get_group()
+        serializer = BulkMembershipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = set(serializer.validated_data['users'])
+        if requested != {request.user.pk}:
+            self.check_admin(group)
+
+        removed = membership.remove(group, requested)
+        return Response(
+            {
+                'removed': sorted(removed),
+                'skipped': sorted(requested - removed),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class GroupMemberRoleView(GroupMembershipMixin, APIView):
+    """Give members a role in bulk as an admin."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk=None):
+        group = self.get_group()
+        self.check_admin(group)
+        serializer = BulkMembershipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = set(serializer.validated_data['users'])
+
+        changed = membership.set_role(
+            group, requested, serializer.validated_data['role']
+        )
+        return Response(
+            {
+                'changed': sorted(changed),
+                'skipped': sorted(requested - changed),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class GetPostAtGroupViewSet(ReplicaReadMixin, generics.ListAPIView):
+    """
+    Allow the members of a group get its posts.
+
+    Pinned posts are listed apart, on the first page only, and left out of
+    the chronological pages. The first page is the one most readers load,
+    so it is cached until a post of the group changes.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = PostCursorPagination
+
+    def get_queryset(self):
+        queryset = Post.objects.filter(
+            group=self.kwargs['pk'], pinned_at__isnull=True
+        )
+        return self.serializer_class.setup_eager_loading(queryset)
+
+    def get_pinned(self, pk):
+        pinned = (
+            Post.objects
+            .filter(group=pk, pinned_at__isnull=False)
+            .order_by('-pinned_at')[:settings.GROUP_MAX_PINNED_POSTS]
+        )
+        return list(
+            self.serializer_class(
+                self.serializer_class.setup_eager_loading(pinned), many=True
+            ).data
+        )
+
+    def list(self, request, *args, **kwargs):
+        pk = self.kwargs['pk']
+        if not membership.is_member(pk, request.user.pk):
+            self.permission_denied(
+                request, message="You must be a member of this group."
+            )
+
+        if request.query_params.get('cursor'):
+            page = dict(super().list(request, *args, **kwargs).data)
+        else:
+            page = cache.responses.get_or_build(
+                ('group-posts', pk, request.query_params.get('limit', '')),
+                [cache.dep('group-posts', pk)],
+                lambda: {
+                    **super(GetPostAtGroupViewSet, self)
+                    .list(request, *args, **kwargs)
+                    .data,
+                    'pinned': self.get_pinned(pk),
+                },
+            )
+
+        post_ids = [
+            post['id'] for post in page['results'] + page.get('pinned', [])
+        ]
+        liked = set(
+            Post.likes.through.objects
+            .filter(user_id=request.user.pk, post_id__in=post_ids)
+            .values_list('post_id', flat=True)
+        )
+        data = {
+            **page,
+            'results': [
+                {**post, 'is_liked': post['id'] in liked}
+                for post in page['results']
+            ],
+        }
+        if 'pinned' in page:
+            data['pinned'] = [
+                {**post, 'is_liked': post['id'] in liked}
+                for post in page['pinned']
+            ]
+        return Response(data)
+
+
+class GroupPostPinView(GroupMembershipMixin, APIView):
+    """Allow the admins of a group pin and unpin its posts."""
+    permission_classes = [IsAuthenticated]
+
+    def get_post(self, group, post_id):
+        post = (
+            Post.objects.filter(pk=post_id, group=group.pk)
+            .only('id', 'group_id', 'pinned_at')
+            .first()
+        )
+        if post is None:
+            raise NotFound("Post not found.")
+        return post
 
-    def get(self, request, pk):
-        posts = Post.objects.filter(group=pk)
-        serializer = PostSerializer(posts, many=True)
+    def post(self, request, pk=None, post_id=None):
+        group = self.get_group()
+        self.check_admin(group)
+        post = self.get_post(group, post_id)
+        if post.pinned_at is None:
+            pinned = Post.objects.filter(
+                group=group.pk, pinned_at__isnull=False
+            ).count()
+            if pinned >= settings.GROUP_MAX_PINNED_POSTS:
+                return Response(
+                    {
+                        "detail": (
+                            "A group can have at most "
+                            f"{settings.GROUP_MAX_PINNED_POSTS} pinned posts."
+                        )
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            post.pinned_at = timezone.now()
+            post.save(update_fields=['pinned_at'])
+        return Response({"detail": "Post pinned."}, status=status.HTTP_200_OK)
 
-        return Response({'posts': serializer.data})
\ No newline at end of file
+    def delete(self, request, pk=None, post_id=None):
+        group = self.get_group()
+        self.check_admin(group)
+        post = self.get_post(group, post_id)
+        if post.pinned_at is not None:
+            post.pinned_at = None
+            post.save(update_fields=['pinned_at'])
+        return Response(
+            {"detail": "Post unpinned."}, status=status.HTTP_200_OK
+        )
@@ -1,37 +1,104 @@
+import asyncio
 import json
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
 from core.models import Notification
 from .serializers import NotificationSerializer
 from channels.db import database_sync_to_async
+from . import pipeline, presence
+
+HEARTBEAT_INTERVAL = getattr(settings, 'NOTIFICATION_HEARTBEAT_INTERVAL', 30)
+HEARTBEAT_TIMEOUT = getattr(settings, 'NOTIFICATION_HEARTBEAT_TIMEOUT', 75)
+SEND_QUEUE_SIZE = getattr(settings, 'NOTIFICATION_SEND_QUEUE_SIZE', 100)
 
 class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Notification socket with app-level ping/pong and a bounded send queue.
+
+    Events for a slow client are queued up to ``SEND_QUEUE_SIZE``; beyond
+    that the oldest event is dropped and the client receives one
+    ``{"type": "dropped", "count": n}`` message before the next event.
+    """
+
     async def connect(self):
         self.user = self.scope['user']
-        if self.user.is_authenticated:
-            await self.channel_layer.group_add(
-                f'notifications_{self.user.id}',
-                self.channel_name
-            )
-            await self.accept
-        else:
-            await self.close()
+        if not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group_name = pipeline.group_name(self.user.id)
+        self.queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.last_seen = asyncio.get_running_loop().time()
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.presence('connect')
+        self.tasks = [
+            asyncio.ensure_future(self.writer()),
+            asyncio.ensure_future(self.heartbeat()),
+        ]
 
     async def disconnect(self, close_code):
-        if self.user.is_authenticated:
-            await self.channel_layer.group_discard(
-                f'notifications_{self.user.id}',
-                self.channel_name
-            )
+        if not self.user.is_authenticated:
+            return
+        for task in getattr(self, 'tasks', []):
+            task.cancel()
+        await self.channel_layer.group_discard(
+            self.group_name, self.channel_name
+        )
+        await self.presence('disconnect')
 
-    async def receive(self, text_data):
-        pass
+    async def receive(self, text_data=None, bytes_data=None):
+        # Any frame proves the socket is alive, whoever sent the ping.
+        self.last_seen = asyncio.get_running_loop().time()
+        await self.presence('touch')
+        try:
+            message = json.loads(text_data or '{}')
+        except ValueError:
+            return
+        if message.get('type') == 'ping':
+            await self.send(text_data=json.dumps({'type': 'pong'}))
 
     async def send_notifications(self, event):
-        notification = event['notification']
-        await self.send(text_data=json.dumps(notification))
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event['notification'])
+
+    async def writer(self):
+        """Send queued events to the client one at a time."""
+        while True:
+            notification = await self.queue.get()
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                await self.send(
+                    text_data=json.dumps({'type': 'dropped', 'count': dropped})
+                )
+            await self.send(text_data=json.dumps(notification))
+
+    async def heartbeat(self):
+        """Ping the client and close the socket when it stops answering."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            if loop.time() - self.last_seen > HEARTBEAT_TIMEOUT:
+                await self.close(code=4408)
+                return
+            await self.send(text_data=json.dumps({'type': 'ping'}))
+
+    async def presence(self, action):
+        registry = presence.get_registry()
+        if registry is None:
+            return
+        method = getattr(registry, action)
+        if registry.blocking:
+            await sync_to_async(method, thread_sensitive=False)(self.user.id)
+        else:
+            method(self.user.id)
 
     @database_sync_to_async
     def get_notification_data(self, notification_id):
         notification = Notification.objects.get(id=notification_id)
 
-        return NotificationSerializer(notification).data
\ No newline at end of file
+        return NotificationSerializer(notification).data
@@ -0,0 +1,178 @@
+"""
+Unread counters, read marks and retention of the notification inbox.
+
+Each user stores the number of their unread notifications in
+``User.unread_notifications_count``. It is raised when the pipeline
+persists a batch (``created``), in the transaction that inserts it, and
+lowered by exactly the rows that ``mark_read`` flips or that ``prune`` and
+sender deletions remove, so concurrent changes never double count. The
+``reconcile_unread_counts`` command recomputes counters that drifted.
+
+The badge is served from the response cache under the ``unread`` version
+of the user, which every counter change bumps once it is committed.
+"""
+
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_delete
+
+from core import cache
+from core.models import Notification, User
+
+RETENTION_DAYS = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+PRUNE_CHUNK_SIZE = 5000
+ARCHIVE_FIELDS = (
+    'id',
+    'sender_id',
+    'recipient_id',
+    'message',
+    'kind',
+    'target_id',
+    'count',
+    'is_read',
+    'created_at',
+)
+
+
+def badge_deps(user_id):
+    return [cache.dep('unread', user_id)]
+
+
+def _adjust(counts, sign):
+    """Add sign * count to the unread counter of every user in counts."""
+    by_delta = {}
+    for user_id, count in counts.items():
+        if user_id is not None and count:
+            by_delta.setdefault(count, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        User.objects.filter(pk__in=user_ids).update(
+            unread_notifications_count=Greatest(
+                F('unread_notifications_count') + sign * delta, Value(0)
+            )
+        )
+    deps = [
+        dep
+        for user_ids in by_delta.values()
+        for user_id in user_ids
+        for dep in badge_deps(user_id)
+    ]
+    cache.responses.bump(*deps)
+
+
+def created(notifications):
+    """Count newly persisted unread notifications."""
+    _adjust(Counter(n.recipient_id for n in notifications if not n.is_read), 1)
+
+
+def unread_count(user_id):
+    """Return the stored number of unread notifications of the user."""
+    return (
+        User.objects.filter(pk=user_id)
+        .values_list('unread_notifications_count', flat=True)
+        .first()
+        or 0
+    )
+
+
+def mark_read(user_id, up_to=None):
+    """
+    Mark the user's notifications up to the id up_to, or all of them, as read.
+
+    The rows are flipped with one UPDATE. Returns how many were unread.
+    """
+    unread = Notification.objects.filter(recipient_id=user_id, is_read=False)
+    if up_to is not None:
+        unread = unread.filter(id__lte=up_to)
+    with transaction.atomic():
+        marked = unread.update(is_read=True)
+        if marked:
+            User.objects.filter(pk=user_id).update(
+                unread_notifications_count=Greatest(
+                    F('unread_notifications_count') - marked, Value(0)
+                )
+            )
+    if marked:
+        cache.responses.bump(*badge_deps(user_id))
+    return marked
+
+
+def _unread_by_recipient(notifications):
+    return dict(
+        notifications.filter(is_read=False)
+        .values('recipient_id')
+        .annotate(total=Count('*'))
+        .values_list('recipient_id', 'total')
+    )
+
+
+def prune(cutoff, chunk_size=PRUNE_CHUNK_SIZE, archive=None):
+    """
+    Delete the notifications created before cutoff, oldest first.
+
+    Rows are read by primary key in chunks and every chunk is deleted in a
+    short transaction of its own, so no lock is held for long. Ids grow
+    with ``created_at``, so the scan stops at the first chunk that reaches
+    a newer notification. With archive, a text file, every row is written
+    to it as one JSON line before it is deleted. Returns the number of
+    deleted notifications.
+    """
+    deleted = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Notification.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'created_at')[:chunk_size]
+        )
+        ids = [pk for pk, created_at in rows if created_at < cutoff]
+        if ids:
+            with transaction.atomic():
+                # Locking the rows keeps a concurrent mark_read from
+                # lowering the counters for them as well.
+                chunk = list(
+                    Notification.objects.filter(pk__in=ids)
+                    .select_for_update()
+                    .order_by('pk')
+                    .values(*ARCHIVE_FIELDS)
+                )
+                if archive is not None:
+                    archive.writelines(
+                        json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+                        for row in chunk
+                    )
+                Notification.objects.filter(pk__in=ids).delete()
+                _adjust(
+                    Counter(
+                        row['recipient_id']
+                        for row in chunk
+                        if not row['is_read']
+                    ),
+                    -1,
+                )
+            deleted += len(chunk)
+        if len(ids) < chunk_size:
+            return deleted
+        last_pk = rows[-1][0]
+
+
+def _user_deleted(sender, instance, **kwargs):
+    # The notifications the user sent are deleted with them.
+    _adjust(
+        _unread_by_recipient(
+            Notification.objects.filter(sender_id=instance.pk)
+        ),
+        -1,
+    )
+
+
+def connect_signals():
+    """Keep the unread counters in step when senders are deleted."""
+    pre_delete.connect(
+        _user_deleted, sender=User, dispatch_uid='inbox_user_deleted'
+    )
@@ -0,0 +1,57 @@
+"""
+WebSocket authentication from a JWT passed in the query string.
+"""
+
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+
+
+@sync_to_async(thread_sensitive=False)
+def get_user(user_id):
+    close_old_connections()
+    try:
+        return User.objects.get(pk=user_id, is_active=True)
+    except User.DoesNotExist:
+        return AnonymousUser()
+    finally:
+        close_old_connections()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Set scope['user'] from a ``?token=<access token>`` query parameter.
+
+    Connections without a token are passed to ``fallback`` (for example the
+    session-based AuthMiddlewareStack) so token clients skip the session
+    lookup entirely.
+    """
+
+    def __init__(self, inner, fallback=None):
+        super().__init__(inner)
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        if not token and self.fallback is not None:
+            return await self.fallback(scope, receive, send)
+
+        scope = dict(scope)
+        scope['user'] = AnonymousUser()
+        if token:
+            try:
+                access = AccessToken(token[0])
+                user = await get_user(access['user_id'])
+                if access.get('tv', 0) == getattr(user, 'token_version', None):
+                    scope['user'] = user
+            except (TokenError, KeyError):
+                pass
+
+        return await super().__call__(scope, receive, send)
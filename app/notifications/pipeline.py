@@ -0,0 +1,167 @@
+"""
+Durable notification delivery.
+
+``notify`` queues a ``persist_notifications`` job per batch of up to
+``NOTIFICATION_BATCH_SIZE`` recipients and returns. The job is stored by
+the job queue before the caller answers, so a crash or a recycled process
+loses nothing. The job persists the batch with ``bulk_create`` and queues
+its delivery to the channel groups of the recipients.
+
+Notifications with a ``kind`` and ``target_id`` are coalesced per
+recipient: an unread notification for the same target that is younger
+than ``NOTIFICATION_COALESCE_WINDOW`` seconds is updated instead of adding
+a new one, so a burst of likes becomes one "N people liked your post"
+notification.
+"""
+
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.jobs import enqueue
+from core.models import Notification
+
+from . import inbox
+
+BATCH_SIZE = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 500)
+COALESCE_WINDOW = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 5.0)
+
+
+def group_name(user_id):
+    """Return the channel group of the user's sockets."""
+    return f'notifications_{user_id}'
+
+
+def _message(message, group_message, count):
+    if count > 1 and group_message:
+        return group_message.replace('{count}', str(count))
+    return message
+
+
+def store(
+    recipient_ids,
+    message,
+    sender_id=None,
+    kind='',
+    target_id=None,
+    group_message='',
+):
+    """
+    Persist a notification for every recipient and return the stored rows.
+
+    Recipients with a recent unread notification of the same ``kind`` and
+    ``target_id`` get that notification updated instead.
+    """
+    with transaction.atomic():
+        merged = []
+        if kind and target_id is not None:
+            since = timezone.now() - timedelta(seconds=COALESCE_WINDOW)
+            merged = list(
+                Notification.objects.select_for_update().filter(
+                    recipient_id__in=recipient_ids,
+                    kind=kind,
+                    target_id=target_id,
+                    is_read=False,
+                    created_at__gte=since,
+                )
+            )
+            for notification in merged:
+                notification.count += 1
+                notification.sender_id = sender_id
+                notification.message = _message(
+                    message, group_message, notification.count
+                )
+            Notification.objects.bulk_update(
+                merged, ['count', 'sender', 'message']
+            )
+
+        merged_ids = {notification.recipient_id for notification in merged}
+        created = [
+            Notification(
+                sender_id=sender_id,
+                recipient_id=recipient_id,
+                message=message,
+                kind=kind,
+                target_id=target_id,
+            )
+            for recipient_id in recipient_ids
+            if recipient_id not in merged_ids
+        ]
+        Notification.objects.bulk_create(created)
+        # Counted in the insert's transaction: the rows and the counter
+        # commit together, and mark_read cannot see the rows any earlier.
+        inbox.created(created)
+    return merged + created
+
+
+def deliver(notifications):
+    """Send serialized notifications to the sockets of their recipients."""
+    from . import presence
+
+    online = presence.online(
+        {notification['recipient'] for notification in notifications}
+    )
+    events = [
+        (group_name(notification['recipient']), {
+            'type': 'send_notifications',
+            'notification': notification,
+        })
+        for notification in notifications
+        if notification['recipient'] in online
+    ]
+    publish(events)
+
+
+def publish(events):
+    """Send (group, event) pairs through the channel layer in batches."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not events:
+        return
+
+    async def send_batches():
+        for start in range(0, len(events), BATCH_SIZE):
+            await asyncio.gather(*(
+                channel_layer.group_send(group, event)
+                for group, event in events[start:start + BATCH_SIZE]
+            ))
+
+    async_to_sync(send_batches)()
+
+
+def notify(
+    recipient_ids,
+    message,
+    sender=None,
+    kind='',
+    target_id=None,
+    group_message='',
+):
+    """
+    Queue a notification for every recipient and return immediately.
+
+    ``group_message`` is used when several notifications with the same
+    ``kind`` and ``target_id`` are coalesced; ``{count}`` is replaced with
+    the number of coalesced notifications.
+    """
+    sender_id = getattr(sender, 'pk', sender)
+    recipient_ids = [
+        recipient_id
+        for recipient_id in recipient_ids
+        if recipient_id != sender_id
+    ]
+    for start in range(0, len(recipient_ids), BATCH_SIZE):
+        enqueue(
+            'notifications.tasks.persist_notifications',
+            args=[recipient_ids[start:start + BATCH_SIZE], message],
+            kwargs={
+                'sender_id': sender_id,
+                'kind': kind,
+                'target_id': target_id,
+                'group_message': group_message,
+            },
+        )
@@ -0,0 +1,119 @@
+"""
+Registry of users with open notification sockets.
+
+Senders use it to skip ``group_send`` for users that have no socket open.
+``LocalPresence`` only sees sockets of the current process, so it suits
+deployments where one process serves both HTTP and WebSockets.
+``CachePresence`` stores connection counters in the Django cache and is
+shared by every process when the cache is Redis.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+TTL = getattr(settings, 'NOTIFICATION_PRESENCE_TTL', 120)
+
+
+class LocalPresence:
+    """In-memory connection counters for a single process."""
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def connect(self, user_id):
+        with self._lock:
+            count, _ = self._connections.get(user_id, (0, 0))
+            self._connections[user_id] = (count + 1, time.monotonic())
+
+    def disconnect(self, user_id):
+        with self._lock:
+            count, seen = self._connections.get(user_id, (0, 0))
+            if count <= 1:
+                self._connections.pop(user_id, None)
+            else:
+                self._connections[user_id] = (count - 1, seen)
+
+    def touch(self, user_id):
+        with self._lock:
+            if user_id in self._connections:
+                count, _ = self._connections[user_id]
+                self._connections[user_id] = (count, time.monotonic())
+
+    def online(self, user_ids):
+        """Return the subset of user_ids with an open socket."""
+        deadline = time.monotonic() - TTL
+        with self._lock:
+            return {
+                user_id for user_id in user_ids
+                if self._connections.get(user_id, (0, 0))[1] >= deadline
+            }
+
+
+class CachePresence:
+    """Connection counters in the shared cache, expiring without heartbeats."""
+    blocking = True
+
+    def __init__(self):
+        self.cache = caches[
+            getattr(settings, 'NOTIFICATION_PRESENCE_CACHE', 'default')
+        ]
+
+    def _key(self, user_id):
+        return f'presence:{user_id}'
+
+    def connect(self, user_id):
+        key = self._key(user_id)
+        if not self.cache.add(key, 1, TTL):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, 1, TTL)
+        self.cache.touch(key, TTL)
+
+    def disconnect(self, user_id):
+        key = self._key(user_id)
+        try:
+            if self.cache.decr(key) <= 0:
+                self.cache.delete(key)
+        except ValueError:
+            pass
+
+    def touch(self, user_id):
+        self.cache.touch(self._key(user_id), TTL)
+
+    def online(self, user_ids):
+        """Return the subset of user_ids with an open socket."""
+        keys = {self._key(user_id): user_id for user_id in user_ids}
+        return {
+            keys[key]
+            for key, count in self.cache.get_many(list(keys)).items()
+            if count
+        }
+
+
+_registry = None
+_loaded = False
+
+
+def get_registry():
+    """Return the configured presence registry, or None when disabled."""
+    global _registry, _loaded
+    if not _loaded:
+        path = getattr(settings, 'NOTIFICATION_PRESENCE_BACKEND', None)
+        _registry = import_string(path)() if path else None
+        _loaded = True
+    return _registry
+
+
+def online(user_ids):
+    """Return the users that should receive real-time events."""
+    registry = get_registry()
+    if registry is None:
+        return set(user_ids)
+    return registry.online(user_ids)
@@ -4,4 +4,35 @@ from rest_framework import serializers
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['id', 'sender', 'recipient', 'message', 'is_read', 'created_at']
\ No newline at end of file
+        fields = [
+            'id',
+            'sender',
+            'recipient',
+            'message',
+            'kind',
+            'target_id',
+            'count',
+            'is_read',
+            'created_at',
+        ]
+
+
+class NotificationRequestSerializer(serializers.Serializer):
+    """Serializer for queueing a notification to many recipients."""
+    recipients = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+    group = serializers.IntegerField(required=False)
+    message = serializers.CharField()
+    kind = serializers.CharField(max_length=32, required=False, default='')
+    target_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if not attrs['recipients'] and 'group' not in attrs:
+            raise serializers.ValidationError('Provide recipients or a group.')
+        return attrs
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Serializer for marking the notifications up to an id as read."""
+    up_to = serializers.IntegerField(min_value=1, required=False)
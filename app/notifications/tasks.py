@@ -0,0 +1,61 @@
+"""
+Background jobs for notifications.
+"""
+
+from core.jobs import job
+from core.models import User
+from . import pipeline
+from .serializers import NotificationSerializer
+
+
+@job(queue='notifications')
+def persist_notifications(
+    recipient_ids,
+    message,
+    sender_id=None,
+    kind='',
+    target_id=None,
+    group_message='',
+):
+    """Persist a batch of notifications and queue their delivery."""
+    notifications = pipeline.store(
+        recipient_ids,
+        message,
+        sender_id=sender_id,
+        kind=kind,
+        target_id=target_id,
+        group_message=group_message,
+    )
+    if notifications:
+        deliver_notifications.delay(
+            NotificationSerializer(notifications, many=True).data
+        )
+
+
+@job(queue='notifications')
+def deliver_notifications(notifications):
+    """Send persisted notifications to the sockets of their recipients."""
+    pipeline.deliver(notifications)
+
+
+@job(queue='notifications')
+def notify_group_members(
+    group_id,
+    message,
+    sender_id=None,
+    kind='',
+    target_id=None,
+    group_message='',
+):
+    """Queue a notification for every active member of a group."""
+    member_ids = User.objects.filter(
+        member_groups=group_id, is_active=True
+    ).values_list('id', flat=True)
+    pipeline.notify(
+        list(member_ids),
+        message,
+        sender=sender_id,
+        kind=kind,
+        target_id=target_id,
+        group_message=group_message,
+    )
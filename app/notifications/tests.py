@@ -1,3 +1,186 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from channels.testing import WebsocketCommunicator
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import follows
+from core.models import Group, Job, Membership, Notification, User
+from . import inbox, pipeline, presence, tasks
+from .consumers import NotificationConsumer
+
+
+class PipelineTests(TestCase):
+    """Notifications are queued as jobs and coalesced when persisted."""
+
+    def setUp(self):
+        self.sender, self.recipient = (
+            User.objects.create_user(
+                f'{name}@example.com', 'pw', first_name='A', last_name='B'
+            )
+            for name in ('sender', 'recipient')
+        )
+
+    def test_notify_queues_a_job(self):
+        pipeline.notify(
+            [self.sender.pk, self.recipient.pk], 'hello', sender=self.sender
+        )
+
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'notifications.tasks.persist_notifications')
+        self.assertEqual(job.args, [[self.recipient.pk], 'hello'])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_persist_coalesces_and_queues_delivery(self):
+        for _ in range(3):
+            tasks.persist_notifications(
+                [self.recipient.pk],
+                'A liked your post.',
+                sender_id=self.sender.pk,
+                kind='like',
+                target_id=7,
+                group_message='{count} people liked your post.',
+            )
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.count, 3)
+        self.assertEqual(notification.message, '3 people liked your post.')
+        self.assertEqual(
+            Job.objects.filter(
+                name='notifications.tasks.deliver_notifications'
+            ).count(),
+            3,
+        )
+
+
+class InboxTests(TestCase):
+    """The unread counter moves with the rows it counts."""
+
+    def setUp(self):
+        self.recipient = User.objects.create_user(
+            'recipient@example.com', 'pw', first_name='A', last_name='B'
+        )
+
+    def store(self):
+        return pipeline.store([self.recipient.pk], 'hello')
+
+    def test_counter_commits_with_the_insert(self):
+        with mock.patch.object(inbox, 'created', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.store()
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(inbox.unread_count(self.recipient.pk), 0)
+
+        self.store()
+        self.store()
+        self.assertEqual(inbox.unread_count(self.recipient.pk), 2)
+
+    def test_mark_read_lowers_the_counter_by_the_flipped_rows(self):
+        self.store()
+        self.store()
+
+        self.assertEqual(inbox.mark_read(self.recipient.pk), 2)
+        self.assertEqual(inbox.mark_read(self.recipient.pk), 0)
+        self.assertEqual(inbox.unread_count(self.recipient.pk), 0)
+
+    def test_reconcile_repairs_drifted_counters(self):
+        self.store()
+        User.objects.filter(pk=self.recipient.pk).update(
+            unread_notifications_count=5
+        )
+
+        call_command('reconcile_unread_counts', stdout=io.StringIO())
+
+        self.assertEqual(inbox.unread_count(self.recipient.pk), 1)
+
+
+class CreateNotificationViewTests(TestCase):
+    """Only group admins and related users can be notified through the API."""
+
+    def setUp(self):
+        self.sender, self.follower, self.stranger = (
+            User.objects.create_user(
+                f'{name}@example.com', 'pw', first_name='A', last_name='B'
+            )
+            for name in ('sender', 'follower', 'stranger')
+        )
+        follows.follow(self.follower, [self.sender.pk], notify=False)
+        self.group = Group.objects.create(name='group', creator=self.sender)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.sender)}'
+        )
+        self.path = '/api/notifications/notifications/create/'
+
+    def queued_recipients(self):
+        return [
+            recipient_id
+            for job in Job.objects.filter(
+                name='notifications.tasks.persist_notifications'
+            )
+            for recipient_id in job.args[0]
+        ]
+
+    def test_direct_send_skips_unrelated_users(self):
+        response = self.client.post(
+            self.path,
+            {
+                'recipients': [self.follower.pk, self.stranger.pk],
+                'message': 'hello',
+            },
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.queued_recipients(), [self.follower.pk])
+
+    def test_group_send_requires_an_admin(self):
+        data = {'group': self.group.pk, 'message': 'hello'}
+        Membership.objects.create(group=self.group, user=self.sender)
+
+        response = self.client.post(self.path, data, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        Membership.objects.filter(group=self.group).update(
+            role=Membership.ADMIN
+        )
+        response = self.client.post(self.path, data, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(
+            Job.objects.filter(
+                name='notifications.tasks.notify_group_members'
+            ).exists()
+        )
+
+
+@override_settings(CHANNEL_LAYERS={
+    'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+})
+class NotificationConsumerTests(SimpleTestCase):
+    """Every frame from the client keeps its presence alive."""
+
+    async def test_any_frame_touches_presence(self):
+        registry = presence.LocalPresence()
+        communicator = WebsocketCommunicator(
+            NotificationConsumer.as_asgi(), '/ws/notifications/'
+        )
+        communicator.scope['user'] = User(pk=1)
+        get_registry = mock.patch.object(
+            presence, 'get_registry', return_value=registry
+        )
+        with get_registry, mock.patch.object(registry, 'touch') as touch:
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await communicator.send_json_to({'type': 'ping'})
+            self.assertEqual(
+                await communicator.receive_json_from(), {'type': 'pong'}
+            )
+            await communicator.send_to(text_data='not json')
+            await communicator.disconnect()
+
+        self.assertEqual(touch.call_count, 2)
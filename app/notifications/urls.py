@@ -1,7 +1,36 @@
 from django.urls import path
-from .views import NotificationListView, CreateNotificationView
+from core.asyncviews import async_view
+from .views import (
+    CreateNotificationView,
+    MarkReadView,
+    NotificationListView,
+    UnreadBadgeView,
+)
 
 urlpatterns = [
-    path('notifications/', NotificationListView.as_view(), name='notifications-list'),
-    path('notifications/create/', CreateNotificationView.as_view(), name='create-notification'),
+    path(
+        'notifications/',
+        NotificationListView.as_view(),
+        name='notifications-list',
+    ),
+    path(
+        'notifications/create/',
+        CreateNotificationView.as_view(),
+        name='create-notification',
+    ),
+    path(
+        'notifications/unread/',
+        UnreadBadgeView.as_view(),
+        name='notifications-unread',
+    ),
+    path(
+        'notifications/read/',
+        MarkReadView.as_view(),
+        name='notifications-read',
+    ),
+    path(
+        'notifications/async/',
+        async_view(NotificationListView),
+        name='notifications-list-async',
+    ),
 ]
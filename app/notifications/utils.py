@@ -1,17 +1,18 @@
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from . import pipeline, presence
 
-def send_real_time_notification(user_id, notification_type, message):
-    channel_layer = get_channel_layer()
-    group_name = f'notifications_{user_id}'
 
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
-            'type': 'send_notification',
-            'message': {
+def send_real_time_notification(user_ids, notification_type, message):
+    """Push a message to the open sockets of the users, not persisting it."""
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
+
+    pipeline.publish([
+        (pipeline.group_name(user_id), {
+            'type': 'send_notifications',
+            'notification': {
                 'type': notification_type,
                 'message': message,
             }
-        }
-    )
\ No newline at end of file
+        })
+        for user_id in presence.online(set(user_ids))
+    ])
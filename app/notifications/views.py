@@ -1,29 +1,115 @@
-from rest_framework import generics
+from django.db.models import Q
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
-from core.models import Notification
-from .serializers import NotificationSerializer
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from rest_framework.response import Response
+from core import cache
+from core.db import ReplicaReadMixin
+from core.models import Notification, User
+from core.pagination import NotificationCursorPagination
+from groups import membership
+from .serializers import (
+    MarkReadSerializer,
+    NotificationSerializer,
+    NotificationRequestSerializer,
+)
+from . import inbox, pipeline
+from .tasks import notify_group_members
 
-class NotificationListView(generics.ListAPIView):
+
+class NotificationListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationCursorPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
-    
-class CreateNotificationView(generics.CreateAPIView):
-    serializer_class = NotificationSerializer
+        return Notification.objects.filter(recipient=self.request.user)
+
+
+class UnreadBadgeView(generics.GenericAPIView):
+    """Number of unread notifications of the authenticated user."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user_id = request.user.pk
+        deps = inbox.badge_deps(user_id)
+        not_modified, headers = cache.conditional(
+            request, ('unread', user_id), deps
+        )
+        if not_modified is not None:
+            return not_modified
+
+        data = cache.responses.get_or_build(
+            ('unread', user_id),
+            deps,
+            lambda: {'unread': inbox.unread_count(user_id)},
+        )
+        return Response(data, headers=headers)
+
+
+class MarkReadView(generics.GenericAPIView):
+    """Mark the notifications up to an id, or all of them, as read."""
+    serializer_class = MarkReadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marked = inbox.mark_read(
+            request.user.pk, serializer.validated_data.get('up_to')
+        )
+        return Response(
+            {'marked': marked, 'unread': inbox.unread_count(request.user.pk)}
+        )
+
+
+class CreateNotificationView(generics.GenericAPIView):
+    """
+    Queue a notification for related users or every member of a group.
+
+    Group sends are reserved to the admins of the group, and direct sends
+    reach only the users who follow the sender or whom the sender follows.
+    """
+    serializer_class = NotificationRequestSerializer
     permission_classes = [IsAuthenticated]
 
-    def perform_create(self, serializer):
-        notification = serializer.save(sender=self.request.user)
-
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'notifications_{notification.post.id}',
-            {
-                'type': 'send_notification',
-                'notification': NotificationSerializer(notification).data,
-            }
-        )
\ No newline at end of file
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'group' in data:
+            if not membership.is_admin(data['group'], request.user.pk):
+                self.permission_denied(
+                    request, message="You must be admin in this group."
+                )
+            notify_group_members.delay(
+                data['group'],
+                data['message'],
+                sender_id=request.user.pk,
+                kind=data['kind'],
+                target_id=data.get('target_id'),
+            )
+            return Response(
+                {"detail": "Queued notifications for the group."},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        # Only users who follow the sender or are followed by them can be
+        # notified directly.
+        recipient_ids = list(
+            User.objects.filter(is_active=True, id__in=data['recipients'])
+            .filter(Q(follows=request.user.pk) | Q(followers=request.user.pk))
+            .values_list('id', flat=True)
+            .distinct()
+        )
+        pipeline.notify(
+            recipient_ids,
+            data['message'],
+            sender=request.user,
+            kind=data['kind'],
+            target_id=data.get('target_id'),
+        )
+        return Response(
+            {"detail": f"Queued {len(recipient_ids)} notifications."},
+            status=status.HTTP_202_ACCEPTED,
+        )
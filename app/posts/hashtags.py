@@ -0,0 +1,57 @@
+"""
+Per-hashtag post timelines.
+
+``HashtagTimeline`` mirrors the post/hashtag links together with the post
+date, so listing a hashtag's posts newest first is a range scan of the
+``(hashtag, -posted, -post)`` index instead of a join through the
+``Post.hashtags`` table sorted by date. Rows follow the links through
+``m2m_changed``; deleting a post or hashtag cascades to them.
+"""
+
+from django.db.models.signals import m2m_changed
+
+from core.models import HashtagTimeline, Post
+
+
+def add(post_ids, hashtag_ids):
+    """Insert the timeline rows of every post/hashtag pair."""
+    posted = dict(
+        Post.objects.filter(pk__in=post_ids).values_list('pk', 'posted')
+    )
+    HashtagTimeline.objects.bulk_create(
+        [
+            HashtagTimeline(
+                hashtag_id=hashtag_id, post_id=post_id, posted=posted[post_id]
+            )
+            for post_id in post_ids
+            if post_id in posted
+            for hashtag_id in hashtag_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _hashtags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        post_ids, hashtag_ids = list(pk_set or ()), [instance.pk]
+    else:
+        post_ids, hashtag_ids = [instance.pk], list(pk_set or ())
+
+    if action == 'post_add' and pk_set:
+        add(post_ids, hashtag_ids)
+    elif action == 'post_remove' and pk_set:
+        HashtagTimeline.objects.filter(
+            post_id__in=post_ids, hashtag_id__in=hashtag_ids
+        ).delete()
+    elif action == 'post_clear':
+        field = 'hashtag_id' if reverse else 'post_id'
+        HashtagTimeline.objects.filter(**{field: instance.pk}).delete()
+
+
+def connect_signals():
+    """Keep hashtag timelines in step with the post/hashtag links."""
+    m2m_changed.connect(
+        _hashtags_changed,
+        sender=Post.hashtags.through,
+        dispatch_uid='hashtag_timeline_links',
+    )
@@ -1,59 +1,137 @@
 # Serializers for posts with API VIEW
 
+from django.db import models
 from rest_framework import serializers
 from django.utils.translation import gettext as _
 
+from core import images
 from core.models import Hashtag, Post
+from core.tasks import schedule_variants
+from . import tasks, trending
+from notifications.tasks import notify_group_members
 
 class HashTagSerializer(serializers.ModelSerializer):
     """Serializer for hashtags."""
+    # Declared explicitly so existing names are accepted when posting.
+    name = serializers.CharField(max_length=50)
 
     class Meta:
         model = Hashtag 
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+    def validate_name(self, value):
+        name = Hashtag.normalize(value)
+        if not name:
+            raise serializers.ValidationError(_('Enter a hashtag.'))
+        return name
+
+
+class PostListSerializer(serializers.ListSerializer):
+    """List serializer that resolves is_liked for a whole page at once."""
+
+    def to_representation(self, data):
+        posts = list(data.all() if isinstance(data, models.Manager) else data)
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            self.context['liked_post_ids'] = set(
+                Post.likes.through.objects.filter(
+                    user_id=request.user.pk,
+                    post_id__in=[post.pk for post in posts],
+                ).values_list('post_id', flat=True)
+            )
+
+        return super().to_representation(posts)
+
 class PostSerializer(serializers.ModelSerializer):
     """Serializer for posts."""
     hashtags = HashTagSerializer(many=True, required=False)
-    like_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'group', 'author', 'content', 
-                  'posted', 'updated', 'likes', 'like_count', 
-                  'is_liked', 'hashtags', 'image']
-        read_only_fields = ['id', 'author']
+        fields = [
+            'id',
+            'group',
+            'author',
+            'content',
+            'posted',
+            'updated',
+            'like_count',
+            'is_liked',
+            'hashtags',
+            'image',
+            'image_variants',
+            'pinned_at',
+        ]
+        read_only_fields = ['id', 'author', 'like_count', 'pinned_at']
+        list_serializer_class = PostListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Prefetch the relations rendered by this serializer."""
+        return queryset.for_serializer()
 
-    def get_like_count(self, obj):
-        return len(obj.likes.all())
-    
     def get_is_liked(self, obj):
-        user = self.context['request'].user
-        return True if user in obj.likes.all() else False
+        liked_post_ids = self.context.get('liked_post_ids')
+        if liked_post_ids is not None:
+            return obj.pk in liked_post_ids
+
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return obj.likes.filter(pk=request.user.pk).exists()
+
+    def get_image_variants(self, obj):
+        return images.srcset(obj.image)
+
+    def validate_image(self, value):
+        return images.prepare_upload(value) if value else value
 
     def create(self, validated_data):
         """Create and return post with all hashtags created."""
         hashtags = validated_data.pop('hashtags', [])
         post = Post.objects.create(**validated_data)
         self._get_or_create_hashtags(hashtags, post)
+        schedule_variants(post.image)
+        tasks.fan_out_post.delay(post.id)
+        if post.group_id is not None:
+            notify_group_members.delay(
+                post.group_id,
+                f'New post in {post.group.name}.',
+                sender_id=post.author_id,
+                kind='group_post',
+                target_id=post.group_id,
+                group_message=f'{{count}} new posts in {post.group.name}.',
+            )
+
+        return post
+
+    def update(self, instance, validated_data):
+        """Update a post and queue variants for a new image."""
+        post = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            schedule_variants(post.image)
 
         return post
     
     def _get_or_create_hashtags(self, hashtags_data, post):
-        """Helper method to create or get technologies and assign them to the project."""
-        for hashtag in hashtags_data:
-            name = hashtag.get('name')
-            obj, created = Hashtag.objects.get_or_create(
-                name=name,
-                user=post.author
-            )
-            post.hashtags.add(obj)
+        """Link the post to its hashtags, creating the missing ones in bulk."""
+        names = {hashtag['name'] for hashtag in hashtags_data}
+        if not names:
+            return
+        Hashtag.objects.bulk_create(
+            [Hashtag(name=name, user=post.author) for name in names],
+            ignore_conflicts=True,
+        )
+        hashtags = list(Hashtag.objects.filter(name__in=names))
+        post.hashtags.add(*hashtags)
+        trending.record([hashtag.id for hashtag in hashtags])
 
 
 class PostImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading image to post."""
 
     class Meta(PostSerializer.Meta):
-        fields = PostSerializer.Meta.fields + ['image']
\ No newline at end of file
+        fields = PostSerializer.Meta.fields + ['image']
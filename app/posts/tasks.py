@@ -0,0 +1,40 @@
+"""
+Background jobs for posts.
+"""
+
+from core.jobs import job
+from core.models import Post
+from . import timeline
+
+
+@job(queue='timeline')
+def fan_out_post(post_id):
+    """Push a new post into the timelines of the author's followers."""
+    post = Post.objects.filter(pk=post_id).only('id', 'author_id').first()
+    if post is not None:
+        timeline.fan_out_post(post)
+
+
+@job(queue='timeline')
+def backfill_timeline(follower_id, followee_id):
+    """Copy the latest posts of a followed user into the follower timeline."""
+    timeline.backfill(follower_id, followee_id)
+
+
+@job(queue='timeline')
+def backfill_timeline_many(follower_id, followee_ids):
+    """Copy the latest posts of newly followed users into the timeline."""
+    for followee_id in followee_ids:
+        timeline.backfill(follower_id, followee_id)
+
+
+@job(queue='timeline')
+def remove_authors_from_timeline(follower_id, followee_ids):
+    """Drop the posts of unfollowed users from the follower timeline."""
+    timeline.remove_authors(follower_id, followee_ids)
+
+
+@job(queue='timeline')
+def remove_author_from_timeline(follower_id, followee_id):
+    """Drop the posts of an unfollowed user from the follower timeline."""
+    timeline.remove_author(follower_id, followee_id)
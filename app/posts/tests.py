@@ -0,0 +1,198 @@
+from unittest import mock
+
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import follows
+from accounts.authentication import states
+from core import cache
+from core.models import Group, Hashtag, Membership, Post, User
+from notifications import pipeline
+from posts import timeline
+
+SIZES = (1, 10, 100)
+LIKERS = 20
+
+
+class PostListQueryCountTests(TestCase):
+    """Post lists run a fixed number of queries, whatever the page size."""
+
+    def setUp(self):
+        cache.responses.flush()
+        self.reader = User.objects.create_user(
+            'reader@example.com', 'pw', first_name='R', last_name='R'
+        )
+        self.hashtags = [
+            Hashtag.objects.create(name=f'tag{index}') for index in range(2)
+        ]
+        self.likers = [self.reader] + [
+            User.objects.create_user(
+                f'liker{index}@example.com',
+                'pw',
+                first_name='L',
+                last_name='L',
+            )
+            for index in range(LIKERS - 1)
+        ]
+
+    def make_author(self, size):
+        return User.objects.create_user(
+            f'author{size}@example.com', 'pw', first_name='A', last_name='B'
+        )
+
+    def make_posts(self, author, size, group=None):
+        for index in range(size):
+            post = Post.objects.create(
+                author=author, group=group, content=f'post {index}'
+            )
+            post.hashtags.add(*self.hashtags)
+            post.likes.add(*self.likers)
+
+    def client_for(self, user):
+        # Load the user's authentication state up front, so only the
+        # queries of the list are counted.
+        states.discard([user.pk])
+        states.get(user.pk)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        return client
+
+    def test_own_posts(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                author = self.make_author(size)
+                self.make_posts(author, size)
+                client = self.client_for(author)
+                with self.assertNumQueries(3):
+                    response = client.get('/api/posts/', {'limit': 100})
+                self.assertEqual(len(response.data['results']), size)
+
+    def test_feed(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                author = self.make_author(size)
+                self.make_posts(author, size)
+                client = self.client_for(author)
+                with self.assertNumQueries(3):
+                    response = client.get('/api/posts/feed/', {'limit': 100})
+                self.assertEqual(len(response.data['results']), size)
+
+    def test_group_posts(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                author = self.make_author(size)
+                group = Group.objects.create(
+                    name=f'group {size}', creator=author
+                )
+                Membership.objects.create(
+                    group=group, user=author, role=Membership.ADMIN
+                )
+                self.make_posts(author, size, group=group)
+                client = self.client_for(author)
+                with self.assertNumQueries(6):
+                    response = client.get(
+                        f'/api/groups/{group.pk}/posts/', {'limit': 100}
+                    )
+                self.assertEqual(len(response.data['results']), size)
+
+
+class LikeTests(TestCase):
+    """Liking a post with the JWT updates like_count and is_liked."""
+
+    def setUp(self):
+        cache.responses.flush()
+        self.user = User.objects.create_user(
+            'reader@example.com', 'pw', first_name='R', last_name='R'
+        )
+        self.post = Post.objects.create(author=self.user, content='hello')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def test_like_and_unlike(self):
+        path = f'/api/posts/{self.post.pk}/like/'
+        with mock.patch.object(pipeline, 'notify') as notify:
+            self.assertEqual(self.client.post(path).status_code, 200)
+        notify.assert_called_once()
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response.data['results'][0]['like_count'], 1)
+        self.assertTrue(response.data['results'][0]['is_liked'])
+        self.assertNotIn('likes', response.data['results'][0])
+
+        self.assertEqual(self.client.post(path).status_code, 200)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+
+class FeedTests(TestCase):
+    """The feed merges in the posts of authors above the fan-out limit."""
+
+    def setUp(self):
+        cache.responses.flush()
+        self.users = [
+            User.objects.create_user(
+                f'user{index}@example.com', 'pw', first_name='U', last_name='U'
+            )
+            for index in range(4)
+        ]
+        self.reader, self.author = self.users[:2]
+        for user in (self.reader, *self.users[2:]):
+            follows.follow(user, [self.author.pk], notify=False)
+
+    def feed(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.reader)}'
+        )
+        response = client.get('/api/posts/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [post['content'] for post in response.data['results']]
+
+    def test_author_above_the_limit_is_pulled_on_read(self):
+        Post.objects.create(author=self.author, content='pulled')
+        with mock.patch.object(timeline, 'FANOUT_LIMIT', 2):
+            self.assertEqual(self.feed(), ['pulled'])
+
+    def test_author_within_the_limit_is_not_pulled(self):
+        Post.objects.create(author=self.author, content='not pushed')
+        with mock.patch.object(timeline, 'FANOUT_LIMIT', 3):
+            self.assertEqual(self.feed(), [])
+
+
+class AsyncPostViewTests(TransactionTestCase):
+    """The sync post view and its async variant authenticate the same way."""
+
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        cache.responses.flush()
+        self.user = User.objects.create_user(
+            'reader@example.com', 'pw', first_name='R', last_name='R'
+        )
+        self.post = Post.objects.create(author=self.user, content='hello')
+        self.paths = [
+            f'/api/posts/post/{self.post.pk}/',
+            f'/api/posts/async/post/{self.post.pk}/',
+        ]
+
+    async def test_bearer_token(self):
+        client = AsyncClient()
+        token = AccessToken.for_user(self.user)
+        for path in self.paths:
+            with self.subTest(path=path):
+                response = await client.get(
+                    path, authorization=f'Bearer {token}'
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['content'], 'hello')
+
+    async def test_anonymous(self):
+        client = AsyncClient()
+        for path in self.paths:
+            with self.subTest(path=path):
+                response = await client.get(path)
+                self.assertEqual(response.status_code, 401)
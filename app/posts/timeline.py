@@ -0,0 +1,95 @@
+"""
+Home timeline built from the posts of followed users.
+
+Posts are pushed into per-follower timelines (fan-out-on-write) when they
+are created. Authors with more followers than ``TIMELINE_FANOUT_LIMIT`` are
+skipped on write and merged in when the feed is read instead. Both sides
+decide with the stored ``User.followers_count``, so they always agree.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+
+from core.models import Post, TimelineEntry, User
+
+FANOUT_LIMIT = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 5000)
+BACKFILL_SIZE = getattr(settings, 'TIMELINE_BACKFILL_SIZE', 50)
+BATCH_SIZE = 1000
+
+
+def is_fanout_author(user_id):
+    """Return True when posts of the user are pushed on write."""
+    followers = (
+        User.objects.filter(pk=user_id)
+        .values_list('followers_count', flat=True)
+        .first()
+    )
+    return (followers or 0) <= FANOUT_LIMIT
+
+
+def fan_out_post(post):
+    """Push the post into the timeline of every follower of its author."""
+    if not is_fanout_author(post.author_id):
+        return 0
+
+    follower_ids = User.objects.filter(follows=post.author_id).values_list(
+        'id', flat=True
+    )
+    entries = [
+        TimelineEntry(owner_id=follower_id, post_id=post.id)
+        for follower_id in follower_ids
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+    return len(entries)
+
+
+def backfill(follower_id, followee_id):
+    """Copy the latest posts of a newly followed user into the timeline."""
+    if not is_fanout_author(followee_id):
+        return 0
+
+    post_ids = (
+        Post.objects.filter(author=followee_id)
+        .order_by('-id')
+        .values_list('id', flat=True)[:BACKFILL_SIZE]
+    )
+    entries = [
+        TimelineEntry(owner_id=follower_id, post_id=post_id)
+        for post_id in post_ids
+    ]
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+    return len(entries)
+
+
+def remove_author(follower_id, followee_id):
+    """Drop the posts of an unfollowed user from the follower timeline."""
+    return remove_authors(follower_id, [followee_id])
+
+
+def remove_authors(follower_id, followee_ids):
+    """Drop the posts of unfollowed users from the follower timeline."""
+    return TimelineEntry.objects.filter(
+        owner=follower_id, post__author__in=followee_ids
+    ).delete()[0]
+
+
+def feed_queryset(user):
+    """
+    Return the home timeline of the user as a single queryset.
+
+    Pushed entries, the user's own posts and the posts of followed authors
+    that are read on demand are combined with subqueries, so a page of the
+    feed is served by one query.
+    """
+    pushed = TimelineEntry.objects.filter(owner=user).values('post_id')
+    pulled = User.objects.filter(
+        followers=user, followers_count__gt=FANOUT_LIMIT
+    ).values('id')
+
+    return Post.objects.filter(
+        Q(id__in=pushed) | Q(author=user) | Q(author__in=pulled)
+    )
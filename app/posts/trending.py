@@ -0,0 +1,144 @@
+"""
+Trending hashtags with forward-decayed counts.
+
+Each use of a hashtag at time t adds exp(rate * (t - EPOCH)) to the
+hashtag's score in every window, where ``rate = ln 2 / half-life``. Dividing
+by exp(rate * (now - EPOCH)) turns the score into the exponentially decayed
+count at ``now``, and since that divisor is the same for every hashtag, the
+stored scores rank hashtags without ever being rewritten. Scores are kept as
+logarithms so they do not overflow.
+
+Uses are counted in memory and added to ``HashtagTrend`` by a background
+flusher every ``TRENDING_FLUSH_INTERVAL`` seconds. Reading the top k of a
+window is an index scan of k rows.
+"""
+
+import atexit
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from core.models import HashtagTrend
+
+# Window name -> half-life in seconds.
+WINDOWS = getattr(settings, 'TRENDING_WINDOWS', {'1h': 3600, '24h': 86400})
+FLUSH_INTERVAL = getattr(settings, 'TRENDING_FLUSH_INTERVAL', 10.0)
+EPOCH = 1_600_000_000
+EMPTY_SCORE = -1e12
+
+
+def _rate(window):
+    return math.log(2) / WINDOWS[window]
+
+
+def _log_add(a, b):
+    """Return log(exp(a) + exp(b)) without overflow."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+class TrendRecorder:
+    """Accumulates hashtag uses and adds them to the stored scores."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+
+    def record(self, hashtag_ids, at=None):
+        at = time.time() if at is None else at
+        with self._lock:
+            for hashtag_id in hashtag_ids:
+                for window in WINDOWS:
+                    weight = _rate(window) * (at - EPOCH)
+                    key = (hashtag_id, window)
+                    current = self._pending.get(key)
+                    self._pending[key] = (
+                        weight
+                        if current is None
+                        else _log_add(current, weight)
+                    )
+
+        if getattr(settings, 'TRENDING_EAGER', False):
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name='trending-flusher', daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Add the buffered uses to the stored scores."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        HashtagTrend.objects.bulk_create(
+            [
+                HashtagTrend(
+                    hashtag_id=hashtag_id, window=window, score=EMPTY_SCORE
+                )
+                for hashtag_id, window in pending
+            ],
+            ignore_conflicts=True,
+        )
+        with transaction.atomic():
+            rows = HashtagTrend.objects.select_for_update().filter(
+                hashtag_id__in={hashtag_id for hashtag_id, _ in pending},
+                window__in={window for _, window in pending},
+            )
+            changed = []
+            for row in rows:
+                weight = pending.get((row.hashtag_id, row.window))
+                if weight is not None:
+                    row.score = _log_add(row.score, weight)
+                    changed.append(row)
+            HashtagTrend.objects.bulk_update(changed, ['score'])
+        return len(pending)
+
+
+recorder = TrendRecorder()
+atexit.register(recorder.flush)
+
+
+def record(hashtag_ids):
+    """Count one use of each hashtag now."""
+    if hashtag_ids:
+        recorder.record(hashtag_ids)
+
+
+def top(window, limit):
+    """Return the ``limit`` hashtags with the top decayed count in window."""
+    now = _rate(window) * (time.time() - EPOCH)
+    rows = (
+        HashtagTrend.objects
+        .filter(window=window)
+        .select_related('hashtag')
+        .order_by('-score')[:limit]
+    )
+    return [
+        {
+            'id': row.hashtag_id,
+            'name': row.hashtag.name,
+            'score': round(math.exp(row.score - now), 3),
+        }
+        for row in rows
+    ]
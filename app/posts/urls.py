@@ -5,6 +5,7 @@ URL mapping for the posts API.
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from .views import PostViewSet
+from core.asyncviews import async_view
 
 from . import views
 
@@ -14,9 +15,30 @@ router.register('', PostViewSet)
 app_name = 'posts'
 
 urlpatterns = [
+    path('feed/', views.FeedView.as_view(), name='feed'),
+    path('trending/', views.TrendingHashtagView.as_view(), name='trending'),
+    path(
+        'hashtag/<str:name>/',
+        views.HashtagTimelineView.as_view(),
+        name='hashtag_timeline',
+    ),
     path('', include(router.urls)),
     path('<int:pk>/like/', views.LikeActionView.as_view(), name='like_user'),
     path('post/<int:pk>/', views.GetPostView.as_view(), name='post_user'),
-    path('create_hashtag/<int:pk>/', views.CreateHashtagView.as_view(), name='hashtag_post'),
-    path('upload_image/<int:pk>/', views.UploadImageViewSet.as_view(), name='upload_image')
-]
\ No newline at end of file
+    path(
+        'create_hashtag/<int:pk>/',
+        views.CreateHashtagView.as_view(),
+        name='hashtag_post',
+    ),
+    path(
+        'upload_image/<int:pk>/',
+        views.UploadImageViewSet.as_view(),
+        name='upload_image',
+    ),
+    path('async/feed/', async_view(views.FeedView), name='feed_async'),
+    path(
+        'async/post/<int:pk>/',
+        async_view(views.GetPostView),
+        name='post_user_async',
+    ),
+]
@@ -2,14 +2,26 @@
 Views for logical of Posts.
 '''
 
+from django.db import transaction
+from django.db.models import F
 from rest_framework.views import APIView
-from rest_framework import mixins, viewsets, status
+from rest_framework import generics, mixins, viewsets, status
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from .serializers import PostSerializer, PostImageSerializer
-from core.models import Group, Post, Hashtag
+from core import cache
+from core.db import ReplicaReadMixin
+from core.models import Post, Hashtag, HashtagTimeline
+from core.pagination import (
+    CursorPagination,
+    HashtagTimelineCursorPagination,
+    PostCursorPagination,
+)
+from . import timeline, trending
+from notifications import pipeline
 
 class PostViewSet(
     viewsets.GenericViewSet, 
@@ -20,11 +32,12 @@ class PostViewSet(
 ):
     serializer_class = PostSerializer
     queryset = Post.objects.all()
-    authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = PostCursorPagination
 
     def get_queryset(self):
-        return self.queryset.filter(author=self.request.user).order_by('-posted')
+        queryset = self.serializer_class.setup_eager_loading(self.queryset)
+        return queryset.filter(author=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -52,36 +65,70 @@ class UploadImageViewSet(APIView):
 
 class LikeActionView(APIView):
     """Allow the authenticated user to like post."""
-    authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk=None):
-        try:
-            post = Post.objects.get(pk=pk)
-        except Post.DoesNotExist:
-            return Response({"detail": "Post not found."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if post.likes.filter(id=request.user.pk).exists():
-            post.likes.remove(request.user)
-            return Response({"detail": f"Now you don't like this post {post.content}"})
-
-        post.likes.add(request.user)
-        post.save()
+        with transaction.atomic():
+            try:
+                post = Post.objects.select_for_update().get(pk=pk)
+            except Post.DoesNotExist:
+                return Response(
+                    {"detail": "Post not found."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            if post.likes.filter(id=request.user.pk).exists():
+                post.likes.remove(request.user)
+                Post.objects.filter(pk=post.pk).update(
+                    like_count=F('like_count') - 1
+                )
+                return Response(
+                    {"detail": f"Now you don't like this post {post.content}"}
+                )
+
+            post.likes.add(request.user)
+            Post.objects.filter(pk=post.pk).update(
+                like_count=F('like_count') + 1
+            )
+
+        pipeline.notify(
+            [post.author_id],
+            f'{request.user.get_full_name()} liked your post.',
+            sender=request.user,
+            kind='like',
+            target_id=post.pk,
+            group_message='{count} people liked your post.',
+        )
         return Response({"detail": f"Now, you like this post {post.content}"})
     
-class GetPostView(APIView):
+
+class GetPostView(ReplicaReadMixin, APIView):
     """Get a post with a pk."""
-    authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
+        deps = [cache.dep('post', pk)]
+        not_modified, headers = cache.conditional(request, ('post', pk), deps)
+        if not_modified is not None:
+            return not_modified
+
+        def build():
+            post = Post.objects.for_serializer().get(pk=pk)
+            return dict(
+                PostSerializer(
+                    post, many=False, context={'request': request}
+                ).data
+            )
+
         try:
-            post = Post.objects.get(pk=pk)
+            data = cache.responses.get_or_build(('post', pk), deps, build)
         except Post.DoesNotExist:
             return Response({"detail": "Post not found."}, status.HTTP_400_BAD_REQUEST)
-        
-        serializer = PostSerializer(post, many=False)
-        return Response(serializer.data)
+
+        is_liked = Post.likes.through.objects.filter(
+            post_id=pk, user_id=request.user.pk
+        ).exists()
+        return Response({**data, 'is_liked': is_liked}, headers=headers)
     
 class CreateHashtagView(APIView):
     """Create a hashtag when there a post created."""
@@ -93,11 +140,82 @@ class CreateHashtagView(APIView):
             post = Post.objects.get(pk=pk)
         except Post.DoesNotExist:
             return Response({"detail": "Post not found."}, status.HTTP_400_BAD_REQUEST)
-        hashtag = Hashtag.objects.create(
-            name=request.data['name'],
-            user=request.user
-        ) 
+        name = Hashtag.normalize(request.data.get('name', ''))
+        if not name:
+            return Response(
+                {"detail": "Enter a hashtag."}, status.HTTP_400_BAD_REQUEST
+            )
+        hashtag, created = Hashtag.objects.get_or_create(
+            name=name,
+            defaults={'user': request.user}
+        )
 
         post.hashtags.add(hashtag)
+        trending.record([hashtag.id])
         return Response({"detail": "It've created a new hashtag."})
-    
\ No newline at end of file
+
+
+class HashtagTimelineView(ReplicaReadMixin, generics.ListAPIView):
+    """Posts with a hashtag, newest first."""
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = HashtagTimelineCursorPagination
+
+    def get_queryset(self):
+        name = Hashtag.normalize(self.kwargs['name'])
+        try:
+            hashtag = Hashtag.objects.get(name=name)
+        except Hashtag.DoesNotExist:
+            raise NotFound("Hashtag not found.")
+        return HashtagTimeline.objects.filter(hashtag=hashtag).only(
+            'id', 'post_id', 'posted'
+        )
+
+    def list(self, request, *args, **kwargs):
+        rows = self.paginate_queryset(self.get_queryset())
+        post_ids = [row.post_id for row in rows]
+        posts = self.serializer_class.setup_eager_loading(
+            Post.objects.all()
+        ).in_bulk(post_ids)
+        page = [posts[post_id] for post_id in post_ids if post_id in posts]
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class TrendingHashtagView(APIView):
+    """Hashtags with the highest decayed use count in a window."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        window = request.query_params.get(
+            'window', next(iter(trending.WINDOWS))
+        )
+        if window not in trending.WINDOWS:
+            return Response(
+                {
+                    "detail": (
+                        "Unknown window, use one of: "
+                        f"{', '.join(trending.WINDOWS)}."
+                    )
+                },
+                status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+        except ValueError:
+            limit = 10
+
+        return Response(
+            {'window': window, 'results': trending.top(window, limit)}
+        )
+
+
+class FeedView(ReplicaReadMixin, generics.ListAPIView):
+    """Home timeline with the posts of the users the current user follows."""
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
+
+    def get_queryset(self):
+        queryset = timeline.feed_queryset(self.request.user)
+        return self.serializer_class.setup_eager_loading(queryset)